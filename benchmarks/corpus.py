@@ -0,0 +1,71 @@
+"""
+Synthetic, seeded corpora for the benchmark suite.
+
+The same (seed, documents, tokens, density, max_span) always produces the
+same texts and annotations, so runs on different machines or commits are
+comparable.
+"""
+
+from __future__ import annotations
+
+import random
+from dataclasses import dataclass
+from typing import List, Tuple
+
+from vibex import SentimentAnnotation
+
+# A small fixed vocabulary with a realistic spread of word lengths.
+_WORDS = (
+    "the a an and or but of to in on for with at by from as is was were be been "
+    "service staff product price delivery order refund support quality screen battery "
+    "camera update account payment store brand experience team manager customer "
+    "amazing terrible slow fast broken lovely awful great poor excellent disappointing "
+    "really very never always again still quite absolutely barely hardly"
+).split()
+
+
+@dataclass(frozen=True)
+class CorpusSpec:
+    """
+    documents : number of documents
+    tokens    : mean tokens per document (actual lengths vary +-50%)
+    density   : annotations per token
+    max_span  : longest annotation span in tokens (1-8)
+    seed      : RNG seed
+    """
+
+    documents: int = 1000
+    tokens: int = 200
+    density: float = 0.05
+    max_span: int = 4
+    seed: int = 1234
+
+
+Document = Tuple[str, List[SentimentAnnotation]]
+
+
+def generate(spec: CorpusSpec) -> List[Document]:
+    rng = random.Random(spec.seed)
+    corpus: List[Document] = []
+
+    for _ in range(spec.documents):
+        count = max(1, int(spec.tokens * rng.uniform(0.5, 1.5)))
+        text = " ".join(rng.choice(_WORDS) for _ in range(count))
+
+        annotations: List[SentimentAnnotation] = []
+        for anchor in range(count):
+            if rng.random() >= spec.density:
+                continue
+            annotations.append(
+                SentimentAnnotation(
+                    anchor=anchor,
+                    length=rng.randint(1, spec.max_span),
+                    polarity=rng.randrange(4),
+                    intensity=rng.randrange(8),
+                    context=rng.randrange(2),
+                    emotion=rng.randrange(8),
+                )
+            )
+        corpus.append((text, annotations))
+
+    return corpus
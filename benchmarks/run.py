@@ -0,0 +1,323 @@
+"""
+Benchmark suite for the MetaBlock codec, encoder, decoder and queries.
+
+Run (from the repository root, with vibex importable):
+
+    python benchmarks/run.py --documents 2000 --tokens 200 --density 0.05 -o base.json
+    python benchmarks/run.py --only decode -o new.json
+    python benchmarks/run.py compare base.json new.json --threshold 0.05
+
+Every case is timed call by call over a seeded synthetic corpus (see
+``corpus.py``). The JSON report holds, per case:
+
+    items_per_s / units_per_s : throughput (items are documents, batches or
+                                MetaBlock chunks; units are MetaBlocks)
+    ns_per_unit               : mean time per MetaBlock
+    p50_us / p90_us / p99_us  : per-item latency percentiles
+    peak_kib                  : tracemalloc peak of one extra, untimed pass
+
+``compare`` prints the throughput change per case and exits with status 1
+when a case got slower than ``--threshold`` (a fraction).
+"""
+
+from __future__ import annotations
+
+import argparse
+import atexit
+import io
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+import tracemalloc
+from dataclasses import asdict
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, "src"))
+
+from corpus import CorpusSpec, Document, generate  # noqa: E402
+
+from vibex import InlineDecoder, InlineEncoder, InlineMarkerConfig, MetaBlock, SidecarReader, SidecarWriter, Tokenizer  # noqa: E402
+from vibex.query import CompiledQuery, compile_query, parse  # noqa: E402
+
+# (callable, [(argument, units)])
+Workload = Tuple[Callable[[Any], Any], List[Tuple[Any, int]]]
+
+_CHUNK = 1024
+_BATCH = 64
+
+QUERIES = (
+    "polarity == NEG & intensity >= 5",
+    "emotion == 3 | emotion == 5",
+    "has_span == 1 & span >= 3 & context == 1",
+    "~(polarity == NEUTRAL) & intensity < 2",
+)
+
+
+# ---------------------------------------------------------
+# Cases
+# ---------------------------------------------------------
+
+def _chunks(items: List[Any], size: int) -> List[Tuple[List[Any], int]]:
+    return [(items[start:start + size], len(items[start:start + size])) for start in range(0, len(items), size)]
+
+
+def _all_blocks(corpus: List[Document]) -> List[MetaBlock]:
+    return [annotation.to_metablock() for _, annotations in corpus for annotation in annotations]
+
+
+def case_to_hex(corpus: List[Document], config: InlineMarkerConfig) -> Workload:
+    return (lambda blocks: [block.to_hex() for block in blocks]), _chunks(_all_blocks(corpus), _CHUNK)
+
+
+def case_from_hex(corpus: List[Document], config: InlineMarkerConfig) -> Workload:
+    payloads = [block.to_hex() for block in _all_blocks(corpus)]
+    return (lambda chunk: [MetaBlock.from_hex(payload) for payload in chunk]), _chunks(payloads, _CHUNK)
+
+
+def case_encode(corpus: List[Document], config: InlineMarkerConfig) -> Workload:
+    encoder = InlineEncoder(Tokenizer(), config)
+    return (lambda doc: encoder.encode(*doc)), [(doc, len(doc[1])) for doc in corpus]
+
+
+def case_encode_batch(corpus: List[Document], config: InlineMarkerConfig) -> Workload:
+    encoder = InlineEncoder(Tokenizer(), config)
+    batches = [
+        (([text for text, _ in batch], [a for _, a in batch]), sum(len(a) for _, a in batch))
+        for batch, _ in _chunks(corpus, _BATCH)
+    ]
+    return (lambda batch: encoder.encode_batch(*batch)), batches
+
+
+def case_encode_stream(corpus: List[Document], config: InlineMarkerConfig) -> Workload:
+    encoder = InlineEncoder(Tokenizer(), config)
+
+    def run(doc: Document) -> str:
+        text, annotations = doc
+        ordered = sorted(annotations, key=lambda a: a.anchor)
+        return "".join(encoder.encode_stream(io.StringIO(text), ordered, chunk_size=4096))
+
+    return run, [(doc, len(doc[1])) for doc in corpus]
+
+
+def _encoded(corpus: List[Document], config: InlineMarkerConfig) -> List[Tuple[str, int]]:
+    encoder = InlineEncoder(Tokenizer(), config)
+    return [(encoder.encode(text, annotations), len(annotations)) for text, annotations in corpus]
+
+
+def case_decode(corpus: List[Document], config: InlineMarkerConfig) -> Workload:
+    return InlineDecoder(Tokenizer(), config).decode, _encoded(corpus, config)
+
+
+def case_decode_fast(corpus: List[Document], config: InlineMarkerConfig) -> Workload:
+    return InlineDecoder(Tokenizer(), config).decode_fast, _encoded(corpus, config)
+
+
+def case_decode_lazy(corpus: List[Document], config: InlineMarkerConfig) -> Workload:
+    decoder = InlineDecoder(Tokenizer(), config)
+    return (lambda text: decoder.decode_lazy(text).codes), _encoded(corpus, config)
+
+
+def case_decode_batch(corpus: List[Document], config: InlineMarkerConfig) -> Workload:
+    decoder = InlineDecoder(Tokenizer(), config)
+    encoded = _encoded(corpus, config)
+    batches = [([text for text, _ in batch], sum(units for _, units in batch)) for batch, _ in _chunks(encoded, _BATCH)]
+    return decoder.decode_batch, batches
+
+
+def case_decode_stream(corpus: List[Document], config: InlineMarkerConfig) -> Workload:
+    decoder = InlineDecoder(Tokenizer(), config)
+    return (lambda text: list(decoder.decode_stream(io.StringIO(text), chunk_size=4096))), _encoded(corpus, config)
+
+
+def case_query_compile(corpus: List[Document], config: InlineMarkerConfig) -> Workload:
+    # Bypasses the compile cache so every call does the full work.
+    return (lambda expression: CompiledQuery(parse.__wrapped__(expression))), [(q, 1) for q in QUERIES]
+
+
+def case_query_search(corpus: List[Document], config: InlineMarkerConfig) -> Workload:
+    handle, path = tempfile.mkstemp(suffix=".vxsc")
+    os.close(handle)
+    atexit.register(os.remove, path)
+    with SidecarWriter(path) as writer:
+        for _, annotations in corpus:
+            writer.write(annotation.to_inline_block(config) for annotation in annotations)
+
+    reader = SidecarReader(path)
+    blocks = sum(len(annotations) for _, annotations in corpus)
+    return (lambda expression: sum(1 for _ in compile_query(expression).search(reader))), [(q, blocks) for q in QUERIES]
+
+
+CASES: Dict[str, Callable[[List[Document], InlineMarkerConfig], Workload]] = {
+    "metablock.to_hex": case_to_hex,
+    "metablock.from_hex": case_from_hex,
+    "encoder.encode": case_encode,
+    "encoder.encode_batch": case_encode_batch,
+    "encoder.encode_stream": case_encode_stream,
+    "decoder.decode": case_decode,
+    "decoder.decode_fast": case_decode_fast,
+    "decoder.decode_lazy": case_decode_lazy,
+    "decoder.decode_batch": case_decode_batch,
+    "decoder.decode_stream": case_decode_stream,
+    "query.compile": case_query_compile,
+    "query.search": case_query_search,
+}
+
+
+# ---------------------------------------------------------
+# Measurement
+# ---------------------------------------------------------
+
+def _percentile(ordered: List[int], fraction: float) -> float:
+    index = min(len(ordered) - 1, int(round(fraction * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def measure(workload: Workload, repeat: int) -> Dict[str, float]:
+    """Time every item ``repeat`` times; the workload must not be empty."""
+    func, items = workload
+    if not items:
+        raise ValueError("Cannot measure an empty workload.")
+    clock = time.perf_counter_ns
+
+    for argument, _ in items[: max(1, len(items) // 10)]:
+        func(argument)  # warm-up
+
+    latencies: List[int] = []
+    units = 0
+    for _ in range(repeat):
+        for argument, count in items:
+            start = clock()
+            func(argument)
+            latencies.append(clock() - start)
+            units += count
+
+    tracemalloc.start()
+    for argument, _ in items:
+        func(argument)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    elapsed = max(sum(latencies), 1)
+    latencies.sort()
+    return {
+        "items": len(latencies),
+        "units": units,
+        "seconds": elapsed / 1e9,
+        "items_per_s": len(latencies) / (elapsed / 1e9),
+        "units_per_s": units / (elapsed / 1e9),
+        "ns_per_unit": elapsed / units if units else 0.0,
+        "p50_us": _percentile(latencies, 0.50) / 1e3,
+        "p90_us": _percentile(latencies, 0.90) / 1e3,
+        "p99_us": _percentile(latencies, 0.99) / 1e3,
+        "peak_kib": peak / 1024,
+    }
+
+
+def run(args: argparse.Namespace) -> Dict[str, Any]:
+    spec = CorpusSpec(args.documents, args.tokens, args.density, args.max_span, args.seed)
+    corpus = generate(spec)
+    config = InlineMarkerConfig(compact=args.compact)
+
+    results: Dict[str, Any] = {}
+    for name, case in CASES.items():
+        if args.only and not any(pattern in name for pattern in args.only):
+            continue
+        workload = case(corpus, config)
+        if not workload[1]:
+            # e.g. the MetaBlock cases on an unannotated corpus (--density 0)
+            print(f"{name:24} skipped: no items", file=sys.stderr)
+            continue
+        results[name] = measure(workload, args.repeat)
+        print(f"{name:24} {results[name]['units_per_s']:>14,.0f} blocks/s  p50 {results[name]['p50_us']:>9.1f} us", file=sys.stderr)
+
+    return {
+        "meta": {
+            "python": platform.python_version(),
+            "implementation": platform.python_implementation(),
+            "platform": platform.platform(),
+            "machine": platform.machine(),
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+            "corpus": asdict(spec),
+            "compact": args.compact,
+            "repeat": args.repeat,
+        },
+        "results": results,
+    }
+
+
+def compare(base: Dict[str, Any], new: Dict[str, Any], threshold: float) -> List[str]:
+    """
+    Print per-case throughput changes; return the names of regressed cases.
+
+    A case regresses when its items/s or, if it processes any blocks, its
+    blocks/s drops by more than ``threshold``; unannotated workloads have
+    no blocks and are judged by items/s alone.
+    """
+    regressed: List[str] = []
+    print(f"{'case':24} {'base items/s':>14} {'new items/s':>14} {'change':>8} {'blocks/s change':>16}")
+    for name in sorted(set(base["results"]) & set(new["results"])):
+        old, current = base["results"][name], new["results"][name]
+        changes = [_change(old["items_per_s"], current["items_per_s"])]
+        if old["units_per_s"] and current["units_per_s"]:
+            changes.append(_change(old["units_per_s"], current["units_per_s"]))
+        flag = ""
+        if min(changes) < -threshold:
+            regressed.append(name)
+            flag = "  REGRESSION"
+        units = f"{changes[1]:>+16.1%}" if len(changes) > 1 else f"{'-':>16}"
+        print(f"{name:24} {old['items_per_s']:>14,.0f} {current['items_per_s']:>14,.0f} {changes[0]:>+8.1%} {units}{flag}")
+    return regressed
+
+
+def _change(before: float, after: float) -> float:
+    return after / before - 1 if before else 0.0
+
+
+# ---------------------------------------------------------
+# Command line
+# ---------------------------------------------------------
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="VIBE-X benchmark suite.")
+    parser.add_argument("--documents", type=int, default=1000)
+    parser.add_argument("--tokens", type=int, default=200, help="mean tokens per document")
+    parser.add_argument("--density", type=float, default=0.05, help="annotations per token")
+    parser.add_argument("--max-span", type=int, default=4, help="longest annotation span (1-8)")
+    parser.add_argument("--seed", type=int, default=1234)
+    parser.add_argument("--repeat", type=int, default=3, help="timed passes per case")
+    parser.add_argument("--compact", action="store_true", help="use single code point markers")
+    parser.add_argument("--only", nargs="*", default=None, help="run cases whose name contains any of these")
+    parser.add_argument("-o", "--output", default=None, help="write the JSON report here (default: stdout)")
+    return parser
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    argv = list(sys.argv[1:] if argv is None else argv)
+
+    if argv[:1] == ["compare"]:
+        parser = argparse.ArgumentParser(description="Compare two benchmark reports.")
+        parser.add_argument("base")
+        parser.add_argument("new")
+        parser.add_argument("--threshold", type=float, default=0.05, help="allowed slowdown fraction")
+        options = parser.parse_args(argv[1:])
+        with open(options.base, encoding="utf-8") as handle:
+            base = json.load(handle)
+        with open(options.new, encoding="utf-8") as handle:
+            new = json.load(handle)
+        return 1 if compare(base, new, options.threshold) else 0
+
+    args = build_parser().parse_args(argv)
+    text = json.dumps(run(args), indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as handle:
+            handle.write(text + "\n")
+    else:
+        print(text)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
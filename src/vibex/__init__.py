@@ -3,10 +3,20 @@ VIBE-X Protocol Python Package
 """
 
 from .inline_encoder import InlineEncoder, InlineMarkerConfig, SentimentAnnotation
-from .inline_decoder import InlineDecoder, DecodedInlineText
-from .metablock import MetaBlock, InlineMetaBlock, TokenSpan
-from .tokenizer import Tokenizer
-from .exceptions import MetaBlockEncodingError, MetaBlockDecodingError
+from .inline_decoder import InlineDecoder, DecodedBatch, DecodedInlineText, LazyDecodedInlineText
+from .metablock import MetaBlock, MetaBlockArray, InlineMetaBlock, TokenSpan
+from .tokenizer import Tokenizer, TokenizerProtocol
+from .subword import Alignment, BPETokenizer
+from .patch import AnnotationDiff, InlinePatcher
+from .sidecar import SidecarReader, SidecarWriter
+from .exceptions import (
+    MetaBlockEncodingError,
+    MetaBlockDecodingError,
+    QuerySyntaxError,
+    SidecarFormatError,
+    ArchiveFormatError,
+    IndexFormatError,
+)
 
 __all__ = [
     "InlineEncoder",
@@ -14,10 +24,24 @@ __all__ = [
     "InlineMarkerConfig",
     "SentimentAnnotation",
     "DecodedInlineText",
+    "DecodedBatch",
+    "LazyDecodedInlineText",
     "MetaBlock",
+    "MetaBlockArray",
     "InlineMetaBlock",
     "TokenSpan",
     "Tokenizer",
+    "TokenizerProtocol",
+    "BPETokenizer",
+    "Alignment",
+    "AnnotationDiff",
+    "InlinePatcher",
+    "SidecarReader",
+    "SidecarWriter",
     "MetaBlockEncodingError",
     "MetaBlockDecodingError",
+    "SidecarFormatError",
+    "ArchiveFormatError",
+    "IndexFormatError",
+    "QuerySyntaxError",
 ]
@@ -0,0 +1,341 @@
+"""
+Aggregations over packed MetaBlock codes.
+
+Every statistic over SPICE-R fields is a function of how often each of the
+16384 codes occurs, so the only per-block work is counting codes::
+
+    histogram = CodeHistogram.from_sidecar(reader)
+    histogram.marginal("emotion")                       # blocks per emotion class
+    histogram.mean_by("intensity", "polarity")          # average intensity per polarity
+    histogram.count("polarity == NEG & intensity >= 5") # any query predicate
+
+Counting uses ``numpy.bincount`` for NumPy inputs and for sidecars when
+NumPy is installed (documents are counted in batches of about
+``_BINCOUNT_BATCH`` codes), and ``collections.Counter`` otherwise;
+everything after that is a reduction over 16384 bins, no matter
+how many blocks were counted. ``GroupedHistogram`` keeps one histogram per
+key (document, brand, time bucket, ...), and both types merge partial
+results computed on different shards.
+"""
+
+from __future__ import annotations
+
+import sys
+from array import array
+from collections import Counter
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, Generic, Hashable, Iterable, Iterator, List, Optional, Tuple, TypeVar, Union
+
+from .metablock import FIELD_LAYOUT, METABLOCK_SPACE, MetaBlockArray, code_range_error, require_numpy
+from .query import CompiledQuery, Predicate, compile_query
+
+K = TypeVar("K", bound=Hashable)
+
+Where = Union[str, Predicate, CompiledQuery, None]
+
+
+# Codes gathered before one bincount call when counting sidecars.
+_BINCOUNT_BATCH = 1 << 16
+
+
+def _optional_numpy() -> Any:
+    try:
+        return require_numpy()
+    except ImportError:
+        return None
+
+
+def _iter_code_batches(reader: Any, numpy: Any) -> Iterator[Tuple[List[int], List[Any], Any]]:
+    """
+    (document indices, per-document codes, all codes concatenated) for the
+    documents of a SidecarReader, in batches of about _BINCOUNT_BATCH codes.
+    """
+    docs: List[int] = []
+    parts: List[Any] = []
+    buffered = 0
+    for doc in range(len(reader)):
+        codes = reader.codes_array(doc)
+        docs.append(doc)
+        parts.append(codes)
+        buffered += len(codes)
+        if buffered >= _BINCOUNT_BATCH:
+            yield docs, parts, numpy.concatenate(parts)
+            docs, parts, buffered = [], [], 0
+    if docs:
+        yield docs, parts, numpy.concatenate(parts)
+
+
+def _field(name: str) -> Tuple[int, int]:
+    try:
+        return FIELD_LAYOUT[name]
+    except KeyError:
+        raise ValueError(f"Unknown MetaBlock field: {name}") from None
+
+
+def _table(where: Where) -> Optional[bytes]:
+    if where is None:
+        return None
+    if not isinstance(where, CompiledQuery):
+        where = compile_query(where)
+    return where.table
+
+
+# ---------------------------------------------------------
+# Code histogram
+# ---------------------------------------------------------
+
+class CodeHistogram:
+    """
+    Number of occurrences of every 14-bit MetaBlock code.
+
+    ``counts[code]`` is a 64-bit counter. Field marginals, sums, means and
+    cross tabulations are derived from the bins; ``where`` arguments accept
+    anything ``vibex.query.compile_query`` does and restrict the bins used.
+    """
+
+    __slots__ = ("counts",)
+
+    def __init__(self, counts: Optional[Iterable[int]] = None) -> None:
+        self.counts = array("Q", counts if counts is not None else bytes(8 * METABLOCK_SPACE))
+        if len(self.counts) != METABLOCK_SPACE:
+            raise ValueError(f"A code histogram has exactly {METABLOCK_SPACE} bins.")
+
+    @classmethod
+    def from_codes(cls, codes: Any) -> CodeHistogram:
+        histogram = cls()
+        histogram.add(codes)
+        return histogram
+
+    @classmethod
+    def from_sidecar(cls, reader: Any) -> CodeHistogram:
+        """Count every block of a SidecarReader."""
+        histogram = cls()
+        numpy = _optional_numpy()
+        if numpy is not None:
+            for _, _, codes in _iter_code_batches(reader, numpy):
+                histogram.add(codes)
+            return histogram
+
+        for doc in range(len(reader)):
+            codes = reader.codes(doc)
+            histogram.add(codes)
+            if isinstance(codes, memoryview):
+                codes.release()
+        return histogram
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, CodeHistogram):
+            return NotImplemented
+        return self.counts == other.counts
+
+    def __repr__(self) -> str:
+        return f"CodeHistogram(total={self.total})"
+
+    # ---------------------------------------------------------
+    # Counting and merging
+    # ---------------------------------------------------------
+
+    def add(self, codes: Any) -> None:
+        """
+        Count a MetaBlockArray, NumPy array or any iterable of codes.
+
+        Codes outside 0..16383 raise ValueError before anything is counted.
+        """
+        if isinstance(codes, MetaBlockArray):
+            codes = codes.codes
+
+        counts = self.counts
+        if hasattr(codes, "dtype"):
+            numpy = require_numpy()
+            codes = numpy.asarray(codes)
+            if codes.size and (codes.min() < 0 or codes.max() >= METABLOCK_SPACE):
+                bad = codes.min() if codes.min() < 0 else codes.max()
+                raise code_range_error(int(bad))
+            binned = numpy.bincount(codes.astype(numpy.intp, copy=False).ravel(), minlength=METABLOCK_SPACE)
+            view = numpy.frombuffer(counts, dtype=numpy.uint64)
+            view += binned.astype(numpy.uint64)
+            return
+
+        tally = Counter(codes)
+        for code in tally:
+            if not 0 <= code < METABLOCK_SPACE:
+                raise code_range_error(code)
+        for code, hits in tally.items():
+            counts[code] += hits
+
+    def merge(self, other: CodeHistogram) -> CodeHistogram:
+        """Add the counts of another (shard) histogram into this one."""
+        counts = self.counts
+        for code, hits in enumerate(other.counts):
+            if hits:
+                counts[code] += hits
+        return self
+
+    def __iadd__(self, other: CodeHistogram) -> CodeHistogram:
+        return self.merge(other)
+
+    def __add__(self, other: CodeHistogram) -> CodeHistogram:
+        return CodeHistogram(self.counts).merge(other)
+
+    def to_bytes(self) -> bytes:
+        """Little-endian dump for shipping partial results between processes or hosts."""
+        counts = array("Q", self.counts)
+        if sys.byteorder == "big":
+            counts.byteswap()
+        return counts.tobytes()
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> CodeHistogram:
+        counts = array("Q")
+        counts.frombytes(data)
+        if sys.byteorder == "big":
+            counts.byteswap()
+        return cls(counts)
+
+    # ---------------------------------------------------------
+    # Reductions
+    # ---------------------------------------------------------
+
+    def _bins(self, where: Where) -> Iterator[Tuple[int, int]]:
+        table = _table(where)
+        for code, hits in enumerate(self.counts):
+            if hits and (table is None or table[code]):
+                yield code, hits
+
+    @property
+    def total(self) -> int:
+        return sum(self.counts)
+
+    def count(self, where: Where = None) -> int:
+        """Number of blocks (matching ``where``)."""
+        return sum(hits for _, hits in self._bins(where))
+
+    def marginal(self, field: str, where: Where = None) -> List[int]:
+        """Blocks per value of ``field``; index i holds the count for value i."""
+        shift, mask = _field(field)
+        result = [0] * (mask + 1)
+        for code, hits in self._bins(where):
+            result[(code >> shift) & mask] += hits
+        return result
+
+    def sum(self, field: str, where: Where = None) -> int:
+        shift, mask = _field(field)
+        return sum(((code >> shift) & mask) * hits for code, hits in self._bins(where))
+
+    def mean(self, field: str, where: Where = None) -> Optional[float]:
+        """Average value of ``field``; None when no block matches."""
+        count = self.count(where)
+        return self.sum(field, where) / count if count else None
+
+    def crosstab(self, row: str, column: str, where: Where = None) -> List[List[int]]:
+        """``result[a][b]`` = blocks with ``row == a`` and ``column == b``."""
+        row_shift, row_mask = _field(row)
+        col_shift, col_mask = _field(column)
+        result = [[0] * (col_mask + 1) for _ in range(row_mask + 1)]
+        for code, hits in self._bins(where):
+            result[(code >> row_shift) & row_mask][(code >> col_shift) & col_mask] += hits
+        return result
+
+    def sum_by(self, value: str, group: str, where: Where = None) -> List[int]:
+        """Sum of ``value`` per value of ``group`` (e.g. total intensity per polarity)."""
+        table = self.crosstab(group, value, where)
+        return [sum(index * hits for index, hits in enumerate(row)) for row in table]
+
+    def mean_by(self, value: str, group: str, where: Where = None) -> List[Optional[float]]:
+        """Average of ``value`` per value of ``group``; None for empty groups."""
+        sums = self.sum_by(value, group, where)
+        counts = self.marginal(group, where)
+        return [total / count if count else None for total, count in zip(sums, counts)]
+
+
+# ---------------------------------------------------------
+# Grouped histograms
+# ---------------------------------------------------------
+
+class GroupedHistogram(Generic[K]):
+    """
+    One CodeHistogram per group key.
+
+    Keys are arbitrary hashables: document ids, brands, or time buckets
+    from ``time_bucket``. Reductions return ``{key: result}`` dicts.
+    """
+
+    def __init__(self) -> None:
+        self.groups: Dict[K, CodeHistogram] = {}
+
+    def __len__(self) -> int:
+        return len(self.groups)
+
+    def __getitem__(self, key: K) -> CodeHistogram:
+        return self.groups[key]
+
+    def keys(self) -> List[K]:
+        return sorted(self.groups)  # type: ignore[type-var]
+
+    def add(self, key: K, codes: Any) -> None:
+        histogram = self.groups.get(key)
+        if histogram is None:
+            histogram = self.groups[key] = CodeHistogram()
+        histogram.add(codes)
+
+    @classmethod
+    def from_sidecar(cls, reader: Any, key: Callable[[int], K]) -> GroupedHistogram[K]:
+        """Group the documents of a SidecarReader by ``key(document index)``."""
+        grouped: GroupedHistogram[K] = cls()
+        numpy = _optional_numpy()
+        if numpy is not None:
+            for docs, parts, codes in _iter_code_batches(reader, numpy):
+                by_key: Dict[K, List[Any]] = {}
+                for doc, part in zip(docs, parts):
+                    by_key.setdefault(key(doc), []).append(part)
+                if len(by_key) == 1:
+                    grouped.add(next(iter(by_key)), codes)
+                    continue
+                for group, group_parts in by_key.items():
+                    grouped.add(group, numpy.concatenate(group_parts))
+            return grouped
+
+        for doc in range(len(reader)):
+            codes = reader.codes(doc)
+            grouped.add(key(doc), codes)
+            if isinstance(codes, memoryview):
+                codes.release()
+        return grouped
+
+    def merge(self, other: GroupedHistogram[K]) -> GroupedHistogram[K]:
+        for key, histogram in other.groups.items():
+            mine = self.groups.get(key)
+            if mine is None:
+                self.groups[key] = CodeHistogram(histogram.counts)
+            else:
+                mine.merge(histogram)
+        return self
+
+    def total(self) -> CodeHistogram:
+        """All groups folded into one histogram."""
+        result = CodeHistogram()
+        for histogram in self.groups.values():
+            result.merge(histogram)
+        return result
+
+    def count(self, where: Where = None) -> Dict[K, int]:
+        return {key: self.groups[key].count(where) for key in self.keys()}
+
+    def marginal(self, field: str, where: Where = None) -> Dict[K, List[int]]:
+        return {key: self.groups[key].marginal(field, where) for key in self.keys()}
+
+    def mean(self, field: str, where: Where = None) -> Dict[K, Optional[float]]:
+        return {key: self.groups[key].mean(field, where) for key in self.keys()}
+
+
+def time_bucket(timestamp: Union[int, float, datetime], seconds: int = 86400) -> int:
+    """
+    Start (Unix seconds) of the ``seconds``-wide bucket holding ``timestamp``.
+
+    Naive datetimes are taken as UTC. ``seconds=86400`` gives daily rollups.
+    """
+    if isinstance(timestamp, datetime):
+        if timestamp.tzinfo is None:
+            timestamp = timestamp.replace(tzinfo=timezone.utc)
+        timestamp = timestamp.timestamp()
+    return int(timestamp // seconds) * seconds
@@ -0,0 +1,202 @@
+"""
+Asyncio front end for the inline encoder and decoder.
+
+``AsyncInlineCodec`` runs small documents directly on the event loop and
+offloads documents of at least ``offload_threshold`` characters to an
+executor, with at most ``max_in_flight`` offloaded calls at a time. The
+``*_iter`` methods consume async (or plain) iterables and keep at most
+``max_in_flight`` documents in progress, so a slow consumer stops the
+source from being read ahead: that is the backpressure.
+
+    codec = AsyncInlineCodec(InlineEncoder(Tokenizer()), InlineDecoder(Tokenizer()))
+    async for decoded in codec.decode_iter(messages):
+        ...
+"""
+
+from __future__ import annotations
+
+import asyncio
+import codecs
+from collections import deque
+from concurrent.futures import Executor
+from functools import partial
+from typing import (
+    Any,
+    AsyncIterable,
+    AsyncIterator,
+    Awaitable,
+    Callable,
+    Deque,
+    Iterable,
+    Optional,
+    Tuple,
+    TypeVar,
+    Union,
+)
+
+from .inline_decoder import DecodedInlineText, InlineDecoder
+from .inline_encoder import InlineEncoder, SentimentAnnotation
+from .metablock import InlineMetaBlock
+from .tokenizer import Tokenizer, last_whitespace
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+# (text, annotations) pairs accepted by ``encode_iter``
+EncodeItem = Tuple[str, Iterable[SentimentAnnotation]]
+
+
+# ---------------------------------------------------------
+# Async iteration helpers
+# ---------------------------------------------------------
+
+async def _aiter(items: Union[AsyncIterable[T], Iterable[T]]) -> AsyncIterator[T]:
+    if hasattr(items, "__aiter__"):
+        async for item in items:  # type: ignore[union-attr]
+            yield item
+    else:
+        for item in items:  # type: ignore[union-attr]
+            yield item
+
+
+async def _read_chunks(source: Any, chunk_size: int) -> AsyncIterator[str]:
+    """Text chunks from an ``asyncio.StreamReader`` or an async iterable of str/bytes."""
+    decoder = codecs.getincrementaldecoder("utf-8")()
+
+    # StreamReader is also async-iterable, but line by line: read() keeps
+    # chunks bounded by ``chunk_size`` instead of the reader's line limit.
+    if hasattr(source, "read"):
+        while True:
+            data = await source.read(chunk_size)
+            if not data:
+                break
+            text = decoder.decode(data) if isinstance(data, bytes) else data
+            if text:
+                yield text
+    else:
+        async for data in _aiter(source):
+            text = decoder.decode(data) if isinstance(data, bytes) else data
+            if text:
+                yield text
+
+    tail = decoder.decode(b"", final=True)
+    if tail:
+        yield tail
+
+
+async def _whole_tokens(source: Any, chunk_size: int) -> AsyncIterator[str]:
+    """Async counterpart of ``tokenizer.iter_whole_tokens``."""
+    pending = []
+    async for chunk in _read_chunks(source, chunk_size):
+        cut = last_whitespace(chunk)
+        if cut == -1:
+            pending.append(chunk)
+            continue
+
+        pending.append(chunk[:cut + 1])
+        yield "".join(pending)
+        pending = [chunk[cut + 1:]]
+
+    tail = "".join(pending)
+    if tail:
+        yield tail
+
+
+# ---------------------------------------------------------
+# Async codec
+# ---------------------------------------------------------
+
+class AsyncInlineCodec:
+    """
+    Async encode/decode over one encoder and decoder.
+
+    executor          : where large documents run (None = the loop's default executor)
+    offload_threshold : documents shorter than this many characters run inline
+    max_in_flight     : bound on offloaded calls and on documents in progress per iterator
+    """
+
+    def __init__(
+        self,
+        encoder: Optional[InlineEncoder] = None,
+        decoder: Optional[InlineDecoder] = None,
+        executor: Optional[Executor] = None,
+        offload_threshold: int = 1 << 16,
+        max_in_flight: int = 32,
+    ) -> None:
+        if max_in_flight < 1:
+            raise ValueError("max_in_flight must be at least 1.")
+        self._encoder = encoder or InlineEncoder(Tokenizer())
+        self._decoder = decoder or InlineDecoder(Tokenizer())
+        self._executor = executor
+        self._offload_threshold = offload_threshold
+        self._max_in_flight = max_in_flight
+        self._slots = asyncio.Semaphore(max_in_flight)
+
+    # ---------------------------------------------------------
+    # Single documents
+    # ---------------------------------------------------------
+
+    async def encode(self, text: str, annotations: Iterable[SentimentAnnotation]) -> str:
+        return await self._run(self._encoder.encode, len(text), text, list(annotations))
+
+    async def decode(self, inline_text: str) -> DecodedInlineText:
+        return await self._run(self._decoder.decode, len(inline_text), inline_text)
+
+    # ---------------------------------------------------------
+    # Many documents
+    # ---------------------------------------------------------
+
+    def encode_iter(self, items: Union[AsyncIterable[EncodeItem], Iterable[EncodeItem]]) -> AsyncIterator[str]:
+        """Encode (text, annotations) pairs; results keep the input order."""
+        return self._map(lambda item: self.encode(*item), items)
+
+    def decode_iter(self, texts: Union[AsyncIterable[str], Iterable[str]]) -> AsyncIterator[DecodedInlineText]:
+        """Decode documents; results keep the input order."""
+        return self._map(self.decode, texts)
+
+    async def decode_stream(self, source: Any, chunk_size: int = 1 << 16) -> AsyncIterator[Union[str, InlineMetaBlock]]:
+        """
+        Async ``InlineDecoder.decode_stream``.
+
+        ``source`` is an ``asyncio.StreamReader`` (UTF-8 bytes) or an async
+        iterable of str or bytes chunks.
+        """
+        tokens = 0
+        async for piece in _whole_tokens(source, chunk_size):
+            items = await self._run(_decode_piece, len(piece), self._decoder, piece, tokens)
+            for item in items:
+                yield item
+            tokens += len(piece.split())
+
+    # ---------------------------------------------------------
+    # INTERNAL
+    # ---------------------------------------------------------
+
+    async def _run(self, func: Callable[..., R], size: int, *args: Any) -> R:
+        if size < self._offload_threshold:
+            return func(*args)
+
+        async with self._slots:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._executor, partial(func, *args))
+
+    async def _map(
+        self,
+        func: Callable[[T], Awaitable[R]],
+        items: Union[AsyncIterable[T], Iterable[T]],
+    ) -> AsyncIterator[R]:
+        pending: Deque[asyncio.Task] = deque()
+        try:
+            async for item in _aiter(items):
+                pending.append(asyncio.ensure_future(func(item)))
+                if len(pending) >= self._max_in_flight:
+                    yield await pending.popleft()
+            while pending:
+                yield await pending.popleft()
+        finally:
+            for task in pending:
+                task.cancel()
+
+
+def _decode_piece(decoder: InlineDecoder, piece: str, first_token: int) -> list:
+    return list(decoder.decode_stream((piece,), first_token=first_token))
@@ -0,0 +1,500 @@
+"""
+Compressed columnar archive for long-term MetaBlock storage.
+
+Documents are grouped into row groups of about ``row_group_size`` blocks
+(a document never straddles two groups). Inside a group every SPICE-R
+field of the packed 14-bit codes is its own column, bit-packed at the
+field width or run-length encoded when that is smaller, then zlib
+compressed; anchors and per-document block counts are zigzag-varint
+deltas as in the sidecar format. Codes are rebuilt from the raw field
+bits, so every archive round-trips to exactly the codes written.
+
+Each row group records a zone map: the set of values present per field.
+``ArchiveReader.scan`` turns it into the set of codes the group could
+hold and skips groups a query cannot match without decompressing them.
+"""
+
+from __future__ import annotations
+
+import mmap
+import os
+import struct
+import zlib
+from array import array
+from bisect import bisect_right
+from dataclasses import dataclass
+from functools import reduce
+from itertools import groupby
+from operator import or_
+from typing import IO, Iterable, Iterator, List, Optional, Tuple, Union
+
+from .exceptions import ArchiveFormatError, MetaBlockDecodingError, MetaBlockEncodingError
+from .metablock import FIELD_LAYOUT, InlineMetaBlock, MetaBlockArray
+from .query import FIELD_BITSETS, CompiledQuery, Predicate, compile_query
+from .sidecar import SidecarReader, SidecarWriter, decode_anchors, encode_anchors
+
+
+# ---------------------------------------------------------
+# Binary layout (all integers little-endian)
+# ---------------------------------------------------------
+#
+#   Header (16 bytes)
+#       magic       4s   b"VXAR"
+#       version     u16
+#       flags       u16  (0, reserved)
+#       reserved    u64
+#
+#   Row groups, back to back. Each is a run of zlib-compressed columns:
+#       counts      zigzag-varint deltas of the block count per document
+#       anchors     zigzag-varint anchor deltas over all blocks of the group
+#       <field>     one column per SPICE-R field, in _FIELDS order:
+#                   kind u8 (0 = bit-packed, 1 = RLE) followed by either
+#                   the values packed LSB-first at the field width, or
+#                   (value u8, run length varint) pairs
+#
+#   Directory: one _GROUP entry per row group
+#       first_doc u64, doc_count u32, rows u32, offset u64,
+#       column byte lengths (2 + len(_FIELDS)) x u32,
+#       zone map: one value-presence bitmask per field (u8 each), padding u8
+#
+#   Trailer (24 bytes)
+#       directory offset u64, document count u64, group count u32, magic 4s
+
+ARCHIVE_MAGIC = b"VXAR"
+ARCHIVE_VERSION = 1
+
+_FIELDS: Tuple[str, ...] = tuple(FIELD_LAYOUT)
+_COLUMNS = 2 + len(_FIELDS)
+
+_HEADER = struct.Struct("<4sHHQ")
+_GROUP = struct.Struct(f"<QIIQ{_COLUMNS}I{len(_FIELDS)}Bx")
+_TRAILER = struct.Struct("<QQI4s")
+
+_BITPACK = 0
+_RLE = 1
+
+PathLike = Union[str, "os.PathLike[str]"]
+
+Query = Union[str, Predicate, CompiledQuery]
+
+
+# ---------------------------------------------------------
+# Column codecs
+# ---------------------------------------------------------
+
+def _width(mask: int) -> int:
+    return mask.bit_length()
+
+
+def _pack(values: bytes, width: int) -> bytes:
+    """Pack byte-sized values ``width`` bits each, 8 values per ``width`` bytes."""
+    out = bytearray()
+    for start in range(0, len(values), 8):
+        accumulator = 0
+        for position, value in enumerate(values[start:start + 8]):
+            accumulator |= value << (position * width)
+        out += accumulator.to_bytes(width, "little")
+    return bytes(out)
+
+
+def _unpack(data: bytes, width: int, count: int) -> bytes:
+    mask = (1 << width) - 1
+    out = bytearray()
+    for start in range(0, len(data), width):
+        accumulator = int.from_bytes(data[start:start + width], "little")
+        out += bytes((accumulator >> (position * width)) & mask for position in range(8))
+    return bytes(out[:count])
+
+
+def _varint(value: int) -> bytes:
+    out = bytearray()
+    while value > 0x7F:
+        out.append((value & 0x7F) | 0x80)
+        value >>= 7
+    out.append(value)
+    return bytes(out)
+
+
+def _encode_column(values: bytes, width: int) -> bytes:
+    runs = [(value, len(list(group))) for value, group in groupby(values)]
+    rle = b"".join(bytes((value,)) + _varint(length) for value, length in runs)
+    if len(rle) < (len(values) * width + 7) // 8:
+        return bytes((_RLE,)) + rle
+    return bytes((_BITPACK,)) + _pack(values, width)
+
+
+def _decode_column(data: bytes, width: int, count: int) -> bytes:
+    if not data:
+        raise ArchiveFormatError("Empty column in archive row group.")
+    if data[0] == _BITPACK:
+        return _unpack(data[1:], width, count)
+    if data[0] != _RLE:
+        raise ArchiveFormatError(f"Unknown column encoding {data[0]}.")
+
+    out = bytearray()
+    offset = 1
+    while offset < len(data):
+        value = data[offset]
+        offset += 1
+        length = shift = 0
+        while True:
+            byte = data[offset]
+            offset += 1
+            length |= (byte & 0x7F) << shift
+            if byte < 0x80:
+                break
+            shift += 7
+        out += bytes((value,)) * length
+    if len(out) != count:
+        raise ArchiveFormatError("RLE column length does not match the row count.")
+    return bytes(out)
+
+
+# ---------------------------------------------------------
+# Row group metadata
+# ---------------------------------------------------------
+
+@dataclass(frozen=True)
+class ZoneMap:
+    """
+    Values present in one row group, as a bitmask per field
+    (bit v set = some block has that field equal to v).
+    """
+
+    has_span: int
+    span: int
+    polarity: int
+    intensity: int
+    context: int
+    emotion: int
+    reserved: int
+
+    @property
+    def min_intensity(self) -> Optional[int]:
+        return (self.intensity & -self.intensity).bit_length() - 1 if self.intensity else None
+
+    @property
+    def max_intensity(self) -> Optional[int]:
+        return self.intensity.bit_length() - 1 if self.intensity else None
+
+    @property
+    def polarities(self) -> frozenset:
+        return frozenset(value for value in range(4) if self.polarity >> value & 1)
+
+    @property
+    def emergency(self) -> bool:
+        """Whether any block has the low (reserved) bit set."""
+        return bool(self.reserved & 0b10)
+
+    def bits(self) -> int:
+        """Bitset of every code consistent with the per-field value sets."""
+        result = -1
+        for name in _FIELDS:
+            present = getattr(self, name)
+            bitsets = FIELD_BITSETS[name]
+            result &= reduce(or_, (bitsets[value] for value in range(len(bitsets)) if present >> value & 1), 0)
+        return result
+
+    def may_match(self, query: Query) -> bool:
+        if not isinstance(query, CompiledQuery):
+            query = compile_query(query)
+        return bool(query.bits & self.bits())
+
+
+@dataclass(frozen=True)
+class RowGroupInfo:
+    first_doc: int
+    doc_count: int
+    rows: int
+    offset: int
+    column_sizes: Tuple[int, ...]
+    zone_map: ZoneMap
+
+    @property
+    def size(self) -> int:
+        return sum(self.column_sizes)
+
+
+# ---------------------------------------------------------
+# Writer
+# ---------------------------------------------------------
+
+class ArchiveWriter:
+    """
+    Appends documents to a columnar archive.
+
+    Documents are buffered until the pending row group holds at least
+    ``row_group_size`` blocks; ``close`` (or leaving a ``with`` block)
+    flushes the last group and writes the directory.
+    """
+
+    def __init__(self, path: PathLike, row_group_size: int = 1 << 16, level: int = 6) -> None:
+        if row_group_size < 1:
+            raise ValueError("row_group_size must be at least 1.")
+        self._file: IO[bytes] = open(path, "wb")
+        self._row_group_size = row_group_size
+        self._level = level
+        self._position = _HEADER.size
+        self._file.write(_HEADER.pack(ARCHIVE_MAGIC, ARCHIVE_VERSION, 0, 0))
+
+        self._groups: List[RowGroupInfo] = []
+        self._doc_count = 0
+        self._first_doc = 0
+        self._counts: List[int] = []
+        self._codes = array("H")
+        self._anchors: List[int] = []
+
+    def __enter__(self) -> ArchiveWriter:
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        self.close()
+
+    def __len__(self) -> int:
+        return self._doc_count
+
+    def write(self, blocks: Union[MetaBlockArray, Iterable[InlineMetaBlock]]) -> int:
+        """Append one document and return its index in the archive."""
+        if not isinstance(blocks, MetaBlockArray):
+            blocks = MetaBlockArray.from_inline_blocks(blocks)
+        return self.write_codes(blocks.codes, blocks.anchors)
+
+    def write_codes(self, codes: Iterable[int], anchors: Iterable[int]) -> int:
+        """Append one document given its packed codes and token anchors."""
+        codes = array("H", codes)
+        anchors = list(anchors)
+        if len(codes) != len(anchors):
+            raise MetaBlockEncodingError("codes and anchors must have the same length.")
+
+        self._counts.append(len(codes))
+        self._codes.extend(codes)
+        self._anchors.extend(anchors)
+        self._doc_count += 1
+
+        if len(self._codes) >= self._row_group_size:
+            self._flush()
+        return self._doc_count - 1
+
+    def close(self) -> None:
+        if self._file.closed:
+            return
+        if self._counts:
+            self._flush()
+
+        directory_offset = self._position
+        for group in self._groups:
+            zone = group.zone_map
+            self._file.write(
+                _GROUP.pack(
+                    group.first_doc, group.doc_count, group.rows, group.offset,
+                    *group.column_sizes, *(getattr(zone, name) for name in _FIELDS),
+                )
+            )
+        self._file.write(_TRAILER.pack(directory_offset, self._doc_count, len(self._groups), ARCHIVE_MAGIC))
+        self._file.close()
+
+    def _flush(self) -> None:
+        codes = self._codes
+        columns = [encode_anchors(self._counts), encode_anchors(self._anchors)]
+        masks = []
+        for name in _FIELDS:
+            shift, mask = FIELD_LAYOUT[name]
+            values = bytes((code >> shift) & mask for code in codes)
+            columns.append(_encode_column(values, _width(mask)))
+            masks.append(reduce(or_, (1 << value for value in set(values)), 0))
+
+        compressed = [zlib.compress(column, self._level) for column in columns]
+        self._groups.append(
+            RowGroupInfo(
+                first_doc=self._first_doc,
+                doc_count=len(self._counts),
+                rows=len(codes),
+                offset=self._position,
+                column_sizes=tuple(len(column) for column in compressed),
+                zone_map=ZoneMap(*masks),
+            )
+        )
+        for column in compressed:
+            self._file.write(column)
+            self._position += len(column)
+
+        self._first_doc = self._doc_count
+        self._counts = []
+        self._codes = array("H")
+        self._anchors = []
+
+
+# ---------------------------------------------------------
+# Reader
+# ---------------------------------------------------------
+
+class ArchiveReader:
+    """
+    Memory-mapped reader for columnar archives.
+
+    Opening reads only the directory. Row groups are decompressed on
+    demand (the most recent one is kept), and ``scan`` consults the zone
+    maps so groups that cannot match a query are never decompressed.
+    """
+
+    def __init__(self, path: PathLike) -> None:
+        with open(path, "rb") as handle:
+            # mmap cannot map an empty file, so check the size first.
+            if os.fstat(handle.fileno()).st_size < _HEADER.size + _TRAILER.size:
+                raise ArchiveFormatError("File is too small to be a VIBE-X archive.")
+            self._mmap = mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ)
+
+        try:
+            self._groups = self._read_directory()
+        except (ArchiveFormatError, struct.error) as exc:
+            self._mmap.close()
+            if isinstance(exc, ArchiveFormatError):
+                raise
+            raise ArchiveFormatError("Archive directory is truncated.") from exc
+
+        self._starts = [group.first_doc for group in self._groups]
+        self._cached: Optional[Tuple[int, List[int], MetaBlockArray]] = None
+
+    def _read_directory(self) -> List[RowGroupInfo]:
+        size = len(self._mmap)
+        magic, version, _flags, _ = _HEADER.unpack_from(self._mmap, 0)
+        if magic != ARCHIVE_MAGIC:
+            raise ArchiveFormatError(f"Bad archive magic: {magic!r}")
+        if version != ARCHIVE_VERSION:
+            raise ArchiveFormatError(f"Unsupported archive version: {version}")
+
+        directory, doc_count, group_count, magic = _TRAILER.unpack_from(self._mmap, size - _TRAILER.size)
+        if magic != ARCHIVE_MAGIC or directory + group_count * _GROUP.size != size - _TRAILER.size:
+            raise ArchiveFormatError("Archive trailer is corrupt or the file is truncated.")
+        self._doc_count = doc_count
+
+        groups = []
+        for index in range(group_count):
+            fields = _GROUP.unpack_from(self._mmap, directory + index * _GROUP.size)
+            first_doc, docs, rows, offset = fields[:4]
+            groups.append(
+                RowGroupInfo(
+                    first_doc=first_doc,
+                    doc_count=docs,
+                    rows=rows,
+                    offset=offset,
+                    column_sizes=tuple(fields[4:4 + _COLUMNS]),
+                    zone_map=ZoneMap(*fields[4 + _COLUMNS:]),
+                )
+            )
+        return groups
+
+    def __enter__(self) -> ArchiveReader:
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        self.close()
+
+    def __len__(self) -> int:
+        return self._doc_count
+
+    def __iter__(self) -> Iterator[MetaBlockArray]:
+        for index in range(len(self._groups)):
+            yield from self._documents(index)
+
+    def close(self) -> None:
+        self._mmap.close()
+
+    @property
+    def row_groups(self) -> List[RowGroupInfo]:
+        return list(self._groups)
+
+    # ---------------------------------------------------------
+    # Access
+    # ---------------------------------------------------------
+
+    def document(self, doc: int) -> MetaBlockArray:
+        if not 0 <= doc < self._doc_count:
+            raise IndexError(f"Document index {doc} is out of range for {self._doc_count} documents.")
+        index = bisect_right(self._starts, doc) - 1
+        counts, blocks = self._load(index)
+        start = sum(counts[:doc - self._groups[index].first_doc])
+        end = start + counts[doc - self._groups[index].first_doc]
+        return MetaBlockArray(blocks.codes[start:end], blocks.anchors[start:end], blocks.lengths[start:end])
+
+    def matching_row_groups(self, query: Query) -> List[int]:
+        """Indices of the row groups whose zone maps admit ``query``."""
+        if not isinstance(query, CompiledQuery):
+            query = compile_query(query)
+        return [index for index, group in enumerate(self._groups) if group.zone_map.may_match(query)]
+
+    def scan(self, query: Query) -> Iterator[Tuple[int, MetaBlockArray]]:
+        """Yield (document, matching blocks) for every document with a match."""
+        if not isinstance(query, CompiledQuery):
+            query = compile_query(query)
+        table = query.table
+
+        for index in self.matching_row_groups(query):
+            doc = self._groups[index].first_doc
+            for blocks in self._documents(index):
+                hits = [i for i, code in enumerate(blocks.codes) if table[code]]
+                if hits:
+                    yield doc, MetaBlockArray(
+                        [blocks.codes[i] for i in hits],
+                        [blocks.anchors[i] for i in hits],
+                        [blocks.lengths[i] for i in hits],
+                    )
+                doc += 1
+
+    # ---------------------------------------------------------
+    # INTERNAL
+    # ---------------------------------------------------------
+
+    def _documents(self, index: int) -> Iterator[MetaBlockArray]:
+        counts, blocks = self._load(index)
+        start = 0
+        for count in counts:
+            end = start + count
+            yield MetaBlockArray(blocks.codes[start:end], blocks.anchors[start:end], blocks.lengths[start:end])
+            start = end
+
+    def _load(self, index: int) -> Tuple[List[int], MetaBlockArray]:
+        if self._cached is not None and self._cached[0] == index:
+            return self._cached[1], self._cached[2]
+
+        group = self._groups[index]
+        try:
+            columns = []
+            offset = group.offset
+            for size in group.column_sizes:
+                columns.append(zlib.decompress(self._mmap[offset:offset + size]))
+                offset += size
+            counts = decode_anchors(columns[0], 0, group.doc_count).tolist()
+            anchors = decode_anchors(columns[1], 0, group.rows)
+
+            codes = [0] * group.rows
+            for name, column in zip(_FIELDS, columns[2:]):
+                shift, mask = FIELD_LAYOUT[name]
+                values = _decode_column(column, _width(mask), group.rows)
+                codes = [code | (value << shift) for code, value in zip(codes, values)]
+        except (zlib.error, IndexError, MetaBlockDecodingError) as exc:
+            raise ArchiveFormatError(f"Row group {index} is corrupt.") from exc
+
+        lengths = [1 + ((code >> 13) & 1) * ((code >> 10) & 0b111) for code in codes]
+        blocks = MetaBlockArray(codes, anchors, lengths)
+        self._cached = (index, counts, blocks)
+        return counts, blocks
+
+
+# ---------------------------------------------------------
+# Conversion
+# ---------------------------------------------------------
+
+def sidecar_to_archive(sidecar_path: PathLike, archive_path: PathLike, row_group_size: int = 1 << 16) -> int:
+    """Copy every document of a binary sidecar into a new archive; returns the document count."""
+    with SidecarReader(sidecar_path) as reader, ArchiveWriter(archive_path, row_group_size) as writer:
+        for blocks in reader:
+            writer.write(blocks)
+        return len(writer)
+
+
+def archive_to_sidecar(archive_path: PathLike, sidecar_path: PathLike) -> int:
+    with ArchiveReader(archive_path) as reader, SidecarWriter(sidecar_path) as writer:
+        for blocks in reader:
+            writer.write(blocks)
+        return len(writer)
@@ -0,0 +1,170 @@
+"""
+Bounded cache of decode results.
+
+``CachingDecoder`` wraps an ``InlineDecoder``. Results are keyed by a
+16-byte BLAKE2b digest of the encoded text, or by a caller-supplied
+(document id, version) pair, which skips hashing entirely. Entries hold
+only the clean text, its tokens and the packed codes and anchors; blocks
+are rebuilt from the interned MetaBlock table on every hit.
+
+Eviction is LRU over the approximate entry size in bytes, bounded by
+``max_bytes``. All bookkeeping happens under one lock, so one cache can
+be shared between threads; decoding itself runs outside the lock.
+"""
+
+from __future__ import annotations
+
+import sys
+import threading
+from array import array
+from collections import OrderedDict
+from dataclasses import dataclass
+from hashlib import blake2b
+from typing import Hashable, List, Optional, Tuple
+
+from .inline_decoder import DecodedInlineText, InlineDecoder
+from .metablock import BLOCK_BY_INT, InlineMetaBlock, MetaBlockArray, TokenSpan
+
+# Dict slot, OrderedDict link, tuple and array headers per entry.
+_ENTRY_OVERHEAD = 256
+
+
+@dataclass(frozen=True)
+class CacheStats:
+    hits: int
+    misses: int
+    evictions: int
+    entries: int
+    bytes: int
+    max_bytes: int
+
+    @property
+    def hit_rate(self) -> float:
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+
+# (clean text, clean tokens, codes, anchors, size in bytes)
+_Entry = Tuple[str, Tuple[str, ...], array, array, int]
+
+
+class CachingDecoder:
+    """
+    ``InlineDecoder`` front end with a size-bounded LRU result cache.
+
+    ``decode`` returns the same DecodedInlineText as the wrapped decoder,
+    without tokenizing again on hits; ``decode_array`` returns
+    (clean text, MetaBlockArray) and skips building block objects too.
+    """
+
+    def __init__(self, decoder: InlineDecoder, max_bytes: int = 64 << 20) -> None:
+        self._decoder = decoder
+        self._markers = decoder.marker_config.markers()
+        self._max_bytes = max_bytes
+        self._entries: OrderedDict[Hashable, _Entry] = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+
+    # ---------------------------------------------------------
+    # Public API
+    # ---------------------------------------------------------
+
+    def decode(self, inline_text: str, doc_id: Optional[Hashable] = None, version: Hashable = None) -> DecodedInlineText:
+        clean_text, clean_tokens, codes, anchors = self._lookup(inline_text, doc_id, version)
+        markers = self._markers
+        blocks: List[InlineMetaBlock] = [
+            InlineMetaBlock(
+                block=BLOCK_BY_INT[code],
+                span=TokenSpan(anchor=anchor, length=1 + ((code >> 10) & 0b111 if code >> 13 else 0)),
+                marker=markers[code],
+            )
+            for code, anchor in zip(codes, anchors)
+        ]
+        return DecodedInlineText(
+            clean_text=clean_text,
+            clean_tokens=list(clean_tokens),
+            blocks=blocks,
+        )
+
+    def decode_array(
+        self, inline_text: str, doc_id: Optional[Hashable] = None, version: Hashable = None
+    ) -> Tuple[str, MetaBlockArray]:
+        clean_text, _, codes, anchors = self._lookup(inline_text, doc_id, version)
+        lengths = [1 + ((code >> 10) & 0b111 if code >> 13 else 0) for code in codes]
+        return clean_text, MetaBlockArray(codes, anchors, lengths)
+
+    def invalidate(self, inline_text: Optional[str] = None, doc_id: Optional[Hashable] = None, version: Hashable = None) -> bool:
+        """Drop the entry of ``inline_text`` or of (``doc_id``, ``version``); returns whether it was cached."""
+        if inline_text is None and doc_id is None:
+            raise ValueError("invalidate() needs the encoded text or a document id.")
+        key = self._key(inline_text or "", doc_id, version)
+        with self._lock:
+            entry = self._entries.pop(key, None)
+            if entry is None:
+                return False
+            self._bytes -= entry[4]
+            return True
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self) -> CacheStats:
+        with self._lock:
+            return CacheStats(
+                hits=self._hits,
+                misses=self._misses,
+                evictions=self._evictions,
+                entries=len(self._entries),
+                bytes=self._bytes,
+                max_bytes=self._max_bytes,
+            )
+
+    # ---------------------------------------------------------
+    # INTERNAL
+    # ---------------------------------------------------------
+
+    @staticmethod
+    def _key(inline_text: str, doc_id: Optional[Hashable], version: Hashable) -> Hashable:
+        if doc_id is not None:
+            return (doc_id, version)
+        return blake2b(inline_text.encode("utf-8", "surrogatepass"), digest_size=16).digest()
+
+    def _lookup(
+        self, inline_text: str, doc_id: Optional[Hashable], version: Hashable
+    ) -> Tuple[str, Tuple[str, ...], array, array]:
+        key = self._key(inline_text, doc_id, version)
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self._hits += 1
+                return entry[:4]
+            self._misses += 1
+
+        decoded = self._decoder.decode(inline_text)
+        clean_tokens = tuple(decoded.clean_tokens)
+        codes = array("H", (block.block.to_int() for block in decoded.blocks))
+        anchors = array("i", (block.span.anchor for block in decoded.blocks))
+        size = sys.getsizeof(decoded.clean_text) + codes.itemsize * len(codes) + anchors.itemsize * len(anchors)
+        size += sys.getsizeof(clean_tokens) + sum(map(sys.getsizeof, clean_tokens))
+        size += _ENTRY_OVERHEAD
+
+        if size <= self._max_bytes:
+            with self._lock:
+                previous = self._entries.pop(key, None)
+                if previous is not None:
+                    self._bytes -= previous[4]
+                self._entries[key] = (decoded.clean_text, clean_tokens, codes, anchors, size)
+                self._bytes += size
+                while self._bytes > self._max_bytes:
+                    _, evicted = self._entries.popitem(last=False)
+                    self._bytes -= evicted[4]
+                    self._evictions += 1
+
+        return decoded.clean_text, clean_tokens, codes, anchors
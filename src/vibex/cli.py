@@ -0,0 +1,289 @@
+"""
+``vibex-cli``: bulk encode, decode, convert, query and stats.
+
+Inputs are read line by line from a file or stdin (``-``), so dumps of any
+size stream through in bounded memory:
+
+    jsonl : one {"id", "text", ...} object per line (default for stdin and .jsonl files)
+    text  : one document per line, identified by its line number
+
+Annotations use the ``SentimentAnnotation`` field names both ways, so the
+output of ``decode`` can be fed back to ``encode``:
+
+    {"id": "7", "text": "...", "annotations": [{"anchor": 3, "length": 2, "polarity": 1, ...}]}
+
+``decode`` also writes the packed 14-bit ``code`` of every block. When
+``encode`` finds a ``code`` it writes that value verbatim and ignores the
+other fields, so decoding and re-encoding gives back every marker
+unchanged. This includes codes that no annotation produces.
+
+Batches of lines are processed on a process pool (``--workers``) and
+written back in input order as one buffered write per batch.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import sys
+from contextlib import contextmanager
+from typing import IO, Any, Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from . import convert
+from .aggregate import CodeHistogram
+from .convert import JSONL_SUFFIXES, batched, make_executor, ordered_map
+from .inline_decoder import InlineDecoder
+from .inline_encoder import InlineEncoder, InlineMarkerConfig, SentimentAnnotation
+from .metablock import MetaBlock
+from .query import compile_query
+from .sidecar import SidecarReader
+from .tokenizer import Tokenizer
+
+_BUFFER_SIZE = 1 << 20
+
+_STATS_FIELDS = ("polarity", "intensity", "emotion")
+
+
+# ---------------------------------------------------------
+# Streaming input and output
+# ---------------------------------------------------------
+
+@contextmanager
+def _open_input(path: str) -> Iterator[IO[str]]:
+    if path == "-":
+        yield sys.stdin
+        return
+    with open(path, encoding="utf-8", buffering=_BUFFER_SIZE) as handle:
+        yield handle
+
+
+@contextmanager
+def _open_output(path: str) -> Iterator[IO[str]]:
+    if path == "-":
+        yield sys.stdout
+        sys.stdout.flush()
+        return
+    with open(path, "w", encoding="utf-8", buffering=_BUFFER_SIZE) as handle:
+        yield handle
+
+
+def _input_format(path: str, requested: str) -> str:
+    if requested != "auto":
+        return requested
+    if path == "-" or path.lower().endswith(JSONL_SUFFIXES):
+        return "jsonl"
+    return "text"
+
+
+def _records(lines: List[Tuple[int, str]], input_format: str) -> Iterator[Dict[str, Any]]:
+    """Parse numbered input lines into records with at least ``id`` and ``text``."""
+    for number, line in lines:
+        if input_format == "text":
+            yield {"id": str(number), "text": line.rstrip("\n")}
+            continue
+        if not line.strip():
+            continue
+        record = json.loads(line)
+        record.setdefault("id", str(number))
+        yield record
+
+
+def _dump(record: Dict[str, Any]) -> str:
+    return json.dumps(record, ensure_ascii=False) + "\n"
+
+
+def _annotation_record(code: int, anchor: int) -> Dict[str, int]:
+    block = MetaBlock.from_int(code)
+    return {
+        "anchor": anchor,
+        "length": 1 + (block.span or 0),
+        "polarity": block.polarity,
+        "intensity": block.intensity,
+        "context": block.context,
+        "emotion": block.emotion,
+        "reserved": block.reserved,
+        "code": code,
+    }
+
+
+def _annotation_code(item: Dict[str, Any]) -> int:
+    if "code" in item:
+        return item["code"]
+    return SentimentAnnotation(**{"length": 1, "context": 0, **item}).to_int()
+
+
+# ---------------------------------------------------------
+# Batch workers (module level so they can be pickled)
+# ---------------------------------------------------------
+
+def _encode_batch(args: Tuple[List[Tuple[int, str]], str, bool, bool]) -> str:
+    lines, input_format, compact, preserve_layout = args
+    encoder = InlineEncoder(Tokenizer(), InlineMarkerConfig(compact=compact), preserve_layout)
+    out: List[str] = []
+    for record in _records(lines, input_format):
+        items = record.get("annotations", ())
+        if any("code" in item for item in items):
+            # Packed codes are spliced as given, in list order.
+            codes = [_annotation_code(item) for item in items]
+            encoded = encoder.encode_codes(record["text"], codes, [item["anchor"] for item in items])
+        else:
+            annotations = [SentimentAnnotation(**{"length": 1, "context": 0, **item}) for item in items]
+            encoded = encoder.encode(record["text"], annotations)
+        out.append(_dump({"id": record["id"], "text": encoded}))
+    return "".join(out)
+
+
+def _decode_batch(args: Tuple[List[Tuple[int, str]], str]) -> str:
+    lines, input_format = args
+    decoder = InlineDecoder(Tokenizer())
+    out: List[str] = []
+    for record in _records(lines, input_format):
+        decoded = decoder.decode_lazy(record["text"])
+        annotations = [_annotation_record(code, anchor) for code, anchor in zip(decoded.codes, decoded.anchors)]
+        out.append(_dump({"id": record["id"], "text": decoded.clean_text, "annotations": annotations}))
+    return "".join(out)
+
+
+def _query_batch(args: Tuple[List[Tuple[int, str]], str, str]) -> str:
+    lines, input_format, expression = args
+    decoder = InlineDecoder(Tokenizer())
+    table = compile_query(expression).table
+    out: List[str] = []
+    for record in _records(lines, input_format):
+        if any(table[code] for code in decoder.decode_lazy(record["text"]).codes):
+            out.append(f"{record['id']}\n")
+    return "".join(out)
+
+
+def _histogram_batch(args: Tuple[List[Tuple[int, str]], str]) -> Tuple[int, CodeHistogram]:
+    lines, input_format = args
+    decoder = InlineDecoder(Tokenizer())
+    histogram = CodeHistogram()
+    documents = 0
+    for record in _records(lines, input_format):
+        documents += 1
+        histogram.add(decoder.decode_lazy(record["text"]).codes)
+    return documents, histogram
+
+
+# ---------------------------------------------------------
+# Commands
+# ---------------------------------------------------------
+
+def _map_batches(args: argparse.Namespace, worker: Callable[[Any], Any], *options: Any) -> Iterator[Any]:
+    input_format = _input_format(args.input, args.format)
+    executor, max_in_flight = make_executor(args.workers)
+    try:
+        with _open_input(args.input) as source:
+            batches = ((batch, input_format, *options) for batch in batched(enumerate(source), args.batch_size))
+            yield from ordered_map(worker, batches, executor, max_in_flight)
+    finally:
+        if executor is not None:
+            executor.shutdown()
+
+
+def _write_batches(args: argparse.Namespace, worker: Callable[[Any], str], *options: Any) -> int:
+    with _open_output(args.output) as out:
+        for chunk in _map_batches(args, worker, *options):
+            out.write(chunk)
+    return 0
+
+
+def _cmd_encode(args: argparse.Namespace) -> int:
+    return _write_batches(args, _encode_batch, args.compact, args.preserve_layout)
+
+
+def _cmd_decode(args: argparse.Namespace) -> int:
+    return _write_batches(args, _decode_batch)
+
+
+def _cmd_convert(args: argparse.Namespace) -> int:
+    count = convert.run(args)
+    print(f"Converted {count} documents.", file=sys.stderr)
+    return 0
+
+
+def _cmd_query(args: argparse.Namespace) -> int:
+    if args.sidecar is None:
+        return _write_batches(args, _query_batch, args.expression)
+
+    query = compile_query(args.expression)
+    with SidecarReader(args.sidecar) as reader, _open_output(args.output) as out:
+        for batch in batched(query.documents(reader), 4096):
+            out.write("".join(f"{doc}\n" for doc in batch))
+    return 0
+
+
+def _cmd_stats(args: argparse.Namespace) -> int:
+    histogram = CodeHistogram()
+    documents = 0
+
+    if args.sidecar is None:
+        for count, partial in _map_batches(args, _histogram_batch):
+            documents += count
+            histogram.merge(partial)
+    else:
+        with SidecarReader(args.sidecar) as reader:
+            documents = len(reader)
+            histogram = CodeHistogram.from_sidecar(reader)
+
+    stats: Dict[str, Any] = {"documents": documents, "blocks": histogram.total}
+    for name in _STATS_FIELDS:
+        stats[name] = {str(value): hits for value, hits in enumerate(histogram.marginal(name))}
+
+    with _open_output(args.output) as out:
+        out.write(json.dumps(stats, indent=2) + "\n")
+    return 0
+
+
+# ---------------------------------------------------------
+# Argument parsing
+# ---------------------------------------------------------
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="vibex-cli", description="Bulk VIBE-X processing.")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    encode = commands.add_parser("encode", help="inject annotations as inline markers")
+    encode.add_argument("--compact", action="store_true", help="write single code point markers")
+    encode.add_argument("--preserve-layout", action="store_true", help="keep the original whitespace")
+    encode.set_defaults(handler=_cmd_encode)
+
+    decode = commands.add_parser("decode", help="strip inline markers into clean text + annotations")
+    decode.set_defaults(handler=_cmd_decode)
+
+    query = commands.add_parser("query", help="print the ids of documents with a matching block")
+    query.add_argument("expression", help='field predicate, e.g. "polarity == NEG & intensity >= 5"')
+    query.set_defaults(handler=_cmd_query)
+
+    stats = commands.add_parser("stats", help="polarity/intensity/emotion histograms as JSON")
+    stats.set_defaults(handler=_cmd_stats)
+
+    for command in (encode, decode, query, stats):
+        command.add_argument("input", nargs="?", default="-", help="input file (default: stdin)")
+        command.add_argument("-o", "--output", default="-", help="output file (default: stdout)")
+        command.add_argument("--format", choices=("auto", "jsonl", "text"), default="auto", help="input format")
+        command.add_argument("--workers", type=int, default=None, help="worker processes (default: CPU count)")
+        command.add_argument("--batch-size", type=int, default=1024, help="lines per task")
+
+    for command in (query, stats):
+        command.add_argument("--sidecar", default=None, help="read blocks from a binary sidecar instead")
+
+    convert_parser = commands.add_parser("convert", help="convert between inline and sidecar corpora")
+    convert.build_parser(convert_parser)
+    convert_parser.set_defaults(handler=_cmd_convert)
+    return parser
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    args = build_parser().parse_args(argv)
+    try:
+        return args.handler(args)
+    except BrokenPipeError:
+        # Output closed early (e.g. piped into ``head``).
+        sys.stderr.close()
+        return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,291 @@
+"""
+Bulk conversion between Inline and Sidecar representations.
+
+Inline side : a directory of text files, or a JSONL file whose records
+              carry a ``text`` field (and optionally an ``id``).
+Sidecar side: a JSONL file of clean texts ({"id", "text"} per line) plus a
+              binary sidecar holding the MetaBlocks of document N at index N.
+
+Documents are processed in batches on a process pool. Batches are written
+back in input order, so the output does not depend on the worker count.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+from collections import deque
+from concurrent.futures import Executor, Future, ProcessPoolExecutor
+from itertools import islice
+from pathlib import Path
+from typing import Callable, Deque, Iterable, Iterator, List, Optional, Sequence, Tuple, TypeVar, Union
+
+from .inline_decoder import InlineDecoder
+from .inline_encoder import InlineEncoder, InlineMarkerConfig
+from .sidecar import SidecarReader, SidecarWriter
+from .tokenizer import Tokenizer
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+PathLike = Union[str, "os.PathLike[str]"]
+
+# (document id, text)
+Document = Tuple[str, str]
+
+# (document id, clean text, packed codes, anchors)
+SidecarDocument = Tuple[str, str, List[int], List[int]]
+
+# Input paths with these suffixes are read as JSON Lines, one document per line.
+JSONL_SUFFIXES = (".jsonl", ".ndjson")
+
+
+# ---------------------------------------------------------
+# Document sources and sinks
+# ---------------------------------------------------------
+
+def _is_jsonl(path: PathLike) -> bool:
+    return Path(path).suffix.lower() in JSONL_SUFFIXES
+
+
+def iter_documents(source: PathLike) -> Iterator[Document]:
+    """
+    Yield (id, text) pairs from a JSONL file or a directory tree.
+
+    Directory entries are visited in sorted order and identified by their
+    path relative to ``source``. JSONL records without an ``id`` get their
+    zero-based line number.
+    """
+    if _is_jsonl(source):
+        with open(source, encoding="utf-8") as handle:
+            for index, line in enumerate(handle):
+                if not line.strip():
+                    continue
+                record = json.loads(line)
+                yield str(record.get("id", index)), record["text"]
+        return
+
+    root = Path(source)
+    for path in sorted(p for p in root.rglob("*") if p.is_file()):
+        yield path.relative_to(root).as_posix(), path.read_text(encoding="utf-8")
+
+
+def write_documents(target: PathLike, documents: Iterable[Document]) -> int:
+    """
+    Write (id, text) pairs to a JSONL file or as files under a directory.
+
+    In directory mode every id must name a distinct file inside ``target``;
+    absolute ids, ids escaping it via ``..`` and duplicate ids raise
+    ValueError.
+    """
+    count = 0
+    if _is_jsonl(target):
+        with open(target, "w", encoding="utf-8") as handle:
+            for doc_id, text in documents:
+                handle.write(json.dumps({"id": doc_id, "text": text}, ensure_ascii=False))
+                handle.write("\n")
+                count += 1
+        return count
+
+    root = Path(target).resolve()
+    written = set()
+    for doc_id, text in documents:
+        path = (root / doc_id).resolve()
+        if path == root or root not in path.parents:
+            raise ValueError(f"Document id {doc_id!r} does not name a file inside {target}.")
+        if path in written:
+            raise ValueError(f"Duplicate document id {doc_id!r}.")
+        written.add(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(text, encoding="utf-8")
+        count += 1
+    return count
+
+
+# ---------------------------------------------------------
+# Ordered, bounded fan-out
+# ---------------------------------------------------------
+
+def batched(items: Iterable[T], size: int) -> Iterator[List[T]]:
+    """Lists of up to ``size`` consecutive items."""
+    iterator = iter(items)
+    while batch := list(islice(iterator, size)):
+        yield batch
+
+
+def ordered_map(
+    func: Callable[[T], R],
+    items: Iterable[T],
+    executor: Optional[Executor] = None,
+    max_in_flight: int = 8,
+) -> Iterator[R]:
+    """
+    Like ``executor.map`` but lazy: at most ``max_in_flight`` tasks are
+    submitted ahead, so unbounded inputs are never materialized. Results
+    are yielded in input order. Without an executor ``func`` runs inline.
+    """
+    if executor is None:
+        yield from map(func, items)
+        return
+
+    pending: Deque[Future] = deque()
+    for item in items:
+        pending.append(executor.submit(func, item))
+        if len(pending) >= max_in_flight:
+            yield pending.popleft().result()
+    while pending:
+        yield pending.popleft().result()
+
+
+def make_executor(workers: Optional[int]) -> Tuple[Optional[Executor], int]:
+    """Return a process pool (None for a single worker) and its in-flight task limit."""
+    workers = workers or os.cpu_count() or 1
+    if workers == 1:
+        return None, 1
+    return ProcessPoolExecutor(max_workers=workers), 2 * workers
+
+
+# ---------------------------------------------------------
+# Batch workers (module level so they can be pickled)
+# ---------------------------------------------------------
+
+def _strip_batch(args: Tuple[List[Document], InlineMarkerConfig]) -> List[SidecarDocument]:
+    documents, marker_config = args
+    decoded = InlineDecoder(Tokenizer(), marker_config).decode_batch([text for _, text in documents])
+    result: List[SidecarDocument] = []
+    for index, (doc_id, _) in enumerate(documents):
+        blocks = decoded.document(index)
+        result.append((doc_id, decoded.clean_texts[index], blocks.codes.tolist(), blocks.anchors.tolist()))
+    return result
+
+
+def _inject_batch(args: Tuple[List[SidecarDocument], InlineMarkerConfig]) -> List[Document]:
+    documents, marker_config = args
+    # Splice the stored codes themselves: rebuilding SentimentAnnotations
+    # would rewrite codes that have no annotation form (e.g. 0x2000).
+    encoder = InlineEncoder(Tokenizer(), marker_config, preserve_layout=True)
+    return [(doc_id, encoder.encode_codes(text, codes, anchors)) for doc_id, text, codes, anchors in documents]
+
+
+# ---------------------------------------------------------
+# Public API
+# ---------------------------------------------------------
+
+def inline_to_sidecar(
+    source: PathLike,
+    text_path: PathLike,
+    sidecar_path: PathLike,
+    workers: Optional[int] = None,
+    batch_size: int = 256,
+    marker_config: InlineMarkerConfig | None = None,
+) -> int:
+    """
+    Strip inline markers from every document of ``source``.
+
+    Writes clean texts to ``text_path`` (JSONL) and their MetaBlocks to the
+    binary sidecar at ``sidecar_path``. Whitespace is preserved exactly.
+    Returns the number of documents converted.
+    """
+    marker_config = marker_config or InlineMarkerConfig()
+    batches = ((batch, marker_config) for batch in batched(iter_documents(source), batch_size))
+    executor, max_in_flight = make_executor(workers)
+
+    count = 0
+    try:
+        with SidecarWriter(sidecar_path) as sidecar, open(text_path, "w", encoding="utf-8") as texts:
+            for batch in ordered_map(_strip_batch, batches, executor, max_in_flight):
+                for doc_id, clean_text, codes, anchors in batch:
+                    sidecar.write_codes(codes, anchors)
+                    texts.write(json.dumps({"id": doc_id, "text": clean_text}, ensure_ascii=False))
+                    texts.write("\n")
+                    count += 1
+    finally:
+        if executor is not None:
+            executor.shutdown()
+    return count
+
+
+def sidecar_to_inline(
+    text_path: PathLike,
+    sidecar_path: PathLike,
+    target: PathLike,
+    workers: Optional[int] = None,
+    batch_size: int = 256,
+    marker_config: InlineMarkerConfig | None = None,
+) -> int:
+    """
+    Inject the sidecar MetaBlocks back into their clean texts.
+
+    ``target`` is a JSONL file or a directory (one file per document id).
+    Returns the number of documents converted.
+    """
+    marker_config = marker_config or InlineMarkerConfig()
+
+    with SidecarReader(sidecar_path) as sidecar:
+        executor, max_in_flight = make_executor(workers)
+
+        def documents() -> Iterator[SidecarDocument]:
+            count = 0
+            for doc_id, text in iter_documents(text_path):
+                if count >= len(sidecar):
+                    raise ValueError(f"{text_path} has more documents than the sidecar ({len(sidecar)}).")
+                blocks = sidecar.document(count)
+                yield doc_id, text, blocks.codes.tolist(), blocks.anchors.tolist()
+                count += 1
+            if count != len(sidecar):
+                raise ValueError(f"{text_path} has {count} documents but the sidecar has {len(sidecar)}.")
+
+        batches = ((batch, marker_config) for batch in batched(documents(), batch_size))
+        try:
+            return write_documents(
+                target,
+                (document for batch in ordered_map(_inject_batch, batches, executor, max_in_flight) for document in batch),
+            )
+        finally:
+            if executor is not None:
+                executor.shutdown()
+
+
+# ---------------------------------------------------------
+# Command line
+# ---------------------------------------------------------
+
+def build_parser(parser: Optional[argparse.ArgumentParser] = None) -> argparse.ArgumentParser:
+    parser = parser or argparse.ArgumentParser(
+        prog="python -m vibex.convert",
+        description="Convert corpora between VIBE-X Inline and Sidecar representations.",
+    )
+    commands = parser.add_subparsers(dest="direction", required=True)
+
+    strip = commands.add_parser("inline-to-sidecar", help="strip markers into clean JSONL + binary sidecar")
+    strip.add_argument("source", help="directory or JSONL file of inline-encoded texts")
+    strip.add_argument("text", help="output JSONL file of clean texts")
+    strip.add_argument("sidecar", help="output binary sidecar file")
+
+    inject = commands.add_parser("sidecar-to-inline", help="inject sidecar MetaBlocks into clean texts")
+    inject.add_argument("text", help="JSONL file of clean texts")
+    inject.add_argument("sidecar", help="binary sidecar file")
+    inject.add_argument("target", help="output directory or JSONL file")
+    inject.add_argument("--compact", action="store_true", help="write single code point markers")
+
+    for command in (strip, inject):
+        command.add_argument("--workers", type=int, default=None, help="worker processes (default: CPU count)")
+        command.add_argument("--batch-size", type=int, default=256, help="documents per task")
+    return parser
+
+
+def run(args: argparse.Namespace) -> int:
+    if args.direction == "inline-to-sidecar":
+        return inline_to_sidecar(args.source, args.text, args.sidecar, args.workers, args.batch_size)
+    marker_config = InlineMarkerConfig(compact=args.compact)
+    return sidecar_to_inline(args.text, args.sidecar, args.target, args.workers, args.batch_size, marker_config)
+
+
+def main(argv: Optional[Sequence[str]] = None) -> None:
+    count = run(build_parser().parse_args(argv))
+    print(f"Converted {count} documents.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,267 @@
+"""
+Emergency-flag fast lane.
+
+The low (``reserved``) bit of a MetaBlock is the Emergency Flag. In hex
+markers it is the parity of the last payload digit, and in compact
+markers the parity of the code point, so emergency markers can be found
+with one regular-expression search and no decoding:
+
+    scanner = EmergencyScanner(on_hit=page_on_call)
+    for hit in scanner.scan_stream(socket_file):
+        ...
+
+Text may be ``str`` or raw UTF-8 ``bytes``; the bytes path matches the
+UTF-8 encoding of the markers directly, so a message can be checked
+before it is even decoded. Hits are handed to ``on_hit`` and/or put on a
+``queue.PriorityQueue`` the moment they are found; hits order by
+descending intensity, then arrival.
+
+Unlike ``InlineDecoder``, markers inside a token are reported too: for
+triage a missed flag costs more than a spurious one.
+"""
+
+from __future__ import annotations
+
+import re
+from dataclasses import dataclass, field
+from functools import lru_cache
+from itertools import count
+from queue import Queue
+from typing import IO, Any, Callable, Iterable, Iterator, List, Optional, Pattern, Tuple, Union
+
+from .inline_encoder import InlineMarkerConfig
+from .metablock import METABLOCK_SPACE, MetaBlock
+from .tokenizer import iter_whole_tokens
+
+Text = Union[str, bytes]
+
+_ODD_HEX = "13579BDFbdf"
+
+# Last UTF-8 byte of a supplementary code point is 0x80 | (cp & 0x3F),
+# so its parity is the code point's parity.
+_ODD_CONTINUATION = b"".join(re.escape(bytes((byte,))) for byte in range(0x81, 0xC0, 2))
+
+
+# ---------------------------------------------------------
+# Hits
+# ---------------------------------------------------------
+
+@dataclass(frozen=True, order=True)
+class EmergencyHit:
+    """
+    One emergency marker.
+
+    code     : packed 14-bit MetaBlock value (low bit set)
+    anchor   : token index the marker belongs to (global in streams)
+    offset   : position of the marker in the scanned str/bytes (per chunk in streams)
+    document : document index for batch and sidecar scans, else None
+    """
+
+    priority: int
+    sequence: int
+    code: int = field(compare=False)
+    anchor: int = field(compare=False)
+    offset: int = field(compare=False)
+    document: Optional[int] = field(default=None, compare=False)
+
+    @property
+    def block(self) -> MetaBlock:
+        return MetaBlock.from_int(self.code)
+
+    @property
+    def intensity(self) -> int:
+        return (self.code >> 5) & 0b111
+
+
+# ---------------------------------------------------------
+# Patterns
+# ---------------------------------------------------------
+
+@lru_cache(maxsize=16)
+def _patterns(config: InlineMarkerConfig) -> Tuple[Pattern[str], Pattern[bytes]]:
+    """(str pattern, bytes pattern) for emergency hex markers and compact candidates."""
+    first = chr(config.compact_base)
+    last = chr(config.compact_base + METABLOCK_SPACE - 1)
+    text = re.compile(
+        f"{re.escape(config.prefix)}([0-3][0-9A-Fa-f]{{2}}[{_ODD_HEX}]){re.escape(config.suffix)}|[{first}-{last}]"
+    )
+
+    prefix = re.escape(config.prefix.encode("utf-8"))
+    suffix = re.escape(config.suffix.encode("utf-8"))
+    # Compact markers live in planes 15/16 (U+F0000..U+10FFFF); only
+    # well-formed UTF-8 sequences for that range can match.
+    raw = re.compile(
+        prefix + b"([0-3][0-9A-Fa-f]{2}[" + _ODD_HEX.encode() + b"])" + suffix
+        + b"|(?:\xF3[\xB0-\xBF]|\xF4[\x80-\x8F])[\x80-\xBF][" + _ODD_CONTINUATION + b"]"
+    )
+    return text, raw
+
+
+def _token_starts(text: Text, start: int, end: int) -> int:
+    """
+    Number of whitespace-separated tokens that begin inside text[start:end].
+
+    Bytes are decoded first so that non-ASCII whitespace (U+00A0, U+3000,
+    ...) separates tokens exactly as in ``str.split``; a segment cut inside
+    a UTF-8 sequence decodes to U+FFFD there, which is not whitespace.
+    """
+    if isinstance(text, bytes):
+        segment = text[start:end].decode("utf-8", "replace")
+        before = text[max(start - 4, 0):start].decode("utf-8", "replace")[-1:]
+    else:
+        segment = text[start:end]
+        before = text[start - 1:start]
+
+    tokens = len(segment.split())
+    if tokens and before and not segment[:1].isspace() and not before.isspace():
+        tokens -= 1
+    return tokens
+
+
+# ---------------------------------------------------------
+# Scanner
+# ---------------------------------------------------------
+
+class EmergencyScanner:
+    """
+    Finds MetaBlocks with the Emergency Flag set without decoding.
+
+    on_hit : called with every EmergencyHit as soon as it is found
+    queue  : a ``queue.PriorityQueue`` (or anything with ``put``) fed with every hit
+    """
+
+    def __init__(
+        self,
+        marker_config: InlineMarkerConfig | None = None,
+        on_hit: Optional[Callable[[EmergencyHit], Any]] = None,
+        queue: Optional[Queue] = None,
+    ) -> None:
+        self._marker_config = marker_config or InlineMarkerConfig()
+        self._on_hit = on_hit
+        self._queue = queue
+        self._sequence = count()
+
+    # ---------------------------------------------------------
+    # Inline text
+    # ---------------------------------------------------------
+
+    def has_emergency(self, text: Text) -> bool:
+        """True if ``text`` holds at least one emergency marker."""
+        return next(self._matches(text, 0), None) is not None
+
+    def scan(self, text: Text, document: Optional[int] = None) -> List[EmergencyHit]:
+        """All emergency hits of one document, dispatched in text order."""
+        return [self._dispatch(*match, document) for match in self._matches(text, 0)]
+
+    def scan_documents(self, texts: Iterable[Text]) -> Iterator[EmergencyHit]:
+        for document, text in enumerate(texts):
+            for match in self._matches(text, 0):
+                yield self._dispatch(*match, document)
+
+    def scan_stream(self, source: Union[IO[str], Iterable[str]], chunk_size: int = 1 << 16) -> Iterator[EmergencyHit]:
+        """
+        Scan a text stream chunk by chunk (whitespace-safe, as in
+        ``InlineDecoder.decode_stream``); anchors are global token indices.
+        """
+        tokens = 0
+        for piece in iter_whole_tokens(source, chunk_size):
+            for match in self._matches(piece, tokens):
+                yield self._dispatch(*match, None)
+            tokens += len(piece.split())
+
+    # ---------------------------------------------------------
+    # Sidecars
+    # ---------------------------------------------------------
+
+    def scan_sidecar(self, reader: Any) -> Iterator[EmergencyHit]:
+        """
+        Scan the codes of a SidecarReader. On little-endian hosts the low
+        bit of a code is the low bit of its first byte, so only the odd
+        bytes are ever turned into Python integers.
+        """
+        for document in range(len(reader)):
+            codes = reader.codes(document)
+            if isinstance(codes, memoryview):
+                with codes.cast("B") as raw:
+                    low = raw[0::2].tobytes().translate(_PARITY)
+                indices = _positions(low)
+            else:
+                indices = [index for index, code in enumerate(codes) if code & 1]
+
+            if indices:
+                hit_codes = [codes[index] for index in indices]
+                anchors = reader.anchors(document)
+                if isinstance(codes, memoryview):
+                    codes.release()
+                for index, code in zip(indices, hit_codes):
+                    yield self._dispatch(code, anchors[index], index, document)
+            elif isinstance(codes, memoryview):
+                codes.release()
+
+    # ---------------------------------------------------------
+    # INTERNAL
+    # ---------------------------------------------------------
+
+    def _matches(self, text: Text, first_token: int) -> Iterator[Tuple[int, int, int]]:
+        """Yield (code, anchor, offset) for every emergency marker in ``text``."""
+        config = self._marker_config
+        text_pattern, raw_pattern = _patterns(config)
+
+        if isinstance(text, bytes):
+            pattern: Pattern[Any] = raw_pattern
+            if config.prefix.encode("utf-8") not in text and text.isascii():
+                return
+        else:
+            pattern = text_pattern
+            if config.prefix not in text and text.isascii():
+                return
+
+        tokens = first_token
+        counted = 0
+        for match in pattern.finditer(text):
+            payload = match.group(1)
+            if payload is not None:
+                code = int(payload, 16)
+            elif isinstance(text, bytes):
+                lead, second, third, last = match.group()
+                point = (lead & 0x07) << 18 | (second & 0x3F) << 12 | (third & 0x3F) << 6 | (last & 0x3F)
+                code = point - config.compact_base
+                if not 0 <= code < METABLOCK_SPACE:
+                    continue
+            else:
+                code = ord(match.group()) - config.compact_base
+                if not code & 1:
+                    continue
+
+            position = match.start()
+            tokens += _token_starts(text, counted, position + 1)
+            counted = position + 1
+            yield code, max(tokens - 1, first_token), position
+
+    def _dispatch(self, code: int, anchor: int, offset: int, document: Optional[int]) -> EmergencyHit:
+        hit = EmergencyHit(
+            priority=-((code >> 5) & 0b111),
+            sequence=next(self._sequence),
+            code=code,
+            anchor=anchor,
+            offset=offset,
+            document=document,
+        )
+        if self._on_hit is not None:
+            self._on_hit(hit)
+        if self._queue is not None:
+            self._queue.put(hit)
+        return hit
+
+
+# Maps every byte to b"\x01" if odd, b"\x00" if even.
+_PARITY = bytes(byte & 1 for byte in range(256))
+
+
+def _positions(flags: bytes) -> List[int]:
+    positions = []
+    index = flags.find(1)
+    while index != -1:
+        positions.append(index)
+        index = flags.find(1, index + 1)
+    return positions
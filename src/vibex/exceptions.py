@@ -6,3 +6,23 @@ class MetaBlockEncodingError(Exception):
 class MetaBlockDecodingError(Exception):
     """Raised when a marker or MetaBlock cannot be parsed correctly."""
     pass
+
+
+class SidecarFormatError(MetaBlockDecodingError):
+    """Raised when a binary sidecar file is truncated or malformed."""
+    pass
+
+
+class QuerySyntaxError(ValueError):
+    """Raised when a MetaBlock query expression cannot be parsed."""
+    pass
+
+
+class ArchiveFormatError(MetaBlockDecodingError):
+    """Raised when a columnar MetaBlock archive is truncated or malformed."""
+    pass
+
+
+class IndexFormatError(MetaBlockDecodingError):
+    """Raised when a saved bitmap index file is truncated or malformed."""
+    pass
@@ -0,0 +1,499 @@
+"""
+Per-field bitmap index over MetaBlock fields.
+
+For every (field, value) pair the index keeps two compressed bitmaps:
+
+    spans     : global span ids (block positions across the corpus)
+    documents : ids of the documents containing at least one such span
+
+Queries from ``vibex.query`` are answered with bitmap AND/OR/NOT instead of
+decoding documents. Span ids map back to (document, anchor) positions.
+
+Bitmaps are roaring-style: ids are split into 2^16-wide chunks, each stored
+as a sorted uint16 array when sparse or as a 65536-bit integer when dense.
+On disk a chunk may also be written as runs, whichever is smallest.
+"""
+
+from __future__ import annotations
+
+import os
+import struct
+import sys
+from array import array
+from bisect import bisect_right
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple, Union
+
+from .exceptions import IndexFormatError
+from .metablock import FIELD_LAYOUT, InlineMetaBlock, MetaBlockArray
+from .query import OPERATORS, And, Comparison, Not, Or, Predicate, parse
+from .sidecar import SidecarReader
+
+PathLike = Union[str, "os.PathLike[str]"]
+
+Container = Union[array, int]
+
+_CHUNK_BITS = 16
+_CHUNK_SIZE = 1 << _CHUNK_BITS
+_ARRAY_LIMIT = 4096  # above this many ids a dense bitset is smaller
+_FULL_CHUNK = (1 << _CHUNK_SIZE) - 1
+
+_KIND_ARRAY = 0
+_KIND_BITSET = 1
+_KIND_RUNS = 2
+
+_LITTLE_ENDIAN = sys.byteorder == "little"
+
+
+# ---------------------------------------------------------
+# Container helpers
+# ---------------------------------------------------------
+
+def _bitset_to_array(bits: int) -> array:
+    values = array("H")
+    data = bits.to_bytes(_CHUNK_SIZE // 8, "little")
+    for offset, byte in enumerate(data):
+        if byte:
+            base = offset << 3
+            for bit in range(8):
+                if byte >> bit & 1:
+                    values.append(base | bit)
+    return values
+
+
+def _array_to_bitset(values: Iterable[int]) -> int:
+    data = bytearray(_CHUNK_SIZE // 8)
+    for value in values:
+        data[value >> 3] |= 1 << (value & 7)
+    return int.from_bytes(data, "little")
+
+
+def _normalize(container: Container) -> Optional[Container]:
+    """Pick the cheaper representation; None for an empty container."""
+    if isinstance(container, int):
+        count = container.bit_count()
+        if count == 0:
+            return None
+        return _bitset_to_array(container) if count <= _ARRAY_LIMIT else container
+    if not container:
+        return None
+    return _array_to_bitset(container) if len(container) > _ARRAY_LIMIT else container
+
+
+def _as_bitset(container: Container) -> int:
+    return container if isinstance(container, int) else _array_to_bitset(container)
+
+
+def _and(a: Container, b: Container) -> Optional[Container]:
+    if isinstance(a, int) and isinstance(b, int):
+        return _normalize(a & b)
+    if isinstance(a, int):
+        a, b = b, a
+    if isinstance(b, int):
+        data = b.to_bytes(_CHUNK_SIZE // 8, "little")
+        return _normalize(array("H", (v for v in a if data[v >> 3] >> (v & 7) & 1)))
+    return _normalize(array("H", sorted(set(a).intersection(b))))
+
+
+def _or(a: Container, b: Container) -> Optional[Container]:
+    if isinstance(a, array) and isinstance(b, array) and len(a) + len(b) <= _ARRAY_LIMIT:
+        return _normalize(array("H", sorted(set(a).union(b))))
+    return _normalize(_as_bitset(a) | _as_bitset(b))
+
+
+def _and_not(a: Container, b: Container) -> Optional[Container]:
+    if isinstance(a, array):
+        if isinstance(b, int):
+            data = b.to_bytes(_CHUNK_SIZE // 8, "little")
+            return _normalize(array("H", (v for v in a if not data[v >> 3] >> (v & 7) & 1)))
+        removed = set(b)
+        return _normalize(array("H", (v for v in a if v not in removed)))
+    return _normalize(a & ~_as_bitset(b))
+
+
+def _runs(values: array) -> List[Tuple[int, int]]:
+    runs: List[Tuple[int, int]] = []
+    for value in values:
+        if runs and runs[-1][0] + runs[-1][1] + 1 == value:
+            runs[-1] = (runs[-1][0], runs[-1][1] + 1)
+        else:
+            runs.append((value, 0))
+    return runs
+
+
+# ---------------------------------------------------------
+# Bitmap
+# ---------------------------------------------------------
+
+class Bitmap:
+    """Compressed set of non-negative integer ids."""
+
+    __slots__ = ("_chunks",)
+
+    def __init__(self, chunks: Optional[Dict[int, Container]] = None) -> None:
+        self._chunks: Dict[int, Container] = chunks or {}
+
+    @classmethod
+    def from_sorted(cls, ids: Iterable[int]) -> Bitmap:
+        """Build a bitmap from ascending ids."""
+        chunks: Dict[int, Container] = {}
+        current: Optional[array] = None
+        current_key = -1
+        for value in ids:
+            key = value >> _CHUNK_BITS
+            if key != current_key:
+                current = chunks[key] = array("H")  # type: ignore[assignment]
+                current_key = key
+            current.append(value & 0xFFFF)  # type: ignore[union-attr]
+        return cls({key: _normalize(values) for key, values in chunks.items()})  # type: ignore[misc]
+
+    @classmethod
+    def from_range(cls, stop: int) -> Bitmap:
+        """All ids in [0, stop)."""
+        chunks: Dict[int, Container] = {}
+        full, rest = divmod(stop, _CHUNK_SIZE)
+        for key in range(full):
+            chunks[key] = _FULL_CHUNK
+        if rest:
+            chunks[full] = _normalize((1 << rest) - 1)  # type: ignore[assignment]
+        return cls(chunks)
+
+    # ---------------------------------------------------------
+    # Set protocol
+    # ---------------------------------------------------------
+
+    def __len__(self) -> int:
+        return sum(c.bit_count() if isinstance(c, int) else len(c) for c in self._chunks.values())
+
+    def __bool__(self) -> bool:
+        return bool(self._chunks)
+
+    def __iter__(self) -> Iterator[int]:
+        for key in sorted(self._chunks):
+            container = self._chunks[key]
+            values = _bitset_to_array(container) if isinstance(container, int) else container
+            base = key << _CHUNK_BITS
+            for value in values:
+                yield base | value
+
+    def __contains__(self, value: int) -> bool:
+        container = self._chunks.get(value >> _CHUNK_BITS)
+        if container is None:
+            return False
+        low = value & 0xFFFF
+        if isinstance(container, int):
+            return bool(container >> low & 1)
+        position = bisect_right(container, low)
+        return position > 0 and container[position - 1] == low
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, Bitmap):
+            return NotImplemented
+        return list(self) == list(other)
+
+    def __repr__(self) -> str:
+        return f"Bitmap(size={len(self)}, chunks={len(self._chunks)})"
+
+    def __and__(self, other: Bitmap) -> Bitmap:
+        chunks = {}
+        for key in self._chunks.keys() & other._chunks.keys():
+            container = _and(self._chunks[key], other._chunks[key])
+            if container is not None:
+                chunks[key] = container
+        return Bitmap(chunks)
+
+    def __or__(self, other: Bitmap) -> Bitmap:
+        chunks = dict(self._chunks)
+        for key, container in other._chunks.items():
+            mine = chunks.get(key)
+            chunks[key] = container if mine is None else _or(mine, container)  # type: ignore[assignment]
+        return Bitmap(chunks)
+
+    def __sub__(self, other: Bitmap) -> Bitmap:
+        chunks = {}
+        for key, container in self._chunks.items():
+            theirs = other._chunks.get(key)
+            result = container if theirs is None else _and_not(container, theirs)
+            if result is not None:
+                chunks[key] = result
+        return Bitmap(chunks)
+
+    def invert(self, stop: int) -> Bitmap:
+        """Ids in [0, stop) that are not in this bitmap."""
+        return Bitmap.from_range(stop) - self
+
+    # ---------------------------------------------------------
+    # Serialization
+    # ---------------------------------------------------------
+
+    def to_bytes(self) -> bytes:
+        out = bytearray(struct.pack("<I", len(self._chunks)))
+        for key in sorted(self._chunks):
+            container = self._chunks[key]
+            values = _bitset_to_array(container) if isinstance(container, int) else container
+            runs = _runs(values)
+
+            candidates = [(2 * len(values), _KIND_ARRAY), (4 * len(runs), _KIND_RUNS), (_CHUNK_SIZE // 8, _KIND_BITSET)]
+            _, kind = min(candidates)
+            if kind == _KIND_ARRAY:
+                payload = values.tobytes() if _LITTLE_ENDIAN else _swapped(values)
+            elif kind == _KIND_RUNS:
+                flat = array("H", (field for run in runs for field in run))
+                payload = flat.tobytes() if _LITTLE_ENDIAN else _swapped(flat)
+            else:
+                payload = _as_bitset(container).to_bytes(_CHUNK_SIZE // 8, "little")
+
+            out += struct.pack("<IBI", key, kind, len(payload))
+            out += payload
+        return bytes(out)
+
+    @classmethod
+    def from_bytes(cls, data: Union[bytes, memoryview], offset: int = 0) -> Tuple[Bitmap, int]:
+        """Parse a bitmap at ``offset``; returns it and the offset after it."""
+        (count,) = struct.unpack_from("<I", data, offset)
+        offset += 4
+        chunks: Dict[int, Container] = {}
+        for _ in range(count):
+            key, kind, size = struct.unpack_from("<IBI", data, offset)
+            offset += 9
+            payload = bytes(data[offset:offset + size])
+            if len(payload) != size:
+                raise IndexFormatError("Bitmap container is truncated.")
+            offset += size
+            if kind == _KIND_BITSET:
+                chunks[key] = int.from_bytes(payload, "little")
+                continue
+            if size % 2:
+                raise IndexFormatError("Bitmap container has an odd byte length.")
+            values = array("H", payload)
+            if not _LITTLE_ENDIAN:
+                values.byteswap()
+            if kind == _KIND_RUNS:
+                values = array("H", (v for start, extra in zip(values[::2], values[1::2]) for v in range(start, start + extra + 1)))
+            elif kind != _KIND_ARRAY:
+                raise IndexFormatError(f"Unknown bitmap container kind: {kind}")
+            chunks[key] = values
+        return cls({key: _normalize(c) for key, c in chunks.items()}), offset  # type: ignore[misc]
+
+
+def _swapped(values: array) -> bytes:
+    copy = array("H", values)
+    copy.byteswap()
+    return copy.tobytes()
+
+
+# ---------------------------------------------------------
+# Index
+# ---------------------------------------------------------
+
+# Index keys in a fixed order: (field, value) for every field value.
+_KEYS: Tuple[Tuple[str, int], ...] = tuple(
+    (name, value) for name, (_, mask) in FIELD_LAYOUT.items() for value in range(mask + 1)
+)
+_KEY_IDS: Dict[Tuple[str, int], int] = {key: i for i, key in enumerate(_KEYS)}
+
+# Key ids touched by each packed code.
+_CODE_KEYS: Tuple[Tuple[int, ...], ...] = tuple(
+    tuple(_KEY_IDS[(name, (code >> shift) & mask)] for name, (shift, mask) in FIELD_LAYOUT.items())
+    for code in range(1 << 14)
+)
+
+_INDEX_MAGIC = b"VXBI"
+_INDEX_VERSION = 1
+_INDEX_HEADER = struct.Struct("<4sHHQQ")
+
+
+class BitmapIndexBuilder:
+    """Accumulates documents and produces a BitmapIndex."""
+
+    def __init__(self) -> None:
+        self._span_ids: List[List[int]] = [[] for _ in _KEYS]
+        self._doc_ids: List[List[int]] = [[] for _ in _KEYS]
+        self._doc_offsets = array("Q", [0])
+        self._anchors = array("i")
+
+    def add(self, codes: Iterable[int], anchors: Iterable[int]) -> int:
+        """Add one document; returns its id."""
+        doc = len(self._doc_offsets) - 1
+        span = self._doc_offsets[-1]
+        seen = set()
+        for code, anchor in zip(codes, anchors):
+            for key in _CODE_KEYS[code]:
+                self._span_ids[key].append(span)
+                if key not in seen:
+                    seen.add(key)
+                    self._doc_ids[key].append(doc)
+            self._anchors.append(anchor)
+            span += 1
+        self._doc_offsets.append(span)
+        return doc
+
+    def add_document(self, blocks: Union[MetaBlockArray, Iterable[InlineMetaBlock]]) -> int:
+        if not isinstance(blocks, MetaBlockArray):
+            blocks = MetaBlockArray.from_inline_blocks(blocks)
+        return self.add(blocks.codes, blocks.anchors)
+
+    def build(self) -> BitmapIndex:
+        return BitmapIndex(
+            spans=[Bitmap.from_sorted(ids) for ids in self._span_ids],
+            documents=[Bitmap.from_sorted(ids) for ids in self._doc_ids],
+            doc_offsets=self._doc_offsets,
+            anchors=self._anchors,
+        )
+
+
+class BitmapIndex:
+    """
+    Corpus-wide bitmap index over MetaBlock fields.
+
+    ``spans(query)`` returns the span ids whose block satisfies the query;
+    ``documents(query)`` the documents containing such a span.
+    """
+
+    def __init__(self, spans: List[Bitmap], documents: List[Bitmap], doc_offsets: array, anchors: array) -> None:
+        self._spans = spans
+        self._documents = documents
+        self._doc_offsets = doc_offsets
+        self._anchors = anchors
+
+    @classmethod
+    def from_sidecar(cls, reader: SidecarReader) -> BitmapIndex:
+        builder = BitmapIndexBuilder()
+        for doc in range(len(reader)):
+            builder.add(reader.codes(doc).tolist(), reader.anchors(doc))
+        return builder.build()
+
+    @classmethod
+    def from_documents(cls, documents: Iterable[Union[MetaBlockArray, Iterable[InlineMetaBlock]]]) -> BitmapIndex:
+        builder = BitmapIndexBuilder()
+        for blocks in documents:
+            builder.add_document(blocks)
+        return builder.build()
+
+    @property
+    def document_count(self) -> int:
+        return len(self._doc_offsets) - 1
+
+    @property
+    def span_count(self) -> int:
+        return self._doc_offsets[-1]
+
+    # ---------------------------------------------------------
+    # Queries
+    # ---------------------------------------------------------
+
+    def bitmap(self, field: str, value: int, level: str = "spans") -> Bitmap:
+        """Raw bitmap of one (field, value) pair at the span or document level."""
+        bitmaps = self._spans if level == "spans" else self._documents
+        key = _KEY_IDS.get((field, value))
+        return bitmaps[key] if key is not None else Bitmap()
+
+    def spans(self, query: Union[str, Predicate]) -> Bitmap:
+        """Span ids whose MetaBlock satisfies the query."""
+        return self._evaluate(_as_predicate(query), self._spans, self.span_count)
+
+    def documents(self, query: Union[str, Predicate], same_span: bool = True) -> Bitmap:
+        """
+        Documents matching the query.
+
+        With ``same_span`` a single span must satisfy the whole query.
+        Otherwise every comparison is answered on the document bitmaps, so
+        ``a & b`` means "has a span with a and a span with b", and ``~a``
+        means "has no span with a".
+        """
+        predicate = _as_predicate(query)
+        if not same_span:
+            return self._evaluate(predicate, self._documents, self.document_count)
+        return Bitmap.from_sorted(self._docs_of(self.spans(predicate)))
+
+    def positions(self, spans: Bitmap) -> Iterator[Tuple[int, int]]:
+        """Yield (document, anchor) for every span id in ``spans``."""
+        offsets = self._doc_offsets
+        for span in spans:
+            yield bisect_right(offsets, span) - 1, self._anchors[span]
+
+    def _docs_of(self, spans: Bitmap) -> Iterator[int]:
+        """Documents owning the given (ascending) span ids, each once."""
+        offsets = self._doc_offsets
+        end = 0  # first span id past the current document
+        for span in spans:
+            if span >= end:
+                doc = bisect_right(offsets, span) - 1
+                end = offsets[doc + 1]
+                yield doc
+
+    def _evaluate(self, predicate: Predicate, bitmaps: List[Bitmap], universe: int) -> Bitmap:
+        if isinstance(predicate, Comparison):
+            compare = OPERATORS[predicate.op]
+            result = Bitmap()
+            _, mask = FIELD_LAYOUT[predicate.field]
+            for value in range(mask + 1):
+                if compare(value, predicate.value):
+                    result = result | bitmaps[_KEY_IDS[(predicate.field, value)]]
+            return result
+        if isinstance(predicate, And):
+            return self._evaluate(predicate.left, bitmaps, universe) & self._evaluate(predicate.right, bitmaps, universe)
+        if isinstance(predicate, Or):
+            return self._evaluate(predicate.left, bitmaps, universe) | self._evaluate(predicate.right, bitmaps, universe)
+        if isinstance(predicate, Not):
+            return self._evaluate(predicate.operand, bitmaps, universe).invert(universe)
+        raise TypeError(f"Unsupported predicate: {predicate!r}")
+
+    # ---------------------------------------------------------
+    # Persistence
+    # ---------------------------------------------------------
+
+    def save(self, path: PathLike) -> None:
+        with open(path, "wb") as handle:
+            handle.write(_INDEX_HEADER.pack(_INDEX_MAGIC, _INDEX_VERSION, 0, self.document_count, self.span_count))
+            for buffer in (self._doc_offsets, self._anchors):
+                data = array(buffer.typecode, buffer)
+                if not _LITTLE_ENDIAN:
+                    data.byteswap()
+                handle.write(data.tobytes())
+            for bitmap in (*self._spans, *self._documents):
+                handle.write(bitmap.to_bytes())
+
+    @classmethod
+    def load(cls, path: PathLike) -> BitmapIndex:
+        with open(path, "rb") as handle:
+            data = memoryview(handle.read())
+
+        if len(data) < _INDEX_HEADER.size:
+            raise IndexFormatError("File is too small to be a VIBE-X bitmap index.")
+        magic, version, _, doc_count, span_count = _INDEX_HEADER.unpack_from(data, 0)
+        if magic != _INDEX_MAGIC:
+            raise IndexFormatError(f"Bad bitmap index magic: {bytes(magic)!r}")
+        if version != _INDEX_VERSION:
+            raise IndexFormatError(f"Unsupported bitmap index version: {version}")
+
+        offset = _INDEX_HEADER.size
+        buffers = []
+        for typecode, count in (("Q", doc_count + 1), ("i", span_count)):
+            buffer = array(typecode)
+            size = buffer.itemsize * count
+            if len(data) < offset + size:
+                raise IndexFormatError("Bitmap index is truncated.")
+            buffer.frombytes(data[offset:offset + size])
+            if not _LITTLE_ENDIAN:
+                buffer.byteswap()
+            buffers.append(buffer)
+            offset += size
+
+        bitmaps = []
+        try:
+            for _ in range(2 * len(_KEYS)):
+                bitmap, offset = Bitmap.from_bytes(data, offset)
+                bitmaps.append(bitmap)
+        except struct.error as exc:
+            raise IndexFormatError("Bitmap index is truncated.") from exc
+
+        return cls(
+            spans=bitmaps[:len(_KEYS)],
+            documents=bitmaps[len(_KEYS):],
+            doc_offsets=buffers[0],
+            anchors=buffers[1],
+        )
+
+
+def _as_predicate(query: Union[str, Predicate]) -> Predicate:
+    return parse(query) if isinstance(query, str) else query
@@ -1,10 +1,28 @@
 from __future__ import annotations
 
+import re
+from array import array
+from concurrent.futures import Executor
+from collections import Counter
 from dataclasses import dataclass
-from typing import List
+from functools import cached_property
+from time import perf_counter
+from typing import IO, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple, Union
 
-from .metablock import InlineMetaBlock, MetaBlock, MetaBlockDecodingError, TokenSpan
-from .tokenizer import Tokenizer
+from .metablock import (
+    BLOCK_BY_INT,
+    FIELD_LAYOUT,
+    HEX_BY_INT,
+    METABLOCK_SPACE,
+    InlineMetaBlock,
+    MetaBlock,
+    MetaBlockArray,
+    MetaBlockDecodingError,
+    TokenSpan,
+)
+from .metrics import MetricsSink
+from .subword import alignment
+from .tokenizer import Tokenizer, TokenizerProtocol, iter_whole_tokens, require_whitespace_tokenizer
 from .inline_encoder import InlineMarkerConfig
 
 
@@ -27,6 +45,150 @@ class DecodedInlineText:
     blocks: List[InlineMetaBlock]
 
 
+class _UnannotatedText(DecodedInlineText):
+    """
+    ``decode_fast`` result for text without markers: ``clean_text`` is the
+    input itself and ``clean_tokens`` is only split on first access.
+    Compares equal to the DecodedInlineText holding the same values.
+    """
+
+    def __init__(self, text: str, tokenizer: TokenizerProtocol) -> None:
+        object.__setattr__(self, "clean_text", text)
+        object.__setattr__(self, "blocks", [])
+        object.__setattr__(self, "_tokenizer", tokenizer)
+
+    def __getattr__(self, name: str) -> List[str]:
+        # Only reached while clean_tokens has not been set yet.
+        if name != "clean_tokens":
+            raise AttributeError(name)
+        tokens = self._tokenizer.tokenize(self.clean_text)
+        object.__setattr__(self, "clean_tokens", tokens)
+        return tokens
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, DecodedInlineText):
+            return NotImplemented
+        return (self.clean_text, self.clean_tokens, self.blocks) == (other.clean_text, other.clean_tokens, other.blocks)
+
+
+@dataclass(frozen=True)
+class DecodedBatch:
+    """
+    Columnar output of ``InlineDecoder.decode_batch``.
+
+    clean_texts : clean text of every document
+    offsets     : document i owns blocks[offsets[i]:offsets[i + 1]]
+    blocks      : packed codes, anchors and lengths of all documents
+    """
+
+    clean_texts: List[str]
+    offsets: array
+    blocks: MetaBlockArray
+
+    def __len__(self) -> int:
+        return len(self.clean_texts)
+
+    def document(self, index: int) -> MetaBlockArray:
+        """Blocks of one document as their own MetaBlockArray."""
+        start, end = self.offsets[index], self.offsets[index + 1]
+        blocks = self.blocks
+        return MetaBlockArray(blocks.codes[start:end], blocks.anchors[start:end], blocks.lengths[start:end])
+
+    def extend(self, other: DecodedBatch) -> None:
+        """Append the documents of another batch (used to merge shards)."""
+        base = self.offsets[-1]
+        self.clean_texts.extend(other.clean_texts)
+        self.offsets.extend(base + offset for offset in other.offsets[1:])
+        self.blocks.extend(other.blocks)
+
+
+class LazyDecodedInlineText:
+    """
+    Output of ``InlineDecoder.decode_lazy``.
+
+    Decoding only records where the markers are and what they hold;
+    ``clean_text``, ``clean_tokens`` and ``blocks`` are built on first
+    access and cached, with the same values ``decode_fast`` returns.
+    ``codes``, ``iter_blocks`` and ``count_by`` read the recorded markers
+    without building clean text or marker strings.
+    """
+
+    def __init__(self, decoder: InlineDecoder, text: str, markers: List[Tuple[int, int, int, int]]) -> None:
+        self._decoder = decoder
+        self._text = text
+        self._markers = markers  # (start, end, code, token or clean offset)
+
+    def __len__(self) -> int:
+        return len(self._markers)
+
+    @property
+    def codes(self) -> array:
+        return array("H", [marker[2] for marker in self._markers])
+
+    @cached_property
+    def anchors(self) -> array:
+        if not self._decoder._subword:
+            return array("i", [marker[3] for marker in self._markers])
+        aligned = alignment(self._decoder._tokenizer, self.clean_text)
+        return array("i", [aligned.subword_at(marker[3]) for marker in self._markers])
+
+    @cached_property
+    def clean_text(self) -> str:
+        if not self._markers:
+            return self._text
+
+        text = self._text
+        pieces: List[str] = []
+        copied = 0
+        for start, end, _, _ in self._markers:
+            pieces.append(text[copied:start])
+            copied = end
+        pieces.append(text[copied:])
+        return "".join(pieces)
+
+    @cached_property
+    def clean_tokens(self) -> List[str]:
+        return self._decoder._tokenizer.tokenize(self.clean_text)
+
+    @cached_property
+    def blocks(self) -> List[InlineMetaBlock]:
+        markers = self._decoder._marker_config.markers()
+        return [
+            InlineMetaBlock(block=block, span=span, marker=markers[code])
+            for (block, span), code in zip(self.iter_blocks(), self.codes)
+        ]
+
+    def iter_blocks(self) -> Iterator[Tuple[MetaBlock, TokenSpan]]:
+        """(MetaBlock, TokenSpan) pairs; MetaBlocks are the shared interned instances."""
+        for (_, _, code, _), anchor in zip(self._markers, self.anchors):
+            yield BLOCK_BY_INT[code], TokenSpan(anchor=anchor, length=1 + ((code >> 10) & 0b111 if code >> 13 else 0))
+
+    def to_array(self) -> MetaBlockArray:
+        codes = self.codes
+        lengths = [1 + ((code >> 10) & 0b111 if code >> 13 else 0) for code in codes]
+        return MetaBlockArray(codes, self.anchors, lengths)
+
+    def count_by(self, name: str) -> Dict[int, int]:
+        """Number of blocks per value of one SPICE-R field, e.g. ``count_by("polarity")``."""
+        try:
+            shift, mask = FIELD_LAYOUT[name]
+        except KeyError:
+            raise ValueError(f"Unknown MetaBlock field: {name}") from None
+        return dict(Counter((marker[2] >> shift) & mask for marker in self._markers))
+
+
+_WHITESPACE = re.compile(r"\s")
+
+
+def _count_token_starts(text: str, start: int, end: int) -> int:
+    """Number of whitespace-separated tokens that begin inside text[start:end]."""
+    segment = text[start:end]
+    count = len(segment.split())
+    if count and start > 0 and not segment[0].isspace() and not text[start - 1].isspace():
+        count -= 1  # the first piece continues a token that began earlier
+    return count
+
+
 # ---------------------------------------------------------
 # Inline Decoder
 # ---------------------------------------------------------
@@ -40,17 +202,60 @@ class InlineDecoder:
         - For each token, remove zero or more inline markers
         - Convert marker payloads (hex) into MetaBlocks
         - Produce a list of InlineMetaBlock + clean text
+
+    ``decode_fast`` skips the tokenize/detokenize cycle and finds markers
+    with a single scan over the string instead; ``preserve_layout=True``
+    makes ``decode`` use it, so the original whitespace is restored. ``decode_stream`` applies
+    the same scan incrementally to file-like objects or chunk iterators,
+    and ``decode_batch`` to many documents at once with columnar output.
+
+    With a tokenizer other than the whitespace ``Tokenizer`` (see
+    ``vibex.subword``), ``decode`` and ``decode_fast`` strip markers
+    anywhere in the text and anchor each one to the subword that starts
+    at its offset in the clean text. ``decode_stream`` and
+    ``decode_batch`` count whitespace tokens and raise TypeError for such
+    tokenizers.
+
+    ``metrics`` (see ``vibex.metrics``) receives per-stage timings and
+    counters from ``decode``; leave it None for the uninstrumented path.
+
+    Thread safety: as with ``InlineEncoder``, a decoder can be shared by
+    any number of threads. Every call keeps its state in locals; the
+    results (including ``LazyDecodedInlineText``) belong to the caller.
     """
 
-    def __init__(self, tokenizer: Tokenizer, marker_config: InlineMarkerConfig | None = None) -> None:
+    def __init__(
+        self,
+        tokenizer: TokenizerProtocol,
+        marker_config: InlineMarkerConfig | None = None,
+        preserve_layout: bool = False,
+        metrics: MetricsSink | None = None,
+    ) -> None:
         self._tokenizer = tokenizer
         self._marker_config = marker_config or InlineMarkerConfig()
+        self._preserve_layout = preserve_layout
+        self._subword = not isinstance(tokenizer, Tokenizer)
+        self._metrics = metrics
+
+    @property
+    def tokenizer(self) -> TokenizerProtocol:
+        return self._tokenizer
+
+    @property
+    def marker_config(self) -> InlineMarkerConfig:
+        return self._marker_config
 
     # ---------------------------------------------------------
     # Public API
     # ---------------------------------------------------------
 
     def decode(self, inline_text: str) -> DecodedInlineText:
+        if self._metrics is not None:
+            return self._decode_instrumented(inline_text, self._metrics)
+        if self._preserve_layout or self._subword:
+            # Markers are cut out by offset; the text around them is kept byte for byte.
+            return self.decode_fast(inline_text)
+
         tokens = self._tokenizer.tokenize(inline_text)
 
         clean_tokens: List[str] = []
@@ -58,59 +263,373 @@ class InlineDecoder:
 
         prefix = self._marker_config.prefix
         suffix = self._marker_config.suffix
+        # Only pay the per-token compact check when the text can hold one.
+        compact_base = self._marker_config.compact_base if self._may_have_compact(inline_text) else None
 
         for idx, token in enumerate(tokens):
-            markers, clean_token = self._extract_markers(token, prefix, suffix)
+            markers, clean_token = self.extract_markers(token, prefix, suffix, compact_base)
             clean_tokens.append(clean_token)
 
             for payload in markers:
-                try:
-                    block = MetaBlock.from_hex(payload)
-                except Exception as exc:
-                    raise MetaBlockDecodingError(
-                        f"Invalid MetaBlock marker payload '{payload}'"
-                    ) from exc
-
-                # Span length reconstruction:
-                #   If span=N means total tokens = 1 + N
-                span_length = 1 + (block.span or 0)
-
-                inline_block = InlineMetaBlock(
-                    block=block,
-                    span=TokenSpan(anchor=idx, length=span_length),
-                    marker=self._marker_config.format_marker(block.to_hex()),
-                )
-                blocks.append(inline_block)
+                blocks.append(self._make_block(payload, idx))
+
+        clean_text = self._tokenizer.detokenize(clean_tokens)
+        return DecodedInlineText(clean_text=clean_text, clean_tokens=clean_tokens, blocks=blocks)
+
+    def decode_fast(self, inline_text: str) -> DecodedInlineText:
+        """
+        Decode with a single scan for marker prefixes.
+
+        Token anchors are derived from the whitespace boundaries between
+        markers, so the text is never split into tokens and joined again.
+        Unlike ``decode``, the original whitespace is kept as-is, and text
+        without any marker is returned unchanged (same object), with
+        ``clean_tokens`` only split when first read.
+        Both modes agree on encoder output, which is single-space separated.
+        """
+        if not self._has_markers(inline_text):
+            return _UnannotatedText(inline_text, self._tokenizer)
+
+        if self._subword:
+            return self._decode_subword(inline_text)
+
+        clean_text, blocks = self._scan(inline_text)
+        return DecodedInlineText(
+            clean_text=clean_text,
+            clean_tokens=self._tokenizer.tokenize(clean_text),
+            blocks=blocks,
+        )
+
+    def decode_lazy(self, inline_text: str) -> LazyDecodedInlineText:
+        """
+        Find the markers in one pass and defer everything else.
+
+        Attributes of the result are computed on first access, so callers
+        that only filter on blocks never build the clean text or tokens.
+        """
+        if not self._has_markers(inline_text):
+            return LazyDecodedInlineText(self, inline_text, [])
+
+        parse = self._parse_payload
+        markers: List[Tuple[int, int, int, int]] = []
+        removed = 0
+        for start, end, payload, token in self._markers(inline_text, anywhere=self._subword):
+            # Subword anchors are resolved later from the clean-text offset.
+            position = start - removed if self._subword else token
+            markers.append((start, end, parse(payload).to_int(), position))
+            removed += end - start
+        return LazyDecodedInlineText(self, inline_text, markers)
+
+    def decode_stream(
+        self,
+        source: Union[IO[str], Iterable[str]],
+        chunk_size: int = 1 << 16,
+        first_token: int = 0,
+    ) -> Iterator[Union[str, InlineMetaBlock]]:
+        """
+        Decode a text stream incrementally.
+
+        ``source`` is a text-mode file-like object (read in ``chunk_size``
+        pieces) or any iterable of strings. Yields clean-text chunks, each
+        followed by the InlineMetaBlocks found in it. Anchors are global
+        token indices over the whole stream, counted from ``first_token``
+        when decoding the continuation of an earlier stream.
+
+        Chunks are cut after their last whitespace character, so a token
+        (and any marker attached to it) straddling two chunks is held back
+        until it is complete. Whitespace is preserved as in ``decode_fast``.
+        Subword tokenizers raise TypeError, as in ``decode_batch``.
+        """
+        require_whitespace_tokenizer(self._tokenizer, "decode_stream")
+        return self._decode_stream(source, chunk_size, first_token)
+
+    def _decode_stream(
+        self,
+        source: Union[IO[str], Iterable[str]],
+        chunk_size: int,
+        first_token: int,
+    ) -> Iterator[Union[str, InlineMetaBlock]]:
+        tokens = first_token
+        for piece in iter_whole_tokens(source, chunk_size):
+            yield from self._decode_piece(piece, tokens)
+            tokens += len(piece.split())
+
+    def decode_batch(
+        self,
+        texts: Sequence[str],
+        executor: Optional[Executor] = None,
+        parallel_threshold: int = 1024,
+        chunk_size: int = 256,
+    ) -> DecodedBatch:
+        """
+        Decode many documents into one columnar DecodedBatch.
+
+        Uses the ``decode_fast`` scan and packs every block straight into
+        the shared code/anchor/length buffers, so no per-block objects are
+        created. When an executor is given and the batch has at least
+        ``parallel_threshold`` documents, ``chunk_size`` slices run on the
+        executor and their results are merged in input order.
+
+        Anchors count whitespace tokens, so any tokenizer other than
+        ``Tokenizer`` raises TypeError.
+        """
+        require_whitespace_tokenizer(self._tokenizer, "decode_batch")
+        if executor is not None and len(texts) >= parallel_threshold:
+            slices = [texts[start:start + chunk_size] for start in range(0, len(texts), chunk_size)]
+            result = DecodedBatch(clean_texts=[], offsets=array("Q", [0]), blocks=MetaBlockArray())
+            for part in executor.map(self.decode_batch, slices):
+                result.extend(part)
+            return result
+
+        clean_texts: List[str] = []
+        offsets = array("Q", [0])
+        blocks = MetaBlockArray()
+        codes, anchors, lengths = blocks.codes, blocks.anchors, blocks.lengths
+
+        for text in texts:
+            if not self._has_markers(text):
+                clean_texts.append(text)
+                offsets.append(len(codes))
+                continue
+
+            pieces: List[str] = []
+            copied = 0
+            for start, end, payload, token in self._markers(text):
+                code = self._parse_payload(payload).to_int()
+                codes.append(code)
+                anchors.append(token)
+                lengths.append(1 + ((code >> 10) & 0b111 if code >> 13 else 0))
+                pieces.append(text[copied:start])
+                copied = end
+            pieces.append(text[copied:])
+
+            clean_texts.append("".join(pieces))
+            offsets.append(len(codes))
+
+        return DecodedBatch(clean_texts=clean_texts, offsets=offsets, blocks=blocks)
+
+    # ---------------------------------------------------------
+    # INTERNAL: Instrumented decode
+    # ---------------------------------------------------------
+
+    def _decode_instrumented(self, inline_text: str, metrics: MetricsSink) -> DecodedInlineText:
+        """``decode`` with per-stage timings and counters reported to ``metrics``."""
+        try:
+            if self._preserve_layout or self._subword:
+                start = perf_counter()
+                decoded = self.decode_fast(inline_text)
+                metrics.observe("decode.scan", perf_counter() - start)
+            else:
+                decoded = self._decode_stages(inline_text, metrics)
+        except MetaBlockDecodingError:
+            metrics.increment("decode.errors")
+            raise
+
+        metrics.increment("decode.documents")
+        metrics.increment("decode.tokens", len(decoded.clean_tokens))
+        metrics.increment("decode.markers", len(decoded.blocks))
+        metrics.increment("decode.bytes_in", len(inline_text.encode("utf-8")))
+        metrics.increment("decode.bytes_out", len(decoded.clean_text.encode("utf-8")))
+        return decoded
+
+    def _decode_stages(self, inline_text: str, metrics: MetricsSink) -> DecodedInlineText:
+        prefix = self._marker_config.prefix
+        suffix = self._marker_config.suffix
+        compact_base = self._marker_config.compact_base if self._may_have_compact(inline_text) else None
+
+        start = perf_counter()
+        tokens = self._tokenizer.tokenize(inline_text)
+        tokenized = perf_counter()
+
+        clean_tokens: List[str] = []
+        found: List[Tuple[str, int]] = []
+        for idx, token in enumerate(tokens):
+            markers, clean_token = self.extract_markers(token, prefix, suffix, compact_base)
+            clean_tokens.append(clean_token)
+            found.extend((payload, idx) for payload in markers)
+        extracted = perf_counter()
+
+        blocks = [self._make_block(payload, idx) for payload, idx in found]
+        parsed = perf_counter()
 
         clean_text = self._tokenizer.detokenize(clean_tokens)
+        metrics.observe("decode.tokenize", tokenized - start)
+        metrics.observe("decode.extract", extracted - tokenized)
+        metrics.observe("decode.parse", parsed - extracted)
+        metrics.observe("decode.detokenize", perf_counter() - parsed)
         return DecodedInlineText(clean_text=clean_text, clean_tokens=clean_tokens, blocks=blocks)
 
+    # ---------------------------------------------------------
+    # INTERNAL: Single-pass scanner
+    # ---------------------------------------------------------
+
+    def _has_markers(self, text: str) -> bool:
+        return self._marker_config.prefix in text or self._may_have_compact(text)
+
+    def _may_have_compact(self, text: str) -> bool:
+        """False when ``text`` has no marker of either form outside the ASCII range."""
+        # Compact markers are never ASCII, which Python can tell in O(1).
+        return not text.isascii() and self._marker_config.marker_pattern().search(text) is not None
+
+    def _markers(self, text: str, anywhere: bool = False) -> Iterator[Tuple[int, int, str, int]]:
+        """
+        Yield (start, end, hex payload, token index) for every marker in
+        ``text`` with one pass over the marker starts of either mode.
+
+        Only markers at the start of a token (or directly after another
+        marker) are decoded, mirroring ``extract_markers``, unless
+        ``anywhere`` is set (subword tokenizers).
+        """
+        prefix = self._marker_config.prefix
+        suffix = self._marker_config.suffix
+        compact_base = self._marker_config.compact_base
+        search = self._marker_config.marker_pattern().search
+
+        tokens = 0  # tokens started in text[:counted]
+        counted = 0
+        marker_end = -1
+
+        match = search(text)
+        while match is not None:
+            pos = match.start()
+            tokens += _count_token_starts(text, counted, pos + 1)
+            counted = pos + 1
+
+            if not anywhere and pos != marker_end and pos > 0 and not text[pos - 1].isspace():
+                # Marker inside a token: the tokenizing decoder keeps it too.
+                match = search(text, counted)
+                continue
+
+            if text.startswith(prefix, pos):
+                payload_start = pos + len(prefix)
+                end_idx = text.find(suffix, payload_start)
+                # A marker never spans tokens: a suffix past whitespace
+                # belongs to a later token, as ``decode`` sees it.
+                if end_idx == -1 or _WHITESPACE.search(text, payload_start, end_idx):
+                    raise MetaBlockDecodingError("Marker prefix found without matching suffix.")
+                payload = text[payload_start:end_idx]
+                marker_end = end_idx + len(suffix)
+            else:
+                payload = HEX_BY_INT[ord(text[pos]) - compact_base]
+                marker_end = pos + 1
+
+            yield pos, marker_end, payload, tokens - 1
+            match = search(text, marker_end)
+
+    def _scan(self, text: str, first_token: int = 0) -> Tuple[str, List[InlineMetaBlock]]:
+        """Strip markers from ``text``; anchors are offset by ``first_token``."""
+        pieces: List[str] = []
+        blocks: List[InlineMetaBlock] = []
+        copied = 0
+
+        for start, end, payload, token in self._markers(text):
+            blocks.append(self._make_block(payload, first_token + token))
+            pieces.append(text[copied:start])
+            copied = end
+
+        pieces.append(text[copied:])
+        return "".join(pieces), blocks
+
+    def _decode_subword(self, text: str) -> DecodedInlineText:
+        """Strip every marker and anchor it by its offset in the clean text."""
+        pieces: List[str] = []
+        found: List[Tuple[int, str]] = []
+        clean_length = 0
+        copied = 0
+
+        for start, end, payload, _ in self._markers(text, anywhere=True):
+            pieces.append(text[copied:start])
+            clean_length += start - copied
+            found.append((clean_length, payload))
+            copied = end
+        pieces.append(text[copied:])
+        clean_text = "".join(pieces)
+
+        aligned = alignment(self._tokenizer, clean_text)
+        blocks: List[InlineMetaBlock] = []
+        for offset, payload in found:
+            try:
+                anchor = aligned.subword_at(offset)
+            except IndexError:
+                raise MetaBlockDecodingError(f"Marker at offset {offset} precedes every token.") from None
+            blocks.append(self._make_block(payload, anchor))
+
+        return DecodedInlineText(
+            clean_text=clean_text,
+            clean_tokens=self._tokenizer.tokenize(clean_text),
+            blocks=blocks,
+        )
+
+    def _decode_piece(self, text: str, first_token: int) -> Iterator[Union[str, InlineMetaBlock]]:
+        if not self._has_markers(text):
+            yield text
+            return
+
+        clean_text, blocks = self._scan(text, first_token)
+        if clean_text:
+            yield clean_text
+        yield from blocks
+
+    @staticmethod
+    def _parse_payload(payload: str) -> MetaBlock:
+        try:
+            return MetaBlock.from_hex(payload)
+        except Exception as exc:
+            raise MetaBlockDecodingError(
+                f"Invalid MetaBlock marker payload '{payload}'"
+            ) from exc
+
+    def _make_block(self, payload: str, anchor: int) -> InlineMetaBlock:
+        """Turn a marker payload found at token ``anchor`` into an InlineMetaBlock."""
+        block = self._parse_payload(payload)
+
+        # Span length reconstruction:
+        #   If span=N means total tokens = 1 + N
+        span_length = 1 + (block.span or 0)
+
+        return InlineMetaBlock(
+            block=block,
+            span=TokenSpan(anchor=anchor, length=span_length),
+            marker=self._marker_config.markers()[block.to_int()],
+        )
+
     # ---------------------------------------------------------
     # INTERNAL: Marker extraction
     # ---------------------------------------------------------
 
     @staticmethod
-    def _extract_markers(token: str, prefix: str, suffix: str) -> tuple[List[str], str]:
+    def extract_markers(
+        token: str, prefix: str, suffix: str, compact_base: int | None = None
+    ) -> tuple[List[str], str]:
         """
         Extract zero or more inline markers from the beginning of a token.
 
         A token may look like:
             <prefix><hex><suffix><prefix><hex><suffix>word
 
-        We return:
+        or, with compact markers (single code points from ``compact_base``):
+            <compact><compact>word
+
+        We return (compact markers are reported as their hex payload):
             (["hex1", "hex2"], "word")
         """
         markers: List[str] = []
         current = token
 
-        while current.startswith(prefix):
-            end_idx = current.find(suffix, len(prefix))
-            if end_idx == -1:
-                raise MetaBlockDecodingError("Marker prefix found without matching suffix.")
+        while True:
+            while current.startswith(prefix):
+                end_idx = current.find(suffix, len(prefix))
+                if end_idx == -1:
+                    raise MetaBlockDecodingError("Marker prefix found without matching suffix.")
 
-            payload = current[len(prefix):end_idx]
-            markers.append(payload)
+                payload = current[len(prefix):end_idx]
+                markers.append(payload)
 
-            current = current[end_idx + len(suffix):]
+                current = current[end_idx + len(suffix):]
 
-        return markers, current
+            # Without compact_base this is the whole per-token cost of a
+            # token that carries no marker: one startswith and one test.
+            if compact_base is None or not current or not 0 <= ord(current[0]) - compact_base < METABLOCK_SPACE:
+                return markers, current
+            markers.append(HEX_BY_INT[ord(current[0]) - compact_base])
+            current = current[1:]
@@ -1,11 +1,17 @@
 from __future__ import annotations
 
+import re
+from concurrent.futures import Executor
 from dataclasses import dataclass
-from typing import Iterable, List
+from functools import lru_cache
+from time import perf_counter
+from typing import IO, Dict, Iterable, Iterator, List, Optional, Pattern, Sequence, Tuple, Union
 
-from .metablock import InlineMetaBlock, MetaBlock, TokenSpan
+from .metablock import HEX_BY_INT, METABLOCK_SPACE, InlineMetaBlock, MetaBlock, TokenSpan
 from .exceptions import MetaBlockEncodingError
-from .tokenizer import Tokenizer
+from .metrics import MetricsSink
+from .tokenizer import TOKEN_PATTERN, Tokenizer, TokenizerProtocol, iter_whole_tokens, require_whitespace_tokenizer
+from .validation import MERGE_POLICIES, normalize
 
 
 # ---------------------------------------------------------
@@ -23,14 +29,58 @@ class InlineMarkerConfig:
 
     These belong to the Unicode Private Use Area (PUA) and never collide
     with natural language text.
+
+    Compact mode (``compact=True``) writes each MetaBlock as a single code
+    point ``compact_base + value`` in the Supplementary PUA-A plane
+    (U+F0000–U+F3FFF by default): 4 UTF-8 bytes per marker instead of 10.
+    Decoders recognize both forms regardless of this flag.
     """
 
     prefix: str = "\uE000"
     suffix: str = "\uE001"
+    compact: bool = False
+    compact_base: int = 0xF0000
+
+    def __post_init__(self) -> None:
+        last = self.compact_base + METABLOCK_SPACE - 1
+        if not any(start <= self.compact_base and last <= end for start, end in _SUPPLEMENTARY_PUA):
+            raise ValueError(
+                f"Compact marker range U+{self.compact_base:X}..U+{last:X} must lie inside a Supplementary PUA plane."
+            )
 
     def format_marker(self, hex_payload: str) -> str:
         return f"{self.prefix}{hex_payload}{self.suffix}"
 
+    def format_code(self, value: int) -> str:
+        """Marker for a packed 14-bit value in the configured mode."""
+        if self.compact:
+            return chr(self.compact_base + value)
+        return self.format_marker(HEX_BY_INT[value])
+
+    def markers(self) -> Tuple[str, ...]:
+        """Marker strings for all 2^14 packed values, built once per config."""
+        return _marker_table(self)
+
+    def marker_pattern(self) -> Pattern[str]:
+        """Pattern matching the start of a marker in either mode."""
+        return _marker_pattern(self)
+
+
+# Supplementary Private Use Area planes (A and B).
+_SUPPLEMENTARY_PUA = ((0xF0000, 0xFFFFD), (0x100000, 0x10FFFD))
+
+
+@lru_cache(maxsize=16)
+def _marker_table(config: InlineMarkerConfig) -> Tuple[str, ...]:
+    return tuple(config.format_code(value) for value in range(METABLOCK_SPACE))
+
+
+@lru_cache(maxsize=16)
+def _marker_pattern(config: InlineMarkerConfig) -> Pattern[str]:
+    first = chr(config.compact_base)
+    last = chr(config.compact_base + METABLOCK_SPACE - 1)
+    return re.compile(f"{re.escape(config.prefix)}|[{first}-{last}]")
+
 
 # ---------------------------------------------------------
 # User-facing structured annotation
@@ -58,6 +108,40 @@ class SentimentAnnotation:
     emotion: int
     reserved: int = 0
 
+    @classmethod
+    def from_metablock(cls, block: MetaBlock, anchor: int) -> SentimentAnnotation:
+        """Rebuild the annotation a decoded MetaBlock was encoded from."""
+        return cls(
+            anchor=anchor,
+            length=1 + (block.span or 0),
+            polarity=block.polarity,
+            intensity=block.intensity,
+            context=block.context,
+            emotion=block.emotion,
+            reserved=block.reserved,
+        )
+
+    def to_int(self) -> int:
+        """
+        Pack the annotation straight into its 14-bit value.
+
+        Equivalent to ``to_metablock().to_int()`` without building the
+        intermediate MetaBlock.
+        """
+        if self.length > 1:
+            if self.length > 8:
+                raise MetaBlockEncodingError("Span must be between 0 and 7 when has_span is True.")
+            value = (1 << 13) | ((self.length - 1) << 10)
+        else:
+            value = 0
+
+        value |= (self.polarity & 0b11) << 8
+        value |= (self.intensity & 0b111) << 5
+        value |= (self.context & 0b1) << 4
+        value |= (self.emotion & 0b111) << 1
+        value |= (self.reserved & 0b1)
+        return value
+
     def to_metablock(self) -> MetaBlock:
         """Convert annotation to its compact MetaBlock representation."""
         has_span = self.length > 1
@@ -77,7 +161,7 @@ class SentimentAnnotation:
         """Wrap MetaBlock in its inline representation."""
         block = self.to_metablock()
         span = TokenSpan(anchor=self.anchor, length=self.length)
-        marker = marker_config.format_marker(block.to_hex())
+        marker = marker_config.markers()[block.to_int()]
         return InlineMetaBlock(block=block, span=span, marker=marker)
 
 
@@ -95,29 +179,321 @@ class InlineEncoder:
         - Validates anchor indices
         - Injects inline markers at anchors
         - Produces encoded text safely
+
+    ``encode_stream`` does the same for chunked text sources with memory
+    bounded by the chunk size instead of the document size, and
+    ``encode_batch`` amortizes the per-call setup over many documents.
+
+    With ``preserve_layout=True`` markers are spliced into the original
+    text at token offsets instead of re-joining tokens with single
+    spaces, so newlines, tabs and repeated spaces survive encoding.
+    Tokenizers other than the whitespace ``Tokenizer`` (such as the
+    subword adapters in ``vibex.subword``) always take this path, so a
+    marker may land in front of a subword in the middle of a word;
+    ``encode_stream`` raises TypeError for them.
+
+    ``metrics`` (see ``vibex.metrics``) receives per-stage timings and
+    counters from ``encode``; leave it None for the uninstrumented path.
+
+    ``merge_policy`` ("strongest", "split" or "error", see
+    ``vibex.validation``) validates every field and span against the
+    document and resolves overlapping annotations before injection, so
+    each token gets at most one marker. ``encode_stream`` ignores it.
+
+    Thread safety: an encoder holds only immutable configuration, and the
+    marker tables it uses are built once and never mutated, so a single
+    instance may be shared by any number of threads, provided its
+    tokenizer and metrics sink are thread-safe (``Tokenizer``,
+    ``BPETokenizer`` and ``MetricsAggregator`` are). ``vibex.parallel``
+    runs batches on threads or processes.
     """
 
-    def __init__(self, tokenizer: Tokenizer, marker_config: InlineMarkerConfig | None = None) -> None:
+    def __init__(
+        self,
+        tokenizer: TokenizerProtocol,
+        marker_config: InlineMarkerConfig | None = None,
+        preserve_layout: bool = False,
+        metrics: MetricsSink | None = None,
+        merge_policy: str | None = None,
+    ) -> None:
+        if merge_policy is not None and merge_policy not in MERGE_POLICIES:
+            raise ValueError(f"merge_policy must be one of {', '.join(MERGE_POLICIES)}, got {merge_policy!r}.")
         self._tokenizer = tokenizer
         self._marker_config = marker_config or InlineMarkerConfig()
+        self._preserve_layout = preserve_layout or not isinstance(tokenizer, Tokenizer)
+        self._metrics = metrics
+        self._merge_policy = merge_policy
 
     def encode(self, text: str, annotations: Iterable[SentimentAnnotation]) -> str:
+        if self._metrics is not None:
+            return self._encode_instrumented(text, annotations, self._metrics)
+        return self._encode(text, annotations, self._marker_config.markers())
+
+    def encode_batch(
+        self,
+        texts: Sequence[str],
+        annotations_per_text: Sequence[Iterable[SentimentAnnotation]],
+        executor: Optional[Executor] = None,
+        parallel_threshold: int = 1024,
+        chunk_size: int = 256,
+    ) -> List[str]:
+        """
+        Encode many documents in one call.
+
+        The marker table is looked up once for the whole batch. When an
+        executor is given and the batch has at least ``parallel_threshold``
+        documents, it is split into ``chunk_size`` slices that run on the
+        executor; results keep the input order.
+        """
+        if len(texts) != len(annotations_per_text):
+            raise MetaBlockEncodingError(
+                f"Got {len(texts)} texts but {len(annotations_per_text)} annotation lists."
+            )
+
+        if executor is None or len(texts) < parallel_threshold:
+            markers = self._marker_config.markers()
+            return [self._encode(text, annotations, markers) for text, annotations in zip(texts, annotations_per_text)]
+
+        slices = [
+            (texts[start:start + chunk_size], [list(a) for a in annotations_per_text[start:start + chunk_size]])
+            for start in range(0, len(texts), chunk_size)
+        ]
+        return [encoded for chunk in executor.map(self._encode_slice, slices) for encoded in chunk]
+
+    def _encode_slice(self, batch: Tuple[Sequence[str], Sequence[Iterable[SentimentAnnotation]]]) -> List[str]:
+        texts, annotations_per_text = batch
+        return self.encode_batch(texts, annotations_per_text)
+
+    def _encode(self, text: str, annotations: Iterable[SentimentAnnotation], markers: Tuple[str, ...]) -> str:
+        if self._preserve_layout:
+            if self._merge_policy is not None:
+                annotations = normalize(annotations, len(self._tokenizer.spans(text)), self._merge_policy)
+            return self._splice(text, annotations, markers)
+
         tokens = self._tokenizer.tokenize(text)
-        inline_blocks = [annotation.to_inline_block(self._marker_config) for annotation in annotations]
+        if self._merge_policy is not None:
+            annotations = normalize(annotations, len(tokens), self._merge_policy)
+        return self._tokenizer.detokenize(self._inject_prefixes(tokens, self._prefixes(annotations, markers, len(tokens))))
 
-        # Basic validation: anchor must exist
-        for block in inline_blocks:
-            if block.span.anchor >= len(tokens):
+    @staticmethod
+    def _prefixes(annotations: Iterable[SentimentAnnotation], markers: Tuple[str, ...], token_count: int) -> Dict[int, str]:
+        """Marker run per anchor, validated against the token count."""
+        # A later annotation on the same anchor ends up in front, as with
+        # the original reverse-sorted injection.
+        prefixes: Dict[int, str] = {}
+        for annotation in annotations:
+            anchor = annotation.anchor
+            # Basic validation: anchor must exist
+            if anchor >= token_count:
                 raise MetaBlockEncodingError(
-                    f"Anchor index {block.span.anchor} is out of bounds for {len(tokens)} tokens."
+                    f"Anchor index {anchor} is out of bounds for {token_count} tokens."
                 )
+            prefixes[anchor] = markers[annotation.to_int()] + prefixes.get(anchor, "")
+        return prefixes
 
-        # Sort blocks by anchor descending (so injection won't shift later anchors)
-        inline_blocks.sort(key=lambda b: b.span.anchor, reverse=True)
+    @staticmethod
+    def _inject_prefixes(tokens: List[str], prefixes: Dict[int, str]) -> List[str]:
+        if not prefixes:
+            return tokens
 
         tokens_copy: List[str] = tokens[:]
-        for block in inline_blocks:
-            idx = block.span.anchor
-            tokens_copy[idx] = block.as_marker_payload() + tokens_copy[idx]
+        for idx, prefix in prefixes.items():
+            tokens_copy[idx] = prefix + tokens_copy[idx]
+        return tokens_copy
+
+    def _encode_instrumented(self, text: str, annotations: Iterable[SentimentAnnotation], metrics: MetricsSink) -> str:
+        """``_encode`` with per-stage timings and counters reported to ``metrics``."""
+        markers = self._marker_config.markers()
+        annotations = list(annotations)
+        try:
+            if self._preserve_layout:
+                if self._merge_policy is not None:
+                    start = perf_counter()
+                    annotations = normalize(annotations, len(self._tokenizer.spans(text)), self._merge_policy)
+                    metrics.observe("encode.normalize", perf_counter() - start)
+                start = perf_counter()
+                encoded = self._splice(text, annotations, markers)
+                metrics.observe("encode.splice", perf_counter() - start)
+            else:
+                start = perf_counter()
+                tokens = self._tokenizer.tokenize(text)
+                tokenized = perf_counter()
+                metrics.observe("encode.tokenize", tokenized - start)
+                if self._merge_policy is not None:
+                    annotations = normalize(annotations, len(tokens), self._merge_policy)
+                    normalized = perf_counter()
+                    metrics.observe("encode.normalize", normalized - tokenized)
+                    tokenized = normalized
+                injected = self._inject_prefixes(tokens, self._prefixes(annotations, markers, len(tokens)))
+                prefixed = perf_counter()
+                encoded = self._tokenizer.detokenize(injected)
+                metrics.observe("encode.inject", prefixed - tokenized)
+                metrics.observe("encode.detokenize", perf_counter() - prefixed)
+                metrics.increment("encode.tokens", len(tokens))
+        except MetaBlockEncodingError:
+            metrics.increment("encode.errors")
+            raise
+
+        metrics.increment("encode.documents")
+        metrics.increment("encode.markers", len(annotations))
+        metrics.increment("encode.bytes_in", len(text.encode("utf-8")))
+        metrics.increment("encode.bytes_out", len(encoded.encode("utf-8")))
+        return encoded
+
+    def _splice(self, text: str, annotations: Iterable[SentimentAnnotation], markers: Tuple[str, ...]) -> str:
+        """Insert markers at the start offset of their anchor token."""
+        prefixes: Dict[int, str] = {}
+        for annotation in annotations:
+            anchor = annotation.anchor
+            prefixes[anchor] = markers[annotation.to_int()] + prefixes.get(anchor, "")
+        return self._splice_prefixes(text, prefixes)
+
+    def _splice_prefixes(self, text: str, prefixes: Dict[int, str]) -> str:
+        """Insert each marker run at the start offset of its anchor token."""
+        if not prefixes:
+            return text
+
+        # Only walk the token offsets up to the last anchor.
+        last = max(prefixes)
+        starts: Dict[int, int] = {}
+        for index, (start, _) in enumerate(self._tokenizer.iter_spans(text)):
+            if index in prefixes:
+                starts[index] = start
+            if index == last:
+                break
+
+        for anchor in prefixes:
+            if anchor not in starts:
+                raise MetaBlockEncodingError(
+                    f"Anchor index {anchor} is out of bounds for {len(self._tokenizer.spans(text))} tokens."
+                )
+
+        out: List[str] = []
+        copied = 0
+        for anchor in sorted(starts):
+            start = starts[anchor]
+            out.append(text[copied:start])
+            out.append(prefixes[anchor])
+            copied = start
+        out.append(text[copied:])
+        return "".join(out)
+
+    def encode_codes(self, text: str, codes: Sequence[int], anchors: Sequence[int]) -> str:
+        """
+        Inject packed 14-bit codes, e.g. read from a sidecar, verbatim.
+
+        ``codes[i]`` is written in front of token ``anchors[i]``; codes
+        sharing an anchor keep their order, as ``decode`` reports them.
+        Unlike ``encode`` no SentimentAnnotation is built, so codes with no
+        annotation form (such as 0x2000, a one-token span with the span
+        flag set) survive unchanged. ``merge_policy`` does not apply.
+        """
+        if len(codes) != len(anchors):
+            raise MetaBlockEncodingError(f"Got {len(codes)} codes but {len(anchors)} anchors.")
+
+        markers = self._marker_config.markers()
+        prefixes: Dict[int, str] = {}
+        for code, anchor in zip(codes, anchors):
+            if not 0 <= code < METABLOCK_SPACE:
+                raise MetaBlockEncodingError(f"MetaBlock value out of range: {code}")
+            if anchor < 0:
+                raise MetaBlockEncodingError(f"Anchor index {anchor} is out of bounds.")
+            prefixes[anchor] = prefixes.get(anchor, "") + markers[code]
+
+        if self._preserve_layout:
+            return self._splice_prefixes(text, prefixes)
+
+        tokens = self._tokenizer.tokenize(text)
+        for anchor in prefixes:
+            if anchor >= len(tokens):
+                raise MetaBlockEncodingError(f"Anchor index {anchor} is out of bounds for {len(tokens)} tokens.")
+        return self._tokenizer.detokenize(self._inject_prefixes(tokens, prefixes))
+
+    def encode_stream(
+        self,
+        source: Union[IO[str], Iterable[str]],
+        annotations: Iterable[SentimentAnnotation],
+        chunk_size: int = 1 << 16,
+    ) -> Iterator[str]:
+        """
+        Encode a text stream chunk by chunk.
+
+        ``source`` is a text-mode file-like object or any iterable of
+        strings; ``annotations`` must be sorted by anchor. Markers are
+        spliced in front of their anchor token and the original whitespace
+        is kept. For single-space separated input the concatenated output
+        equals ``encode``.
+
+        Anchors are validated lazily: an out-of-order anchor raises
+        MetaBlockEncodingError when it is reached, and anchors past the end
+        of the text raise once the source is exhausted.
+
+        Streams count whitespace tokens, so any tokenizer other than
+        ``Tokenizer`` raises TypeError.
+        """
+        require_whitespace_tokenizer(self._tokenizer, "encode_stream")
+        return self._encode_stream(source, annotations, chunk_size)
+
+    def _encode_stream(
+        self,
+        source: Union[IO[str], Iterable[str]],
+        annotations: Iterable[SentimentAnnotation],
+        chunk_size: int,
+    ) -> Iterator[str]:
+        pending = iter(annotations)
+        next_annotation: Optional[SentimentAnnotation] = next(pending, None)
+        last_anchor = 0
+        tokens = 0
+
+        for piece in iter_whole_tokens(source, chunk_size):
+            piece_tokens = len(piece.split())
+            end = tokens + piece_tokens
+
+            # Group the annotations that fall into this piece by anchor.
+            groups: List[List[SentimentAnnotation]] = []
+            while next_annotation is not None and next_annotation.anchor < end:
+                anchor = next_annotation.anchor
+                if anchor < 0:
+                    raise MetaBlockEncodingError(f"Anchor index {anchor} is out of bounds.")
+                if anchor < last_anchor:
+                    raise MetaBlockEncodingError(
+                        f"Anchor index {anchor} is out of order: annotations must be sorted by anchor "
+                        f"(previous anchor was {last_anchor})."
+                    )
+                if groups and groups[-1][0].anchor == anchor:
+                    groups[-1].append(next_annotation)
+                else:
+                    groups.append([next_annotation])
+                last_anchor = anchor
+                next_annotation = next(pending, None)
+
+            yield self._inject(piece, groups, tokens) if groups else piece
+            tokens = end
+
+        if next_annotation is not None:
+            raise MetaBlockEncodingError(
+                f"Anchor index {next_annotation.anchor} is out of bounds for {tokens} tokens."
+            )
+
+    def _inject(self, piece: str, groups: List[List[SentimentAnnotation]], first_token: int) -> str:
+        """Splice the marker groups in front of their anchor tokens in ``piece``."""
+        out: List[str] = []
+        copied = 0
+        matches = TOKEN_PATTERN.finditer(piece)
+        index = first_token - 1
+
+        for group in groups:
+            anchor = group[0].anchor
+            while index < anchor:
+                match = next(matches)
+                index += 1
+            start = match.start()
+
+            out.append(piece[copied:start])
+            # Same order as encode(): later annotations end up in front.
+            markers = self._marker_config.markers()
+            out.extend(markers[annotation.to_int()] for annotation in reversed(group))
+            copied = start
 
-        return self._tokenizer.detokenize(tokens_copy)
+        out.append(piece[copied:])
+        return "".join(out)
@@ -1,9 +1,14 @@
 from __future__ import annotations
+import re
+from array import array
 from dataclasses import dataclass
-from typing import Optional
+from typing import TYPE_CHECKING, Any, Dict, Iterable, List, Optional, Tuple
 
 from .exceptions import MetaBlockEncodingError, MetaBlockDecodingError
 
+if TYPE_CHECKING:
+    from .inline_encoder import InlineMarkerConfig
+
 
 @dataclass(frozen=True)
 class MetaBlock:
@@ -34,6 +39,13 @@ class MetaBlock:
 
     def to_int(self) -> int:
         """Pack the MetaBlock fields into a 14-bit integer."""
+        value = _INT_BY_BLOCK.get(self)
+        if value is not None:
+            return value
+        return self._pack()
+
+    def _pack(self) -> int:
+        """Validate and pack the fields (slow path, used to build the tables)."""
         if self.has_span and (self.span is None or not (0 <= self.span <= 7)):
             raise MetaBlockEncodingError("Span must be between 0 and 7 when has_span is True.")
 
@@ -53,19 +65,37 @@ class MetaBlock:
 
     def to_hex(self) -> str:
         """Return the compact hexadecimal representation."""
-        return f"{self.to_int():04x}"
+        hex_str = _HEX_BY_BLOCK.get(self)
+        if hex_str is not None:
+            return hex_str
+        return f"{self._pack():04x}"
 
     # ---------------------------------------------------------
     # Decoding from hex
     # ---------------------------------------------------------
 
+    @classmethod
+    def from_int(cls, value: int) -> MetaBlock:
+        """Return the interned MetaBlock for a packed 14-bit integer."""
+        if not 0 <= value < METABLOCK_SPACE:
+            raise MetaBlockDecodingError(f"MetaBlock value out of range: {value}")
+        return BLOCK_BY_INT[value]
+
     @classmethod
     def from_hex(cls, hex_str: str) -> MetaBlock:
         """Create a MetaBlock from a compact hex string."""
-        try:
-            value = int(hex_str, 16)
-        except ValueError as exc:
-            raise MetaBlockDecodingError(f"Invalid hex payload: {hex_str}") from exc
+        block = _BLOCK_BY_HEX.get(hex_str)
+        if block is not None:
+            return block
+        return cls._unpack_hex(hex_str)
+
+    @classmethod
+    def _unpack_hex(cls, hex_str: str) -> MetaBlock:
+        """Parse a hex payload field by field (slow path for non-canonical input)."""
+        # int() would also accept whitespace, signs, underscores and "0x".
+        if _HEX_PAYLOAD.fullmatch(hex_str) is None:
+            raise MetaBlockDecodingError(f"Invalid hex payload: {hex_str}")
+        value = int(hex_str, 16)
 
         has_span = (value >> 13) & 0b1
         span = (value >> 10) & 0b111
@@ -93,6 +123,79 @@ class MetaBlock:
         )
 
 
+# ---------------------------------------------------------
+# Precomputed codec tables
+# ---------------------------------------------------------
+#
+# There are only 2^14 valid MetaBlocks, so every one of them is built once
+# at import time and shared. Decoding a canonical payload is then a single
+# dict lookup, and packing an interned block never re-validates its fields.
+
+METABLOCK_SPACE = 1 << 14
+
+
+def code_range_error(code: int) -> ValueError:
+    """ValueError for a packed code outside 0..METABLOCK_SPACE - 1."""
+    return ValueError(f"MetaBlock code {code} is outside 0..{METABLOCK_SPACE - 1}.")
+
+
+_HEX_PAYLOAD = re.compile(r"[0-9A-Fa-f]+")
+
+# Bit position and width mask of every field inside the packed 14-bit value.
+FIELD_LAYOUT: Dict[str, Tuple[int, int]] = {
+    "has_span": (13, 0b1),
+    "span": (10, 0b111),
+    "polarity": (8, 0b11),
+    "intensity": (5, 0b111),
+    "context": (4, 0b1),
+    "emotion": (1, 0b111),
+    "reserved": (0, 0b1),
+}
+
+
+def _build_block_table() -> Tuple[MetaBlock, ...]:
+    """
+    Build one MetaBlock per 14-bit value.
+
+    Values whose span bits are set while has_span is 0 decode to the same
+    block as their canonical form, so they share its instance.
+    """
+    table = []
+    for value in range(METABLOCK_SPACE):
+        has_span = bool(value >> 13)
+        if not has_span and value & 0x1C00:
+            table.append(table[value & ~0x1C00])
+            continue
+        table.append(
+            MetaBlock(
+                has_span=has_span,
+                span=(value >> 10) & 0b111 if has_span else None,
+                polarity=(value >> 8) & 0b11,
+                intensity=(value >> 5) & 0b111,
+                context=(value >> 4) & 0b1,
+                emotion=(value >> 1) & 0b111,
+                reserved=value & 0b1,
+            )
+        )
+    return tuple(table)
+
+
+# Interned block and canonical 4-digit hex payload of every 14-bit value;
+# index with a packed code instead of calling from_int/to_hex in hot loops.
+BLOCK_BY_INT: Tuple[MetaBlock, ...] = _build_block_table()
+HEX_BY_INT: Tuple[str, ...] = tuple(f"{value:04x}" for value in range(METABLOCK_SPACE))
+
+_BLOCK_BY_HEX: Dict[str, MetaBlock] = dict(zip(HEX_BY_INT, BLOCK_BY_INT))
+
+# Reverse tables only hold canonical values, so packing is deterministic.
+_INT_BY_BLOCK: Dict[MetaBlock, int] = {
+    block: value
+    for value, block in enumerate(BLOCK_BY_INT)
+    if block.has_span or not value & 0x1C00
+}
+_HEX_BY_BLOCK: Dict[MetaBlock, str] = {block: HEX_BY_INT[value] for block, value in _INT_BY_BLOCK.items()}
+
+
 # ---------------------------------------------------------
 # A helper class used by encoder/decoder
 # ---------------------------------------------------------
@@ -114,3 +217,167 @@ class InlineMetaBlock:
 
     def as_marker_payload(self) -> str:
         return self.marker
+
+
+# ---------------------------------------------------------
+# Columnar container for large block collections
+# ---------------------------------------------------------
+
+def require_numpy() -> Any:
+    """Import NumPy, or raise ImportError naming the optional extra."""
+    try:
+        import numpy
+    except ImportError as exc:  # pragma: no cover - depends on the environment
+        raise ImportError(
+            "NumPy is required for vectorized MetaBlock access. Install it with 'pip install vibe-x[numpy]'."
+        ) from exc
+    return numpy
+
+
+class MetaBlockArray:
+    """
+    Array-backed batch of MetaBlocks and their token spans.
+
+    Storage:
+        codes   : packed 14-bit values (uint16)
+        anchors : token index of every block (int32)
+        lengths : number of tokens covered (int32)
+
+    That is 10 bytes per span instead of three dataclasses and a marker
+    string. Field accessors (polarity, intensity, ...) return NumPy arrays
+    computed with bulk shifts and masks over the code buffer.
+
+    Note: while a NumPy view of a buffer is alive, the array cannot grow.
+    """
+
+    __slots__ = ("codes", "anchors", "lengths")
+
+    def __init__(
+        self,
+        codes: Iterable[int] = (),
+        anchors: Iterable[int] = (),
+        lengths: Iterable[int] = (),
+    ) -> None:
+        self.codes = array("H", codes)
+        self.anchors = array("i", anchors)
+        self.lengths = array("i", lengths)
+
+        if not len(self.codes) == len(self.anchors) == len(self.lengths):
+            raise ValueError("codes, anchors and lengths must have the same length.")
+
+    # ---------------------------------------------------------
+    # Container protocol
+    # ---------------------------------------------------------
+
+    def __len__(self) -> int:
+        return len(self.codes)
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, MetaBlockArray):
+            return NotImplemented
+        return self.codes == other.codes and self.anchors == other.anchors and self.lengths == other.lengths
+
+    def __repr__(self) -> str:
+        return f"MetaBlockArray(size={len(self)})"
+
+    @property
+    def nbytes(self) -> int:
+        """Size of the three buffers in bytes."""
+        return sum(buf.itemsize * len(buf) for buf in (self.codes, self.anchors, self.lengths))
+
+    def append(self, code: int, anchor: int, length: int) -> None:
+        self.codes.append(code)
+        self.anchors.append(anchor)
+        self.lengths.append(length)
+
+    def extend(self, other: MetaBlockArray) -> None:
+        self.codes.extend(other.codes)
+        self.anchors.extend(other.anchors)
+        self.lengths.extend(other.lengths)
+
+    def block(self, index: int) -> MetaBlock:
+        """Return the interned MetaBlock stored at ``index``."""
+        return BLOCK_BY_INT[self.codes[index]]
+
+    def token_span(self, index: int) -> TokenSpan:
+        return TokenSpan(anchor=self.anchors[index], length=self.lengths[index])
+
+    # ---------------------------------------------------------
+    # Conversion from / to InlineMetaBlock lists
+    # ---------------------------------------------------------
+
+    @classmethod
+    def from_inline_blocks(cls, blocks: Iterable[InlineMetaBlock]) -> MetaBlockArray:
+        result = cls()
+        for inline_block in blocks:
+            result.append(inline_block.block.to_int(), inline_block.span.anchor, inline_block.span.length)
+        return result
+
+    def to_inline_blocks(self, marker_config: InlineMarkerConfig | None = None) -> List[InlineMetaBlock]:
+        if marker_config is None:
+            from .inline_encoder import InlineMarkerConfig
+
+            marker_config = InlineMarkerConfig()
+
+        markers = marker_config.markers()
+        return [
+            InlineMetaBlock(
+                block=BLOCK_BY_INT[code],
+                span=TokenSpan(anchor=anchor, length=length),
+                marker=markers[code],
+            )
+            for code, anchor, length in zip(self.codes, self.anchors, self.lengths)
+        ]
+
+    # ---------------------------------------------------------
+    # Vectorized field access (NumPy)
+    # ---------------------------------------------------------
+
+    def codes_view(self) -> Any:
+        """Zero-copy uint16 NumPy view of the packed codes."""
+        numpy = require_numpy()
+        return numpy.frombuffer(self.codes, dtype=numpy.uint16)
+
+    def anchors_view(self) -> Any:
+        numpy = require_numpy()
+        return numpy.frombuffer(self.anchors, dtype=numpy.int32)
+
+    def lengths_view(self) -> Any:
+        numpy = require_numpy()
+        return numpy.frombuffer(self.lengths, dtype=numpy.int32)
+
+    def field(self, name: str) -> Any:
+        """Extract one SPICE-R field from every code as a uint16 array."""
+        try:
+            shift, mask = FIELD_LAYOUT[name]
+        except KeyError:
+            raise ValueError(f"Unknown MetaBlock field: {name}") from None
+        return (self.codes_view() >> shift) & mask
+
+    @property
+    def has_span(self) -> Any:
+        return self.field("has_span")
+
+    @property
+    def span(self) -> Any:
+        return self.field("span")
+
+    @property
+    def polarity(self) -> Any:
+        return self.field("polarity")
+
+    @property
+    def intensity(self) -> Any:
+        return self.field("intensity")
+
+    @property
+    def context(self) -> Any:
+        return self.field("context")
+
+    @property
+    def emotion(self) -> Any:
+        return self.field("emotion")
+
+    @property
+    def reserved(self) -> Any:
+        return self.field("reserved")
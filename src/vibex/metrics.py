@@ -0,0 +1,140 @@
+"""
+Opt-in instrumentation for the encoder and decoder.
+
+Pass a sink to ``InlineEncoder``/``InlineDecoder`` (``metrics=...``) to get
+per-stage timings and counters; the default ``None`` keeps the original
+code path, so uninstrumented calls pay nothing.
+
+Stages (seconds per call):
+    encode.tokenize, encode.normalize, encode.inject, encode.detokenize, encode.splice
+    decode.tokenize, decode.extract, decode.parse, decode.detokenize, decode.scan
+
+Counters:
+    {encode,decode}.documents, .tokens, .markers, .bytes_in, .bytes_out, .errors
+
+``encode.normalize`` is only reported with a ``merge_policy``, and
+``encode.markers`` then counts the annotations left after merging.
+
+Any object with ``observe`` and ``increment`` is a sink; ``MetricsAggregator``
+keeps everything in process and exports Prometheus text or JSON.
+"""
+
+from __future__ import annotations
+
+import json
+import threading
+from bisect import bisect_left
+from typing import Any, Dict, List, Protocol, Tuple, runtime_checkable
+
+# Upper bounds (seconds) of the exported latency histogram buckets.
+DEFAULT_BUCKETS: Tuple[float, ...] = (
+    1e-6, 5e-6, 1e-5, 5e-5, 1e-4, 5e-4, 1e-3, 5e-3, 1e-2, 5e-2, 0.1, 0.5, 1.0,
+)
+
+
+@runtime_checkable
+class MetricsSink(Protocol):
+    """Receives stage timings and counter increments."""
+
+    def observe(self, stage: str, seconds: float) -> None: ...
+
+    def increment(self, counter: str, amount: int = 1) -> None: ...
+
+
+# ---------------------------------------------------------
+# In-process aggregator
+# ---------------------------------------------------------
+
+class _Timer:
+    __slots__ = ("count", "total", "max", "buckets")
+
+    def __init__(self, bucket_count: int) -> None:
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.buckets = [0] * (bucket_count + 1)  # last one is +Inf
+
+
+class MetricsAggregator:
+    """
+    Thread-safe sink that accumulates timers and counters.
+
+    ``snapshot()`` returns a JSON-ready dict, ``to_json()`` its text and
+    ``to_prometheus()`` the text exposition format (counters as
+    ``<prefix>_<name>_total``, stage timers as one histogram labelled by
+    stage).
+    """
+
+    def __init__(self, buckets: Tuple[float, ...] = DEFAULT_BUCKETS) -> None:
+        self._buckets = tuple(sorted(buckets))
+        self._lock = threading.Lock()
+        self._timers: Dict[str, _Timer] = {}
+        self._counters: Dict[str, int] = {}
+
+    def observe(self, stage: str, seconds: float) -> None:
+        with self._lock:
+            timer = self._timers.get(stage)
+            if timer is None:
+                timer = self._timers[stage] = _Timer(len(self._buckets))
+            timer.count += 1
+            timer.total += seconds
+            if seconds > timer.max:
+                timer.max = seconds
+            timer.buckets[bisect_left(self._buckets, seconds)] += 1
+
+    def increment(self, counter: str, amount: int = 1) -> None:
+        with self._lock:
+            self._counters[counter] = self._counters.get(counter, 0) + amount
+
+    def reset(self) -> None:
+        with self._lock:
+            self._timers.clear()
+            self._counters.clear()
+
+    # ---------------------------------------------------------
+    # Export
+    # ---------------------------------------------------------
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "counters": dict(sorted(self._counters.items())),
+                "stages": {
+                    stage: {
+                        "count": timer.count,
+                        "sum_seconds": timer.total,
+                        "mean_seconds": timer.total / timer.count,
+                        "max_seconds": timer.max,
+                    }
+                    for stage, timer in sorted(self._timers.items())
+                },
+            }
+
+    def to_json(self) -> str:
+        return json.dumps(self.snapshot(), indent=2)
+
+    def to_prometheus(self, prefix: str = "vibex") -> str:
+        lines: List[str] = []
+        with self._lock:
+            for name, value in sorted(self._counters.items()):
+                metric = f"{prefix}_{_metric_name(name)}_total"
+                lines.append(f"# TYPE {metric} counter")
+                lines.append(f"{metric} {value}")
+
+            if self._timers:
+                metric = f"{prefix}_stage_seconds"
+                lines.append(f"# HELP {metric} Time spent per encode/decode stage.")
+                lines.append(f"# TYPE {metric} histogram")
+                for stage, timer in sorted(self._timers.items()):
+                    cumulative = 0
+                    for bound, hits in zip(self._buckets, timer.buckets):
+                        cumulative += hits
+                        lines.append(f'{metric}_bucket{{stage="{stage}",le="{bound:g}"}} {cumulative}')
+                    lines.append(f'{metric}_bucket{{stage="{stage}",le="+Inf"}} {timer.count}')
+                    lines.append(f'{metric}_sum{{stage="{stage}"}} {timer.total!r}')
+                    lines.append(f'{metric}_count{{stage="{stage}"}} {timer.count}')
+        return "\n".join(lines) + "\n"
+
+
+def _metric_name(name: str) -> str:
+    return "".join(char if char.isalnum() else "_" for char in name)
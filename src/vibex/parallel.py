@@ -0,0 +1,311 @@
+"""
+Multi-core batch encoding and decoding.
+
+``ParallelCodec`` runs ``encode_batch``/``decode_batch`` over a worker
+pool and chooses the backend at runtime:
+
+    thread  : on free-threaded CPython (3.13t and later, GIL disabled),
+              where pure-Python string work scales across threads
+    process : everywhere else; each worker packs its results into one
+              ``multiprocessing.shared_memory`` segment (offsets, codes,
+              anchors, lengths and UTF-8 text), and only the segment name
+              and sizes travel back through the pool, never lists of
+              strings or blocks
+
+Encoder and decoder instances hold only immutable configuration, so one
+instance can be shared by all threads (see their class docstrings). The
+process backend pickles them once per shard, so their tokenizer must be
+picklable; shared-memory segments are created by the workers and
+unlinked by the parent, which needs POSIX shared-memory semantics.
+"""
+
+from __future__ import annotations
+
+import os
+import sys
+from array import array
+from collections import deque
+from concurrent.futures import Executor, Future, ProcessPoolExecutor, ThreadPoolExecutor
+from multiprocessing import resource_tracker
+from multiprocessing.shared_memory import SharedMemory
+from typing import Any, Callable, Deque, Iterable, List, Optional, Sequence, Tuple
+
+from .exceptions import MetaBlockEncodingError
+from .inline_decoder import DecodedBatch, InlineDecoder
+from .inline_encoder import InlineEncoder, SentimentAnnotation
+from .metablock import MetaBlockArray
+
+BACKENDS = ("auto", "thread", "process")
+
+# anchor, length, polarity, intensity, context, emotion, reserved
+_ANNOTATION_FIELDS = 7
+
+
+def free_threaded() -> bool:
+    """True on a CPython build running with the GIL disabled."""
+    is_gil_enabled = getattr(sys, "_is_gil_enabled", None)
+    return is_gil_enabled is not None and not is_gil_enabled()
+
+
+# ---------------------------------------------------------
+# Shared-memory transport
+# ---------------------------------------------------------
+
+def _publish(parts: Sequence[bytes | array]) -> str:
+    """Copy ``parts`` back to back into a new segment owned by the reader."""
+    views = [memoryview(part).cast("B") for part in parts]
+    size = sum(view.nbytes for view in views)
+    try:
+        shm = SharedMemory(create=True, size=max(size, 1), track=False)
+    except TypeError:  # Python < 3.13: keep the creator's tracker from unlinking it
+        shm = SharedMemory(create=True, size=max(size, 1))
+        resource_tracker.unregister(shm._name, "shared_memory")  # type: ignore[attr-defined]
+
+    position = 0
+    for view in views:
+        shm.buf[position:position + view.nbytes] = view
+        position += view.nbytes
+    name = shm.name
+    shm.close()
+    return name
+
+
+def _consume(name: str, layout: Sequence[Tuple[str, int]]) -> List[array | bytes]:
+    """Read typed arrays (typecode "" for raw bytes) from a segment, then unlink it."""
+    shm = SharedMemory(name=name)
+    try:
+        parts: List[array | bytes] = []
+        position = 0
+        for typecode, count in layout:
+            if typecode:
+                part = array(typecode)
+                end = position + count * part.itemsize
+                part.frombytes(shm.buf[position:end])
+            else:
+                end = position + count
+                part = bytes(shm.buf[position:end])
+            parts.append(part)
+            position = end
+        return parts
+    finally:
+        shm.close()
+        shm.unlink()
+
+
+def _pack_texts(texts: Iterable[str]) -> Tuple[array, bytes]:
+    encoded = [text.encode("utf-8", "surrogatepass") for text in texts]
+    ends = array("Q")
+    total = 0
+    for chunk in encoded:
+        total += len(chunk)
+        ends.append(total)
+    return ends, b"".join(encoded)
+
+
+def _unpack_texts(ends: array, data: bytes) -> List[str]:
+    texts = []
+    start = 0
+    for end in ends:
+        texts.append(data[start:end].decode("utf-8", "surrogatepass"))
+        start = end
+    return texts
+
+
+# ---------------------------------------------------------
+# Process workers (module level so they can be pickled)
+# ---------------------------------------------------------
+
+def _decode_shard(args: Tuple[InlineDecoder, Sequence[str]]) -> Tuple[str, int, int, int]:
+    decoder, texts = args
+    batch = decoder.decode_batch(texts)
+    ends, data = _pack_texts(batch.clean_texts)
+    blocks = batch.blocks
+    name = _publish([batch.offsets, ends, blocks.anchors, blocks.lengths, blocks.codes, data])
+    return name, len(texts), len(blocks.codes), len(data)
+
+
+def _encode_shard(args: Tuple[InlineEncoder, Sequence[str], bytes, bytes]) -> Tuple[str, int, int]:
+    encoder, texts, raw_counts, raw_fields = args
+    counts, fields = array("I"), array("q")
+    counts.frombytes(raw_counts)
+    fields.frombytes(raw_fields)
+
+    annotations_per_text: List[List[SentimentAnnotation]] = []
+    position = 0
+    for count in counts:
+        end = position + count * _ANNOTATION_FIELDS
+        annotations_per_text.append([
+            SentimentAnnotation(*fields[start:start + _ANNOTATION_FIELDS])
+            for start in range(position, end, _ANNOTATION_FIELDS)
+        ])
+        position = end
+
+    ends, data = _pack_texts(encoder.encode_batch(texts, annotations_per_text))
+    return _publish([ends, data]), len(texts), len(data)
+
+
+def _map_shards(
+    executor: Executor,
+    func: Callable[[Any], Tuple],
+    shards: Iterable[Any],
+    collect: Callable[[Any], None],
+    max_in_flight: int,
+) -> None:
+    """
+    Run ``func`` over ``shards`` with at most ``max_in_flight`` tasks
+    submitted ahead and pass the results to ``collect`` in input order.
+    If anything fails, the segments of every shard still in flight are
+    unlinked before the error propagates.
+    """
+    pending: Deque[Future] = deque()
+    try:
+        for shard in shards:
+            pending.append(executor.submit(func, shard))
+            if len(pending) >= max_in_flight:
+                collect(pending.popleft().result())
+        while pending:
+            collect(pending.popleft().result())
+    finally:
+        for future in pending:
+            if future.exception() is None:
+                _consume(future.result()[0], [])
+
+
+# ---------------------------------------------------------
+# Parallel codec
+# ---------------------------------------------------------
+
+class ParallelCodec:
+    """
+    Batch encoder/decoder backed by a thread or process pool.
+
+    backend    : "auto" (threads when ``free_threaded()``, else processes),
+                 "thread" or "process"
+    workers    : pool size, default ``os.cpu_count()``; 1 runs inline
+    chunk_size : documents per task
+
+    Results are identical to ``InlineEncoder.encode_batch`` and
+    ``InlineDecoder.decode_batch`` and keep the input order. Use as a
+    context manager, or call ``close``, to shut the pool down.
+    """
+
+    def __init__(
+        self,
+        encoder: Optional[InlineEncoder] = None,
+        decoder: Optional[InlineDecoder] = None,
+        workers: Optional[int] = None,
+        backend: str = "auto",
+        chunk_size: int = 1024,
+    ) -> None:
+        if backend not in BACKENDS:
+            raise ValueError(f"backend must be one of {', '.join(BACKENDS)}, got {backend!r}.")
+        if backend == "auto":
+            backend = "thread" if free_threaded() else "process"
+
+        self._encoder = encoder
+        self._decoder = decoder
+        self._workers = workers or os.cpu_count() or 1
+        self._chunk_size = chunk_size
+        self.backend = backend
+
+        self._executor: Optional[Executor] = None
+        if self._workers > 1:
+            pool = ThreadPoolExecutor if backend == "thread" else ProcessPoolExecutor
+            self._executor = pool(max_workers=self._workers)
+
+    def __enter__(self) -> ParallelCodec:
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        self.close()
+
+    def close(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
+
+    # ---------------------------------------------------------
+    # Public API
+    # ---------------------------------------------------------
+
+    def decode_batch(self, texts: Sequence[str]) -> DecodedBatch:
+        if self._decoder is None:
+            raise ValueError("ParallelCodec was created without a decoder.")
+
+        if self._executor is None or self.backend == "thread":
+            return self._decoder.decode_batch(
+                texts, executor=self._executor, parallel_threshold=0, chunk_size=self._chunk_size
+            )
+
+        result = DecodedBatch(clean_texts=[], offsets=array("Q", [0]), blocks=MetaBlockArray())
+
+        def collect(shard: Tuple[str, int, int, int]) -> None:
+            name, documents, blocks, text_bytes = shard
+            offsets, ends, anchors, lengths, codes, data = _consume(name, [
+                ("Q", documents + 1), ("Q", documents), ("i", blocks), ("i", blocks), ("H", blocks), ("", text_bytes),
+            ])
+            part = MetaBlockArray()
+            part.codes, part.anchors, part.lengths = codes, anchors, lengths
+            result.extend(DecodedBatch(clean_texts=_unpack_texts(ends, data), offsets=offsets, blocks=part))
+
+        shards = ((self._decoder, texts[start:start + self._chunk_size]) for start in self._starts(texts))
+        _map_shards(self._executor, _decode_shard, shards, collect, 2 * self._workers)
+        return result
+
+    def encode_batch(
+        self,
+        texts: Sequence[str],
+        annotations_per_text: Sequence[Iterable[SentimentAnnotation]],
+    ) -> List[str]:
+        if self._encoder is None:
+            raise ValueError("ParallelCodec was created without an encoder.")
+        if len(texts) != len(annotations_per_text):
+            raise MetaBlockEncodingError(
+                f"Got {len(texts)} texts but {len(annotations_per_text)} annotation lists."
+            )
+
+        if self._executor is None or self.backend == "thread":
+            return self._encoder.encode_batch(
+                texts, annotations_per_text, executor=self._executor, parallel_threshold=0, chunk_size=self._chunk_size
+            )
+
+        results: List[str] = []
+
+        def collect(shard: Tuple[str, int, int]) -> None:
+            name, documents, text_bytes = shard
+            ends, data = _consume(name, [("Q", documents), ("", text_bytes)])
+            results.extend(_unpack_texts(ends, data))
+
+        encoder = self._encoder
+        shards = (
+            (encoder, texts[start:start + self._chunk_size])
+            + self._pack_annotations(annotations_per_text[start:start + self._chunk_size])
+            for start in self._starts(texts)
+        )
+        _map_shards(self._executor, _encode_shard, shards, collect, 2 * self._workers)
+        return results
+
+    # ---------------------------------------------------------
+    # INTERNAL
+    # ---------------------------------------------------------
+
+    def _starts(self, texts: Sequence[str]) -> range:
+        return range(0, len(texts), self._chunk_size)
+
+    @staticmethod
+    def _pack_annotations(annotations_per_text: Sequence[Iterable[SentimentAnnotation]]) -> Tuple[bytes, bytes]:
+        """
+        Annotations of one shard as packed counts and raw field rows.
+        Fields are shipped as given (not as packed codes), so the worker
+        validates and masks them exactly as a serial encode would.
+        """
+        counts, fields = array("I"), array("q")
+        for annotations in annotations_per_text:
+            before = len(fields)
+            for annotation in annotations:
+                fields.extend((
+                    annotation.anchor, annotation.length, annotation.polarity, annotation.intensity,
+                    annotation.context, annotation.emotion, annotation.reserved,
+                ))
+            counts.append((len(fields) - before) // _ANNOTATION_FIELDS)
+        return counts.tobytes(), fields.tobytes()
@@ -0,0 +1,166 @@
+"""
+Incremental re-annotation of already-encoded text.
+
+``InlinePatcher`` applies an ``AnnotationDiff`` (blocks to add, anchors to
+clear, anchors whose blocks are replaced) to an encoded string. Only the
+marker runs in front of the affected tokens are rewritten; every other
+character of the document is copied through unchanged, so a handful of
+re-scored spans costs one scan up to the last touched anchor instead of a
+full decode and re-encode.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Tuple
+
+from .exceptions import MetaBlockEncodingError
+from .inline_decoder import InlineDecoder
+from .inline_encoder import InlineEncoder, InlineMarkerConfig, SentimentAnnotation
+from .tokenizer import TOKEN_PATTERN, Tokenizer, TokenizerProtocol
+
+
+# ---------------------------------------------------------
+# Diff structure
+# ---------------------------------------------------------
+
+@dataclass(frozen=True)
+class AnnotationDiff:
+    """
+    Changes to the annotations of one encoded document.
+
+    add     : annotations to insert; existing blocks at the anchor are kept
+    remove  : anchors whose blocks are all dropped
+    replace : annotations that become the only blocks at their anchors
+    """
+
+    add: Tuple[SentimentAnnotation, ...] = ()
+    remove: Tuple[int, ...] = ()
+    replace: Tuple[SentimentAnnotation, ...] = ()
+
+    def __bool__(self) -> bool:
+        return bool(self.add or self.remove or self.replace)
+
+    def anchors(self) -> List[int]:
+        """Sorted anchors touched by this diff."""
+        touched = {a.anchor for a in self.add}
+        touched.update(self.remove)
+        touched.update(a.anchor for a in self.replace)
+        return sorted(touched)
+
+
+# ---------------------------------------------------------
+# Patcher
+# ---------------------------------------------------------
+
+class InlinePatcher:
+    """
+    Rewrites the marker runs of individual tokens in encoded text.
+
+    With the whitespace ``Tokenizer`` the markers of token ``i`` are the
+    run at the start of the i-th whitespace-separated token of the encoded
+    string, so they are located without decoding. Markers are ordered as
+    ``InlineEncoder`` would write them: added blocks go in front of the
+    ones already present, and a later annotation on the same anchor goes
+    in front of an earlier one.
+
+    Other tokenizers (``vibex.subword``) anchor markers by offsets in the
+    clean text; for those the document is decoded, edited and re-encoded.
+    """
+
+    def __init__(self, tokenizer: TokenizerProtocol, marker_config: InlineMarkerConfig | None = None) -> None:
+        self._tokenizer = tokenizer
+        self._marker_config = marker_config or InlineMarkerConfig()
+
+    def apply(self, encoded: str, diff: AnnotationDiff) -> str:
+        if not diff:
+            return encoded
+        if not isinstance(self._tokenizer, Tokenizer):
+            return self._reencode(encoded, diff)
+
+        markers = self._marker_config.markers()
+        added = self._group(diff.add, markers)
+        replaced = self._group(diff.replace, markers)
+        removed = set(diff.remove)
+        touched = diff.anchors()
+
+        prefix = self._marker_config.prefix
+        suffix = self._marker_config.suffix
+        compact_base = self._marker_config.compact_base
+
+        out: List[str] = []
+        copied = 0
+        pending = iter(touched)
+        target = next(pending)
+
+        for index, match in enumerate(TOKEN_PATTERN.finditer(encoded)):
+            if index != target:
+                continue
+
+            token = match.group()
+            _, clean = InlineDecoder.extract_markers(token, prefix, suffix, compact_base)
+            start = match.start()
+            run_end = start + len(token) - len(clean)
+
+            if index in replaced:
+                run = replaced[index]
+            elif index in removed:
+                run = ""
+            else:
+                run = encoded[start:run_end]
+            run = added.get(index, "") + run
+
+            out.append(encoded[copied:start])
+            out.append(run)
+            copied = run_end
+
+            target = next(pending, None)
+            if target is None:
+                break
+
+        if target is not None:
+            count = len(encoded.split())
+            raise MetaBlockEncodingError(f"Anchor index {target} is out of bounds for {count} tokens.")
+
+        out.append(encoded[copied:])
+        return "".join(out)
+
+    def apply_batch(self, texts: Iterable[str], diffs: Iterable[AnnotationDiff]) -> List[str]:
+        return [self.apply(text, diff) for text, diff in zip(texts, diffs)]
+
+    # ---------------------------------------------------------
+    # INTERNAL
+    # ---------------------------------------------------------
+
+    @staticmethod
+    def _group(annotations: Iterable[SentimentAnnotation], markers: Tuple[str, ...]) -> Dict[int, str]:
+        runs: Dict[int, str] = {}
+        for annotation in annotations:
+            anchor = annotation.anchor
+            runs[anchor] = markers[annotation.to_int()] + runs.get(anchor, "")
+        return runs
+
+    def _reencode(self, encoded: str, diff: AnnotationDiff) -> str:
+        decoded = InlineDecoder(self._tokenizer, self._marker_config).decode_lazy(encoded)
+
+        # Per-anchor code runs in text order. Kept blocks are copied as
+        # packed codes so non-canonical ones survive, and the diff is
+        # applied with the same ordering rules as the whitespace path.
+        runs: Dict[int, List[int]] = {}
+        for code, anchor in zip(decoded.codes, decoded.anchors):
+            runs.setdefault(anchor, []).append(code)
+        for anchor in diff.remove:
+            runs.pop(anchor, None)
+        replaced: Dict[int, List[int]] = {}
+        for annotation in diff.replace:
+            replaced.setdefault(annotation.anchor, []).insert(0, annotation.to_int())
+        runs.update(replaced)
+        for annotation in diff.add:
+            runs.setdefault(annotation.anchor, []).insert(0, annotation.to_int())
+
+        codes: List[int] = []
+        anchors: List[int] = []
+        for anchor in sorted(runs):
+            codes.extend(runs[anchor])
+            anchors.extend([anchor] * len(runs[anchor]))
+        return InlineEncoder(self._tokenizer, self._marker_config).encode_codes(decoded.clean_text, codes, anchors)
@@ -0,0 +1,441 @@
+"""
+Bitmask predicate queries over packed MetaBlocks.
+
+Predicates are built from field comparisons, either in Python::
+
+    from vibex.query import NEG, context, intensity, polarity
+    negative_irony = (polarity == NEG) & (intensity >= 5) & (context == 1)
+
+or from the string form, where ``&`` binds looser than comparisons::
+
+    negative_irony = parse("polarity == NEG & intensity >= 5 & context == 1")
+
+Every predicate compiles to the set of 14-bit codes it accepts, kept as a
+16384-bit integer. Comparisons OR together precomputed per-value bitsets,
+``&``/``|``/``~`` are single big-integer operations, and evaluating a code
+is one table lookup, so compiling and running a query never touches
+MetaBlock attributes.
+"""
+
+from __future__ import annotations
+
+import operator
+import re
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Tuple, TypeVar, Union
+
+from .exceptions import QuerySyntaxError
+from .metablock import (
+    FIELD_LAYOUT,
+    METABLOCK_SPACE,
+    InlineMetaBlock,
+    MetaBlock,
+    MetaBlockArray,
+    code_range_error,
+    require_numpy,
+)
+
+T = TypeVar("T")
+
+
+# ---------------------------------------------------------
+# Named values
+# ---------------------------------------------------------
+
+NEUTRAL = 0
+NEG = 1
+POS = 2
+IRONIC = 3
+
+CONSTANTS: Dict[str, int] = {
+    "NEUTRAL": NEUTRAL,
+    "NEG": NEG,
+    "NEGATIVE": NEG,
+    "POS": POS,
+    "POSITIVE": POS,
+    "IRONIC": IRONIC,
+    "FALSE": 0,
+    "TRUE": 1,
+}
+
+_ALL_CODES = (1 << METABLOCK_SPACE) - 1
+
+
+def _value_bitsets(shift: int, mask: int) -> Tuple[int, ...]:
+    """
+    For each value of a field, the bitset of codes holding that value.
+
+    A value occupies a run of 2^shift consecutive codes that repeats every
+    2^(shift + width) codes, so each bitset is one run times a repeat
+    pattern (a 1 at every period), with no carries between runs.
+    """
+    period = (mask + 1) << shift
+    repeat = _ALL_CODES // ((1 << period) - 1)
+    run = (1 << (1 << shift)) - 1
+    return tuple(repeat * (run << (value << shift)) for value in range(mask + 1))
+
+
+# field name -> bitset of codes for every value of that field
+FIELD_BITSETS: Dict[str, Tuple[int, ...]] = {
+    name: _value_bitsets(shift, mask) for name, (shift, mask) in FIELD_LAYOUT.items()
+}
+
+# comparison operator of the query language -> its Python function
+OPERATORS: Dict[str, Callable[[int, int], bool]] = {
+    "==": operator.eq,
+    "!=": operator.ne,
+    "<": operator.lt,
+    "<=": operator.le,
+    ">": operator.gt,
+    ">=": operator.ge,
+}
+
+
+# ---------------------------------------------------------
+# Predicate tree
+# ---------------------------------------------------------
+
+class Predicate(ABC):
+    """Base class of the predicate tree; combine with ``&``, ``|`` and ``~``."""
+
+    @abstractmethod
+    def bitset(self) -> int:
+        """The codes accepted by this predicate, as a 16384-bit integer."""
+
+    def compile(self) -> CompiledQuery:
+        return _compile(self)
+
+    def __and__(self, other: Predicate) -> Predicate:
+        return And(self, other)
+
+    def __or__(self, other: Predicate) -> Predicate:
+        return Or(self, other)
+
+    def __invert__(self) -> Predicate:
+        return Not(self)
+
+
+@dataclass(frozen=True)
+class Comparison(Predicate):
+    field: str
+    op: str
+    value: int
+
+    def bitset(self) -> int:
+        compare = OPERATORS[self.op]
+        bits = 0
+        for field_value, field_bits in enumerate(FIELD_BITSETS[self.field]):
+            if compare(field_value, self.value):
+                bits |= field_bits
+        return bits
+
+    def __str__(self) -> str:
+        return f"{self.field} {self.op} {self.value}"
+
+
+@dataclass(frozen=True)
+class And(Predicate):
+    left: Predicate
+    right: Predicate
+
+    def bitset(self) -> int:
+        return self.left.bitset() & self.right.bitset()
+
+    def __str__(self) -> str:
+        return f"({self.left} & {self.right})"
+
+
+@dataclass(frozen=True)
+class Or(Predicate):
+    left: Predicate
+    right: Predicate
+
+    def bitset(self) -> int:
+        return self.left.bitset() | self.right.bitset()
+
+    def __str__(self) -> str:
+        return f"({self.left} | {self.right})"
+
+
+@dataclass(frozen=True)
+class Not(Predicate):
+    operand: Predicate
+
+    def bitset(self) -> int:
+        return _ALL_CODES ^ self.operand.bitset()
+
+    def __str__(self) -> str:
+        return f"~{self.operand}"
+
+
+class Field:
+    """A MetaBlock field; comparing it with an int yields a Comparison."""
+
+    def __init__(self, name: str) -> None:
+        if name not in FIELD_LAYOUT:
+            raise ValueError(f"Unknown MetaBlock field: {name}")
+        self.name = name
+
+    def __repr__(self) -> str:
+        return f"Field({self.name!r})"
+
+    __hash__ = object.__hash__
+
+    def __eq__(self, value: int) -> Comparison:  # type: ignore[override]
+        return Comparison(self.name, "==", value)
+
+    def __ne__(self, value: int) -> Comparison:  # type: ignore[override]
+        return Comparison(self.name, "!=", value)
+
+    def __lt__(self, value: int) -> Comparison:
+        return Comparison(self.name, "<", value)
+
+    def __le__(self, value: int) -> Comparison:
+        return Comparison(self.name, "<=", value)
+
+    def __gt__(self, value: int) -> Comparison:
+        return Comparison(self.name, ">", value)
+
+    def __ge__(self, value: int) -> Comparison:
+        return Comparison(self.name, ">=", value)
+
+
+has_span = Field("has_span")
+span = Field("span")
+polarity = Field("polarity")
+intensity = Field("intensity")
+context = Field("context")
+emotion = Field("emotion")
+reserved = Field("reserved")
+
+
+# ---------------------------------------------------------
+# Compiled form
+# ---------------------------------------------------------
+
+# Byte i of _EXPAND[b] is bit i of b, to unpack bitsets into lookup tables.
+_EXPAND: Tuple[bytes, ...] = tuple(bytes((b >> i) & 1 for i in range(8)) for b in range(256))
+
+
+class CompiledQuery:
+    """
+    A predicate compiled to its accepted code set.
+
+    ``table[code]`` is 1 for matching codes; ``bits`` holds the same set as
+    a 16384-bit integer for combining or indexing.
+    """
+
+    __slots__ = ("predicate", "bits", "table", "_numpy_table")
+
+    def __init__(self, predicate: Predicate) -> None:
+        self.predicate = predicate
+        self.bits = predicate.bitset()
+        packed = self.bits.to_bytes(METABLOCK_SPACE // 8, "little")
+        self.table = b"".join(_EXPAND[byte] for byte in packed)
+        self._numpy_table: Any = None
+
+    def __repr__(self) -> str:
+        return f"CompiledQuery({self.predicate}, codes={self.cardinality})"
+
+    @property
+    def cardinality(self) -> int:
+        """Number of distinct 14-bit codes that match."""
+        return self.bits.bit_count()
+
+    def codes(self) -> List[int]:
+        """All matching codes in ascending order."""
+        return [code for code, hit in enumerate(self.table) if hit]
+
+    # ---------------------------------------------------------
+    # Single values
+    # ---------------------------------------------------------
+
+    def matches(self, item: Union[int, MetaBlock, InlineMetaBlock]) -> bool:
+        """Codes outside 0..16383 raise ValueError, as in ``mask``."""
+        if isinstance(item, InlineMetaBlock):
+            item = item.block
+        if isinstance(item, MetaBlock):
+            item = item.to_int()
+        if not 0 <= item < METABLOCK_SPACE:
+            raise code_range_error(item)
+        return bool(self.table[item])
+
+    def filter(self, items: Iterable[T]) -> List[T]:
+        """Keep the codes, MetaBlocks or InlineMetaBlocks that match."""
+        return [item for item in items if self.matches(item)]  # type: ignore[arg-type]
+
+    # ---------------------------------------------------------
+    # Arrays of packed codes
+    # ---------------------------------------------------------
+
+    def select(self, codes: Union[MetaBlockArray, Iterable[int]]) -> List[int]:
+        """Indices of the matching entries of a code sequence."""
+        if isinstance(codes, MetaBlockArray):
+            codes = codes.codes
+        table = self.table
+        return [index for index, code in enumerate(codes) if table[code]]
+
+    def mask(self, codes: Any) -> Any:
+        """
+        Boolean NumPy mask over an array (or MetaBlockArray) of codes.
+
+        Codes outside 0..16383 raise ValueError, as in ``matches``.
+        """
+        numpy = require_numpy()
+        if self._numpy_table is None:
+            self._numpy_table = numpy.frombuffer(self.table, dtype=numpy.bool_)
+        if isinstance(codes, MetaBlockArray):
+            codes = codes.codes_view()
+        codes = numpy.asarray(codes)
+        if codes.size:
+            low, high = int(codes.min()), int(codes.max())
+            if low < 0 or high >= METABLOCK_SPACE:
+                raise code_range_error(low if low < 0 else high)
+        return self._numpy_table[codes]
+
+    def count(self, codes: Union[MetaBlockArray, Iterable[int]]) -> int:
+        if isinstance(codes, MetaBlockArray):
+            codes = codes.codes
+        table = self.table
+        return sum(table[code] for code in codes)
+
+    # ---------------------------------------------------------
+    # Sidecar files
+    # ---------------------------------------------------------
+
+    def search(self, reader: Any) -> Iterator[Tuple[int, int]]:
+        """Yield (document, block index) for every matching block of a SidecarReader."""
+        table = self.table
+        for doc in range(len(reader)):
+            codes = reader.codes(doc)
+            hits = [index for index, code in enumerate(codes) if table[code]]
+            if isinstance(codes, memoryview):
+                codes.release()
+            for index in hits:
+                yield doc, index
+
+    def documents(self, reader: Any) -> Iterator[int]:
+        """Yield the documents of a SidecarReader with at least one matching block."""
+        table = self.table
+        for doc in range(len(reader)):
+            codes = reader.codes(doc)
+            hit = any(table[code] for code in codes)
+            if isinstance(codes, memoryview):
+                codes.release()
+            if hit:
+                yield doc
+
+
+@lru_cache(maxsize=1024)
+def _compile(predicate: Predicate) -> CompiledQuery:
+    return CompiledQuery(predicate)
+
+
+# ---------------------------------------------------------
+# String form
+# ---------------------------------------------------------
+
+_TOKEN = re.compile(r"\s*(?:(==|!=|<=|>=|=|<|>|&&?|\|\|?|!|~|\(|\))|(\d+)|([A-Za-z_]\w*))")
+
+_KEYWORDS = {"and": "&", "or": "|", "not": "!"}
+
+
+def _lex(expression: str) -> List[str]:
+    tokens: List[str] = []
+    pos = 0
+    expression = expression.rstrip()
+    while pos < len(expression):
+        match = _TOKEN.match(expression, pos)
+        if match is None:
+            raise QuerySyntaxError(f"Unexpected character at {pos}: {expression[pos:]!r}")
+        symbol, number, name = match.groups()
+        if symbol:
+            tokens.append({"=": "==", "&&": "&", "||": "|", "~": "!"}.get(symbol, symbol))
+        elif number:
+            tokens.append(number)
+        else:
+            tokens.append(_KEYWORDS.get(name.lower(), name))
+        pos = match.end()
+    return tokens
+
+
+class _Parser:
+    """Recursive-descent parser: or := and ('|' and)*, and := unary ('&' unary)*."""
+
+    def __init__(self, expression: str) -> None:
+        self.expression = expression
+        self.tokens = _lex(expression)
+        self.pos = 0
+
+    def peek(self) -> str | None:
+        return self.tokens[self.pos] if self.pos < len(self.tokens) else None
+
+    def take(self) -> str:
+        token = self.peek()
+        if token is None:
+            raise QuerySyntaxError(f"Unexpected end of query: {self.expression!r}")
+        self.pos += 1
+        return token
+
+    def parse(self) -> Predicate:
+        predicate = self.parse_or()
+        if self.peek() is not None:
+            raise QuerySyntaxError(f"Unexpected token {self.peek()!r} in query: {self.expression!r}")
+        return predicate
+
+    def parse_or(self) -> Predicate:
+        predicate = self.parse_and()
+        while self.peek() == "|":
+            self.take()
+            predicate = Or(predicate, self.parse_and())
+        return predicate
+
+    def parse_and(self) -> Predicate:
+        predicate = self.parse_unary()
+        while self.peek() == "&":
+            self.take()
+            predicate = And(predicate, self.parse_unary())
+        return predicate
+
+    def parse_unary(self) -> Predicate:
+        token = self.take()
+        if token == "!":
+            return Not(self.parse_unary())
+        if token == "(":
+            predicate = self.parse_or()
+            if self.take() != ")":
+                raise QuerySyntaxError(f"Missing ')' in query: {self.expression!r}")
+            return predicate
+        if token not in FIELD_LAYOUT:
+            raise QuerySyntaxError(f"Unknown field {token!r} in query: {self.expression!r}")
+
+        if self.peek() not in OPERATORS:
+            # A bare field name means "field is set".
+            return Comparison(token, "!=", 0)
+
+        op = self.take()
+        return Comparison(token, op, self.parse_value())
+
+    def parse_value(self) -> int:
+        token = self.take()
+        if token.isdigit():
+            return int(token)
+        try:
+            return CONSTANTS[token.upper()]
+        except KeyError:
+            raise QuerySyntaxError(f"Unknown value {token!r} in query: {self.expression!r}") from None
+
+
+@lru_cache(maxsize=1024)
+def parse(expression: str) -> Predicate:
+    """Parse a query such as ``"polarity == NEG & intensity >= 5 & context"``."""
+    return _Parser(expression).parse()
+
+
+def compile_query(query: Union[str, Predicate]) -> CompiledQuery:
+    """Compile (and cache) a query string or Predicate."""
+    if isinstance(query, str):
+        query = parse(query)
+    return _compile(query)
@@ -0,0 +1,270 @@
+from __future__ import annotations
+
+import mmap
+import os
+import struct
+import sys
+from array import array
+from typing import IO, Any, Iterable, Iterator, List, Union
+
+from .exceptions import MetaBlockEncodingError, SidecarFormatError
+from .inline_encoder import InlineMarkerConfig
+from .metablock import InlineMetaBlock, MetaBlockArray, require_numpy
+
+
+# ---------------------------------------------------------
+# Binary layout (all integers little-endian)
+# ---------------------------------------------------------
+#
+#   Header (32 bytes)
+#       magic       4s   b"VXSC"
+#       version     u16
+#       flags       u16  (0, reserved)
+#       doc_count   u64
+#       table_off   u64  offset of the document offset table
+#       reserved    u64
+#
+#   Document records, each starting on an 8-byte boundary
+#       count       u32  number of MetaBlocks
+#       codes       count x u16, packed 14-bit values
+#       padding     to a 4-byte boundary
+#       anchors     count zigzag-varints, each the delta to the previous anchor
+#
+#   Offset table
+#       (doc_count + 1) x u64 record start offsets; the last entry is the
+#       end of the final record, so the table itself is never scanned.
+#
+# Span lengths are not stored: they are implied by the span bits of each
+# code (length = 1 + span), exactly as in inline markers.
+
+SIDECAR_MAGIC = b"VXSC"
+SIDECAR_VERSION = 1
+
+_HEADER = struct.Struct("<4sHHQQQ")
+_COUNT = struct.Struct("<I")
+_OFFSET = struct.Struct("<Q")
+
+_LITTLE_ENDIAN = sys.byteorder == "little"
+
+PathLike = Union[str, "os.PathLike[str]"]
+
+
+def _padding(offset: int, alignment: int) -> int:
+    return -offset % alignment
+
+
+def encode_anchors(anchors: Iterable[int]) -> bytes:
+    """Anchors as zigzag varints of the delta to the previous anchor."""
+    out = bytearray()
+    previous = 0
+    for anchor in anchors:
+        delta = anchor - previous
+        previous = anchor
+        value = (delta << 1) ^ (delta >> 63)  # zigzag: small negatives stay small
+        while value > 0x7F:
+            out.append((value & 0x7F) | 0x80)
+            value >>= 7
+        out.append(value)
+    return bytes(out)
+
+
+def decode_anchors(buffer: Any, offset: int, count: int) -> array:
+    """Read ``count`` anchors written by ``encode_anchors`` from ``buffer[offset:]``."""
+    anchors = array("i")
+    previous = 0
+    for _ in range(count):
+        value = 0
+        shift = 0
+        while True:
+            try:
+                byte = buffer[offset]
+            except IndexError:
+                raise SidecarFormatError("Truncated anchor varint in sidecar record.") from None
+            offset += 1
+            value |= (byte & 0x7F) << shift
+            if byte < 0x80:
+                break
+            shift += 7
+        previous += (value >> 1) ^ -(value & 1)
+        anchors.append(previous)
+    return anchors
+
+
+# ---------------------------------------------------------
+# Writer
+# ---------------------------------------------------------
+
+class SidecarWriter:
+    """
+    Writes documents to a binary sidecar file, one record per document.
+
+    Records are appended as they arrive; the offset table and the header
+    are finalized by ``close`` (or on leaving a ``with`` block).
+    """
+
+    def __init__(self, path: PathLike) -> None:
+        self._file: IO[bytes] = open(path, "wb")
+        self._offsets: array = array("Q")
+        self._position = _HEADER.size
+        self._file.write(bytes(_HEADER.size))
+
+    def __enter__(self) -> SidecarWriter:
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        self.close()
+
+    def __len__(self) -> int:
+        return len(self._offsets)
+
+    def write(self, blocks: Union[MetaBlockArray, Iterable[InlineMetaBlock]]) -> int:
+        """Append one document and return its index in the sidecar."""
+        if not isinstance(blocks, MetaBlockArray):
+            blocks = MetaBlockArray.from_inline_blocks(blocks)
+        return self.write_codes(blocks.codes, blocks.anchors)
+
+    def write_codes(self, codes: Iterable[int], anchors: Iterable[int]) -> int:
+        """Append one document given its packed codes and token anchors."""
+        codes = array("H", codes)
+        anchors = list(anchors)
+        if len(codes) != len(anchors):
+            raise MetaBlockEncodingError("codes and anchors must have the same length.")
+
+        if not _LITTLE_ENDIAN:
+            codes.byteswap()
+
+        record = bytearray(_COUNT.pack(len(codes)))
+        record += codes.tobytes()
+        record += bytes(_padding(len(record), 4))
+        record += encode_anchors(anchors)
+        record += bytes(_padding(len(record), 8))
+
+        self._offsets.append(self._position)
+        self._file.write(record)
+        self._position += len(record)
+        return len(self._offsets) - 1
+
+    def close(self) -> None:
+        if self._file.closed:
+            return
+
+        table = array("Q", self._offsets)
+        table.append(self._position)
+        if not _LITTLE_ENDIAN:
+            table.byteswap()
+        self._file.write(table.tobytes())
+
+        self._file.seek(0)
+        self._file.write(
+            _HEADER.pack(SIDECAR_MAGIC, SIDECAR_VERSION, 0, len(self._offsets), self._position, 0)
+        )
+        self._file.close()
+
+
+# ---------------------------------------------------------
+# Reader
+# ---------------------------------------------------------
+
+class SidecarReader:
+    """
+    Memory-mapped, random-access reader for binary sidecar files.
+
+    Opening a sidecar only validates the header; every document is located
+    through the offset table in O(1), and its codes are handed out as
+    zero-copy ``memoryview``/NumPy views into the mapping. Views must be
+    released before the reader is closed.
+    """
+
+    def __init__(self, path: PathLike) -> None:
+        with open(path, "rb") as handle:
+            # mmap cannot map an empty file, so check the size first.
+            if os.fstat(handle.fileno()).st_size < _HEADER.size:
+                raise SidecarFormatError("File is too small to be a VIBE-X sidecar.")
+            self._mmap = mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ)
+
+        magic, version, _flags, doc_count, table_offset, _ = _HEADER.unpack_from(self._mmap, 0)
+        if magic != SIDECAR_MAGIC:
+            self._mmap.close()
+            raise SidecarFormatError(f"Bad sidecar magic: {magic!r}")
+        if version != SIDECAR_VERSION:
+            self._mmap.close()
+            raise SidecarFormatError(f"Unsupported sidecar version: {version}")
+        if table_offset + (doc_count + 1) * _OFFSET.size > len(self._mmap):
+            self._mmap.close()
+            raise SidecarFormatError("Sidecar offset table is truncated.")
+
+        self._doc_count = doc_count
+        self._table_offset = table_offset
+
+    def __enter__(self) -> SidecarReader:
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        self.close()
+
+    def __len__(self) -> int:
+        return self._doc_count
+
+    def __iter__(self) -> Iterator[MetaBlockArray]:
+        for doc in range(self._doc_count):
+            yield self.document(doc)
+
+    def close(self) -> None:
+        self._mmap.close()
+
+    # ---------------------------------------------------------
+    # Per-document access
+    # ---------------------------------------------------------
+
+    def _record(self, doc: int) -> tuple[int, int]:
+        """Return (offset of the first code, number of codes) of a document."""
+        if not 0 <= doc < self._doc_count:
+            raise IndexError(f"Document index {doc} is out of range for {self._doc_count} documents.")
+
+        start = _OFFSET.unpack_from(self._mmap, self._table_offset + doc * _OFFSET.size)[0]
+        (count,) = _COUNT.unpack_from(self._mmap, start)
+        return start + _COUNT.size, count
+
+    def count(self, doc: int) -> int:
+        """Number of MetaBlocks stored for a document."""
+        return self._record(doc)[1]
+
+    def codes(self, doc: int) -> Union[memoryview, array]:
+        """
+        Packed codes of a document.
+
+        A zero-copy uint16 memoryview on little-endian hosts; a byteswapped
+        array copy elsewhere.
+        """
+        offset, count = self._record(doc)
+        raw = memoryview(self._mmap)[offset:offset + 2 * count]
+        if _LITTLE_ENDIAN:
+            return raw.cast("H")
+        swapped = array("H", raw.tobytes())
+        swapped.byteswap()
+        return swapped
+
+    def codes_array(self, doc: int) -> Any:
+        """Packed codes of a document as a read-only NumPy uint16 view."""
+        numpy = require_numpy()
+        offset, count = self._record(doc)
+        return numpy.frombuffer(self._mmap, dtype="<u2", count=count, offset=offset)
+
+    def anchors(self, doc: int) -> array:
+        offset, count = self._record(doc)
+        offset += 2 * count
+        offset += _padding(offset, 4)
+        return decode_anchors(self._mmap, offset, count)
+
+    def document(self, doc: int) -> MetaBlockArray:
+        """Materialize one document as a MetaBlockArray."""
+        codes = self.codes(doc)
+        anchors = self.anchors(doc)
+        lengths = [1 + ((code >> 13) & 1) * ((code >> 10) & 0b111) for code in codes]
+        result = MetaBlockArray(codes, anchors, lengths)
+        if isinstance(codes, memoryview):
+            codes.release()
+        return result
+
+    def blocks(self, doc: int, marker_config: InlineMarkerConfig | None = None) -> List[InlineMetaBlock]:
+        return self.document(doc).to_inline_blocks(marker_config)
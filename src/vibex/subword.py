@@ -0,0 +1,297 @@
+"""
+Subword tokenizer adapters and subword <-> word alignment.
+
+``BPETokenizer`` runs a byte-pair-encoding model loaded from local
+``vocab.json`` / ``merges.txt`` files, so anchors emitted by a subword
+analyzer can be used with the encoder and decoder directly. Both sides
+locate tokens through character offsets, so markers may sit in front of
+any subword, including one in the middle of a word.
+
+``Alignment`` maps every subword of a text to its character span and to
+the whitespace word that contains it. Alignments are LRU-cached per text,
+so encoding and decoding the same document tokenizes it only once.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import threading
+from array import array
+from bisect import bisect_right
+from collections import OrderedDict
+from dataclasses import dataclass
+from functools import lru_cache
+from hashlib import blake2b
+from typing import Any, Callable, Dict, Iterator, List, Mapping, Optional, Sequence, Tuple, Union
+from weakref import WeakKeyDictionary
+
+from .tokenizer import TOKEN_PATTERN, TokenizerProtocol
+
+PathLike = Union[str, "os.PathLike[str]"]
+
+Span = Tuple[int, int]
+
+
+# ---------------------------------------------------------
+# Alignment table
+# ---------------------------------------------------------
+
+@dataclass(frozen=True)
+class Alignment:
+    """
+    Subword/word/character alignment of one text.
+
+    spans       : (start, end) character offsets of every subword
+    word_spans  : (start, end) character offsets of every whitespace word
+    word_of     : subword index -> word index
+    first_of    : word index -> index of its first subword
+    """
+
+    spans: Tuple[Span, ...]
+    word_spans: Tuple[Span, ...]
+    word_of: array
+    first_of: array
+
+    @classmethod
+    def build(cls, text: str, spans: Sequence[Span]) -> Alignment:
+        word_spans = tuple(match.span() for match in TOKEN_PATTERN.finditer(text))
+        word_starts = [start for start, _ in word_spans]
+
+        word_of = array("i")
+        first_of = array("i", [-1] * len(word_spans))
+        for index, (start, _) in enumerate(spans):
+            word = max(bisect_right(word_starts, start) - 1, 0)
+            word_of.append(word)
+            if first_of[word] == -1:
+                first_of[word] = index
+
+        return cls(spans=tuple(spans), word_spans=word_spans, word_of=word_of, first_of=first_of)
+
+    def __len__(self) -> int:
+        return len(self.spans)
+
+    def subword_to_word(self, index: int) -> int:
+        return self.word_of[index]
+
+    def word_to_subword(self, word: int) -> int:
+        """First subword of a whitespace word."""
+        return self.first_of[word]
+
+    def words_covered(self, anchor: int, length: int) -> Span:
+        """(first word, word count) covered by ``length`` subwords from ``anchor``."""
+        first = self.word_of[anchor]
+        last = self.word_of[min(anchor + length, len(self.spans)) - 1]
+        return first, last - first + 1
+
+    def subword_at(self, offset: int) -> int:
+        """
+        Subword covering a character offset.
+
+        Empty subwords (a bare word-boundary piece) share their offset with
+        the next subword; the non-empty one is returned.
+        """
+        starts = self._starts()
+        index = bisect_right(starts, offset) - 1
+        while index + 1 < len(self.spans) and self.spans[index][0] == self.spans[index][1] == offset:
+            index += 1
+        if index < 0:
+            raise IndexError(f"Offset {offset} is before the first subword.")
+        return index
+
+    def _starts(self) -> List[int]:
+        starts = self.__dict__.get("_starts_cache")
+        if starts is None:
+            starts = [start for start, _ in self.spans]
+            object.__setattr__(self, "_starts_cache", starts)
+        return starts
+
+
+class _AlignmentCache:
+    """
+    Thread-safe LRU of alignments keyed by a digest of the text, so no
+    document is kept alive by the cache.
+    """
+
+    def __init__(self, max_entries: int) -> None:
+        self._max_entries = max_entries
+        self._entries: OrderedDict[bytes, Alignment] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, text: str, build: Callable[[str], Alignment]) -> Alignment:
+        key = blake2b(text.encode("utf-8", "surrogatepass"), digest_size=16).digest()
+        with self._lock:
+            aligned = self._entries.get(key)
+            if aligned is not None:
+                self._entries.move_to_end(key)
+                return aligned
+
+        aligned = build(text)
+        with self._lock:
+            self._entries[key] = aligned
+            if len(self._entries) > self._max_entries:
+                self._entries.popitem(last=False)
+        return aligned
+
+
+# Caches for tokenizers without their own; entries go away with their tokenizer.
+_ALIGNMENTS: "WeakKeyDictionary[Any, _AlignmentCache]" = WeakKeyDictionary()
+_ALIGNMENTS_LOCK = threading.Lock()
+_ALIGNMENT_CACHE_SIZE = 1024
+
+
+def alignment(tokenizer: TokenizerProtocol, text: str) -> Alignment:
+    """LRU-cached alignment of ``text`` under any tokenizer with ``spans``."""
+    own = getattr(tokenizer, "alignment", None)
+    if own is not None:
+        return own(text)
+
+    with _ALIGNMENTS_LOCK:
+        try:
+            cache = _ALIGNMENTS.get(tokenizer)
+            if cache is None:
+                cache = _ALIGNMENTS[tokenizer] = _AlignmentCache(_ALIGNMENT_CACHE_SIZE)
+        except TypeError:  # not weak-referenceable or not hashable: no caching
+            cache = None
+
+    if cache is None:
+        return Alignment.build(text, tokenizer.spans(text))
+    return cache.get(text, lambda value: Alignment.build(value, tokenizer.spans(value)))
+
+
+# ---------------------------------------------------------
+# BPE adapter
+# ---------------------------------------------------------
+
+class BPETokenizer:
+    """
+    Byte-pair-encoding tokenizer over whitespace-separated words.
+
+    Every word is split into characters (the first one preceded by
+    ``word_prefix``, SentencePiece style) and merged by rank until no
+    known pair is left. Word splits and per-text alignments are cached;
+    the caches are dropped when the tokenizer is pickled (e.g. to send it
+    to a process pool) and rebuilt empty on the other side.
+    """
+
+    def __init__(
+        self,
+        merges: Sequence[Tuple[str, str]],
+        vocab: Optional[Mapping[str, int]] = None,
+        word_prefix: str = "▁",
+        cache_size: int = 65536,
+        alignment_cache_size: int = 4096,
+    ) -> None:
+        self._ranks: Dict[Tuple[str, str], int] = {pair: rank for rank, pair in enumerate(merges)}
+        self._vocab = dict(vocab) if vocab is not None else None
+        self._word_prefix = word_prefix
+        self._cache_size = cache_size
+        self._alignment_cache_size = alignment_cache_size
+        self._make_caches()
+
+    def __getstate__(self) -> Dict[str, Any]:
+        state = self.__dict__.copy()
+        del state["_split_word"], state["_alignments"]
+        return state
+
+    def __setstate__(self, state: Dict[str, Any]) -> None:
+        self.__dict__.update(state)
+        self._make_caches()
+
+    @classmethod
+    def from_files(cls, vocab_path: Optional[PathLike], merges_path: PathLike, **options: object) -> BPETokenizer:
+        """Load a ``merges.txt`` (one "left right" pair per line) and an optional ``vocab.json``."""
+        merges: List[Tuple[str, str]] = []
+        with open(merges_path, encoding="utf-8") as handle:
+            for line in handle:
+                line = line.rstrip("\n")
+                if not line or line.startswith("#version"):
+                    continue
+                left, right = line.split(" ")
+                merges.append((left, right))
+
+        vocab = None
+        if vocab_path is not None:
+            with open(vocab_path, encoding="utf-8") as handle:
+                vocab = json.load(handle)
+        return cls(merges, vocab, **options)  # type: ignore[arg-type]
+
+    # ---------------------------------------------------------
+    # Tokenizer protocol
+    # ---------------------------------------------------------
+
+    def tokenize(self, text: str) -> List[str]:
+        pieces: List[str] = []
+        for word in text.split():
+            pieces.extend(self._split_word(word))
+        return pieces
+
+    def detokenize(self, tokens: List[str]) -> str:
+        if not self._word_prefix:
+            return "".join(tokens)
+        return "".join(tokens).replace(self._word_prefix, " ").strip(" ")
+
+    def spans(self, text: str) -> List[Span]:
+        return list(self.alignment(text).spans)
+
+    def iter_spans(self, text: str) -> Iterator[Span]:
+        return iter(self.alignment(text).spans)
+
+    def alignment(self, text: str) -> Alignment:
+        """Cached alignment of ``text``."""
+        return self._alignments.get(text, self._alignment)
+
+    def ids(self, text: str) -> List[int]:
+        """Vocabulary ids of ``tokenize(text)``; unknown pieces raise KeyError."""
+        if self._vocab is None:
+            raise ValueError("This tokenizer was created without a vocabulary.")
+        return [self._vocab[piece] for piece in self.tokenize(text)]
+
+    # ---------------------------------------------------------
+    # INTERNAL
+    # ---------------------------------------------------------
+
+    def _make_caches(self) -> None:
+        self._split_word = lru_cache(maxsize=self._cache_size)(self._bpe)
+        self._alignments = _AlignmentCache(self._alignment_cache_size)
+
+    def _alignment(self, text: str) -> Alignment:
+        spans: List[Span] = []
+        skip = len(self._word_prefix)
+        for match in TOKEN_PATTERN.finditer(text):
+            offset = match.start()
+            for position, piece in enumerate(self._split_word(match.group())):
+                width = len(piece) - (skip if position == 0 else 0)
+                spans.append((offset, offset + width))
+                offset += width
+        return Alignment.build(text, spans)
+
+    def _bpe(self, word: str) -> Tuple[str, ...]:
+        symbols = list(word)
+        if self._word_prefix:
+            symbols.insert(0, self._word_prefix)
+
+        ranks = self._ranks
+        while len(symbols) > 1:
+            best_rank = None
+            best_index = -1
+            for index in range(len(symbols) - 1):
+                rank = ranks.get((symbols[index], symbols[index + 1]))
+                if rank is not None and (best_rank is None or rank < best_rank):
+                    best_rank, best_index = rank, index
+            if best_rank is None:
+                break
+
+            pair = (symbols[best_index], symbols[best_index + 1])
+            merged: List[str] = []
+            index = 0
+            while index < len(symbols):
+                if index + 1 < len(symbols) and (symbols[index], symbols[index + 1]) == pair:
+                    merged.append(pair[0] + pair[1])
+                    index += 2
+                else:
+                    merged.append(symbols[index])
+                    index += 1
+            symbols = merged
+
+        return tuple(symbols)
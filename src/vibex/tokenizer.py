@@ -1,5 +1,30 @@
 from __future__ import annotations
-from typing import List
+import re
+from typing import IO, Iterable, Iterator, List, Protocol, Tuple, Union, runtime_checkable
+
+
+# One whitespace-delimited token, exactly as ``Tokenizer.tokenize`` splits them.
+TOKEN_PATTERN = re.compile(r"\S+")
+
+
+@runtime_checkable
+class TokenizerProtocol(Protocol):
+    """
+    What the encoder and decoder need from a tokenizer.
+
+    Anchors are indices into ``tokenize(text)``; ``spans`` gives the
+    (start, end) character offsets of the same tokens. Tokenizers other
+    than the whitespace ``Tokenizer`` (e.g. subword adapters from
+    ``vibex.subword``) are handled by offset splicing.
+    """
+
+    def tokenize(self, text: str) -> List[str]: ...
+
+    def detokenize(self, tokens: List[str]) -> str: ...
+
+    def spans(self, text: str) -> List[Tuple[int, int]]: ...
+
+    def iter_spans(self, text: str) -> Iterator[Tuple[int, int]]: ...
 
 
 class Tokenizer:
@@ -9,6 +34,9 @@ class Tokenizer:
     - Tokenizes by simple whitespace split.
     - Preserves clean detokenization with single spaces.
     - Inline markers (PUA characters) remain attached to the token they precede.
+    - ``spans``/``iter_spans`` report tokens as (start, end) character
+      offsets, so callers can splice the original text instead of
+      rebuilding it from a token list.
     """
 
     def tokenize(self, text: str) -> List[str]:
@@ -25,3 +53,78 @@ class Tokenizer:
         inline markers do not affect spacing.
         """
         return " ".join(tokens)
+
+    def spans(self, text: str) -> List[Tuple[int, int]]:
+        """(start, end) character offsets of every token in ``text``."""
+        return [match.span() for match in TOKEN_PATTERN.finditer(text)]
+
+    def iter_spans(self, text: str) -> Iterator[Tuple[int, int]]:
+        """Lazy variant of ``spans``; stops as soon as the caller does."""
+        for match in TOKEN_PATTERN.finditer(text):
+            yield match.span()
+
+
+def require_whitespace_tokenizer(tokenizer: TokenizerProtocol, method: str) -> None:
+    """
+    Raise TypeError unless ``tokenizer`` is the whitespace ``Tokenizer``.
+
+    Streaming and batch code paths count whitespace tokens directly in the
+    text; with any other tokenizer their anchors would silently disagree
+    with ``encode``/``decode``.
+    """
+    if not isinstance(tokenizer, Tokenizer):
+        raise TypeError(
+            f"{method} counts whitespace tokens and needs a vibex Tokenizer, "
+            f"not {type(tokenizer).__name__}."
+        )
+
+
+# ---------------------------------------------------------
+# Stream helpers (whitespace-safe chunking)
+# ---------------------------------------------------------
+
+def _iter_chunks(source: Union[IO[str], Iterable[str]], chunk_size: int) -> Iterator[str]:
+    """Yield non-empty text chunks from a file-like object or an iterable."""
+    if isinstance(source, str):
+        chunks: Iterable[str] = (source,)
+    elif hasattr(source, "read"):
+        read = source.read
+        chunks = iter(lambda: read(chunk_size), "")
+    else:
+        chunks = source
+
+    for chunk in chunks:
+        if chunk:
+            yield chunk
+
+
+def last_whitespace(text: str) -> int:
+    """Index of the last whitespace character in ``text``, or -1."""
+    for idx in range(len(text) - 1, -1, -1):
+        if text[idx].isspace():
+            return idx
+    return -1
+
+
+def iter_whole_tokens(source: Union[IO[str], Iterable[str]], chunk_size: int) -> Iterator[str]:
+    """
+    Re-cut a text stream into pieces that never split a token.
+
+    Every piece but the last ends with a whitespace character; text after
+    the last whitespace of a chunk is held back and prefixed to the next.
+    """
+    pending: List[str] = []
+
+    for chunk in _iter_chunks(source, chunk_size):
+        cut = last_whitespace(chunk)
+        if cut == -1:
+            pending.append(chunk)
+            continue
+
+        pending.append(chunk[:cut + 1])
+        yield "".join(pending)
+        pending = [chunk[cut + 1:]]
+
+    tail = "".join(pending)
+    if tail:
+        yield tail
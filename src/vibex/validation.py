@@ -0,0 +1,218 @@
+"""
+Annotation validation and overlap resolution.
+
+``validate`` checks a batch of SentimentAnnotations in bulk, with one
+min/max per field column, and walks the batch only to report the first
+invalid annotation. ``normalize`` also drops exact duplicates and
+resolves overlapping spans, found with a sorted interval sweep, according
+to a merge policy:
+
+    strongest : keep the strongest annotations that do not overlap
+    split     : cut overlapping spans so every token keeps its strongest
+                annotation
+    error     : raise MetaBlockEncodingError on the first overlap
+
+Strength is the Emergency Flag (``reserved``, see ``vibex.emergency``),
+then intensity, then span length; ties go to the annotation that came
+first. A flagged annotation therefore never loses a token to an
+unflagged one. The output is sorted by anchor with at most one annotation
+per token, so the encoder emits one marker per anchor.
+
+``InlineEncoder(merge_policy=...)`` runs ``normalize`` on every document.
+"""
+
+from __future__ import annotations
+
+from array import array
+from dataclasses import replace
+from operator import add, attrgetter
+from typing import TYPE_CHECKING, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+from .exceptions import MetaBlockEncodingError
+
+if TYPE_CHECKING:
+    from .inline_encoder import SentimentAnnotation
+
+MERGE_POLICIES = ("strongest", "split", "error")
+
+# field: (lowest, highest)
+_FIELD_RANGES = {
+    "length": (1, 8),
+    "polarity": (0, 3),
+    "intensity": (0, 7),
+    "context": (0, 1),
+    "emotion": (0, 7),
+    "reserved": (0, 1),
+}
+
+_GETTERS = {name: attrgetter(name) for name in ("anchor", *_FIELD_RANGES)}
+
+
+# ---------------------------------------------------------
+# Validation
+# ---------------------------------------------------------
+
+def validate(annotations: Sequence[SentimentAnnotation], token_count: Optional[int] = None) -> None:
+    """
+    Raise MetaBlockEncodingError for the first annotation with a field out
+    of range, a negative anchor or (with ``token_count``) a span running
+    past the last token.
+
+    Columns are checked in bulk; only a batch that fails is walked again
+    to report its first invalid annotation.
+    """
+    if not annotations:
+        return
+    columns = {name: list(map(getter, annotations)) for name, getter in _GETTERS.items()}
+    valid = min(columns["anchor"]) >= 0 and all(
+        lowest <= min(columns[name]) and max(columns[name]) <= highest
+        for name, (lowest, highest) in _FIELD_RANGES.items()
+    )
+    if valid and token_count is not None:
+        valid = max(map(add, columns["anchor"], columns["length"])) <= token_count
+    if not valid:
+        _raise_first_invalid(annotations, token_count)
+
+
+def _raise_first_invalid(annotations: Sequence[SentimentAnnotation], token_count: Optional[int]) -> None:
+    for index, annotation in enumerate(annotations):
+        for name, (lowest, highest) in _FIELD_RANGES.items():
+            value = getattr(annotation, name)
+            if not lowest <= value <= highest:
+                raise MetaBlockEncodingError(
+                    f"Annotation {index}: {name} {value} is out of range {lowest}-{highest}."
+                )
+
+        anchor = annotation.anchor
+        if anchor < 0:
+            raise MetaBlockEncodingError(f"Annotation {index}: anchor index {anchor} is out of bounds.")
+        end = anchor + annotation.length
+        if token_count is not None and end > token_count:
+            raise MetaBlockEncodingError(
+                f"Annotation {index}: span {anchor}..{end - 1} is out of bounds for {token_count} tokens."
+            )
+
+
+def overlaps(annotations: Sequence[SentimentAnnotation]) -> List[Tuple[int, int]]:
+    """
+    Index pairs (earlier anchor first) of all annotations whose spans share
+    a token, from a sweep over the spans sorted by anchor. Expired spans
+    leave the active set as the sweep passes their end, so the cost is
+    O(n log n) plus the number of pairs reported.
+    """
+    order = sorted(range(len(annotations)), key=lambda index: annotations[index].anchor)
+    pairs: List[Tuple[int, int]] = []
+    active: List[Tuple[int, int]] = []  # (end, index) of spans still open at the sweep position
+
+    for index in order:
+        anchor = annotations[index].anchor
+        active = [item for item in active if item[0] > anchor]
+        pairs.extend((other, index) for _, other in active)
+        active.append((anchor + annotations[index].length, index))
+    return pairs
+
+
+# ---------------------------------------------------------
+# Normalization
+# ---------------------------------------------------------
+
+def normalize(
+    annotations: Iterable[SentimentAnnotation],
+    token_count: Optional[int] = None,
+    policy: str = "strongest",
+) -> List[SentimentAnnotation]:
+    """Validate, deduplicate and resolve overlaps; returns annotations sorted by anchor."""
+    if policy not in MERGE_POLICIES:
+        raise ValueError(f"policy must be one of {', '.join(MERGE_POLICIES)}, got {policy!r}.")
+
+    items = list(annotations)
+    validate(items, token_count)
+
+    seen = set()
+    unique: List[Tuple[int, SentimentAnnotation]] = []  # (input index, annotation)
+    for index, annotation in enumerate(items):
+        key = (annotation.anchor, annotation.to_int())
+        if key not in seen:
+            seen.add(key)
+            unique.append((index, annotation))
+    unique.sort(key=lambda item: item[1].anchor)
+
+    normalized: List[SentimentAnnotation] = []
+    for cluster in _clusters(unique):
+        if len(cluster) == 1:
+            normalized.append(cluster[0][1])
+            continue
+
+        if policy == "error":
+            # A cluster only grows past its first span by overlapping it.
+            first, second = cluster[0][1], cluster[1][1]
+            raise MetaBlockEncodingError(
+                f"Annotations at anchors {first.anchor} (length {first.length}) and "
+                f"{second.anchor} (length {second.length}) overlap."
+            )
+
+        by_strength = [annotation for _, annotation in sorted(cluster, key=_strength)]
+        normalized.extend(_keep_strongest(by_strength) if policy == "strongest" else _split(by_strength))
+    return normalized
+
+
+def _clusters(
+    ordered: List[Tuple[int, SentimentAnnotation]],
+) -> Iterator[List[Tuple[int, SentimentAnnotation]]]:
+    """
+    Sweep over spans sorted by anchor, yielding runs of transitively
+    overlapping spans: a span joins the current run exactly when it starts
+    before the furthest end seen so far.
+    """
+    cluster: List[Tuple[int, SentimentAnnotation]] = []
+    reach = 0
+    for item in ordered:
+        annotation = item[1]
+        if cluster and annotation.anchor >= reach:
+            yield cluster
+            cluster = []
+        cluster.append(item)
+        reach = max(reach, annotation.anchor + annotation.length)
+    if cluster:
+        yield cluster
+
+
+def _strength(item: Tuple[int, SentimentAnnotation]) -> Tuple[int, int, int, int]:
+    index, annotation = item
+    return annotation.reserved, annotation.intensity, annotation.length, -index
+
+
+def _keep_strongest(by_strength: List[SentimentAnnotation]) -> List[SentimentAnnotation]:
+    taken = set()
+    kept: List[SentimentAnnotation] = []
+    for annotation in reversed(by_strength):
+        tokens = range(annotation.anchor, annotation.anchor + annotation.length)
+        if taken.isdisjoint(tokens):
+            taken.update(tokens)
+            kept.append(annotation)
+    kept.sort(key=lambda annotation: annotation.anchor)
+    return kept
+
+
+def _split(by_strength: List[SentimentAnnotation]) -> List[SentimentAnnotation]:
+    first = min(annotation.anchor for annotation in by_strength)
+    last = max(annotation.anchor + annotation.length for annotation in by_strength)
+
+    # Paint weakest first so every token ends up owned by its strongest span.
+    owner = array("i", [-1]) * (last - first)
+    for index, annotation in enumerate(by_strength):
+        start = annotation.anchor - first
+        owner[start:start + annotation.length] = array("i", [index]) * annotation.length
+
+    pieces: List[SentimentAnnotation] = []
+    start = 0
+    for position in range(1, len(owner) + 1):
+        if position == len(owner) or owner[position] != owner[start]:
+            if owner[start] >= 0:
+                annotation = by_strength[owner[start]]
+                anchor, length = first + start, position - start
+                if (anchor, length) != (annotation.anchor, annotation.length):
+                    annotation = replace(annotation, anchor=anchor, length=length)
+                pieces.append(annotation)
+            start = position
+    return pieces
@@ -0,0 +1,95 @@
+from collections import Counter
+from datetime import datetime
+import random
+
+import pytest
+
+from vibex import MetaBlock, MetaBlockArray, SidecarReader, SidecarWriter
+from vibex import aggregate
+from vibex.aggregate import CodeHistogram, GroupedHistogram, time_bucket
+
+
+def _codes(seed, count=2000):
+    rng = random.Random(seed)
+    return [rng.randrange(1 << 14) for _ in range(count)]
+
+
+def test_marginals_match_per_block_loop():
+    codes = _codes(1)
+    histogram = CodeHistogram.from_codes(codes)
+    blocks = [MetaBlock.from_int(code) for code in codes]
+
+    emotion = Counter(block.emotion for block in blocks)
+    assert histogram.marginal("emotion") == [emotion[value] for value in range(8)]
+    assert histogram.total == len(codes)
+    assert histogram.sum("intensity") == sum(block.intensity for block in blocks)
+
+    negative = [block for block in blocks if block.polarity == 1]
+    assert histogram.mean("intensity", "polarity == NEG") == pytest.approx(
+        sum(block.intensity for block in negative) / len(negative)
+    )
+    means = histogram.mean_by("intensity", "polarity")
+    assert means[1] == pytest.approx(histogram.mean("intensity", "polarity == NEG"))
+    assert histogram.crosstab("polarity", "context")[1][0] == sum(1 for block in negative if block.context == 0)
+
+    with pytest.raises(ValueError):
+        histogram.marginal("mood")
+
+
+def test_numpy_and_python_counting_agree_and_shards_merge():
+    numpy = pytest.importorskip("numpy")
+    left, right = _codes(2), _codes(3)
+
+    merged = CodeHistogram.from_codes(numpy.array(left, dtype=numpy.uint16))
+    merged += CodeHistogram.from_codes(MetaBlockArray(right, [0] * len(right), [1] * len(right)))
+
+    assert merged == CodeHistogram.from_codes(left + right)
+    assert CodeHistogram.from_bytes(merged.to_bytes()) == merged
+
+
+def test_grouped_by_time_bucket_from_sidecar(tmp_path):
+    days = [datetime(2026, 3, 1, 9), datetime(2026, 3, 1, 22), datetime(2026, 3, 2, 8)]
+    documents = [_codes(seed, 50) for seed in range(3)]
+
+    with SidecarWriter(tmp_path / "blocks.vxsc") as writer:
+        for codes in documents:
+            writer.write_codes(codes, range(len(codes)))
+
+    with SidecarReader(tmp_path / "blocks.vxsc") as reader:
+        grouped = GroupedHistogram.from_sidecar(reader, key=lambda doc: time_bucket(days[doc]))
+
+    assert grouped.keys() == [time_bucket(days[0]), time_bucket(days[2])]
+    assert list(grouped.count().values()) == [100, 50]
+    assert grouped.total() == CodeHistogram.from_codes([code for codes in documents for code in codes])
+
+    shard = GroupedHistogram()
+    shard.add(time_bucket(days[2]), documents[2])
+    grouped.merge(shard)
+    assert grouped.count()[time_bucket(days[2])] == 100
+
+
+def test_sidecar_counting_paths_agree(tmp_path, monkeypatch):
+    pytest.importorskip("numpy")
+    documents = [_codes(seed, 30 + seed) for seed in range(20)]
+    with SidecarWriter(tmp_path / "blocks.vxsc") as writer:
+        for codes in documents:
+            writer.write_codes(codes, range(len(codes)))
+
+    monkeypatch.setattr(aggregate, "_BINCOUNT_BATCH", 100)  # several batches, keys split across them
+    with SidecarReader(tmp_path / "blocks.vxsc") as reader:
+        vectorized = CodeHistogram.from_sidecar(reader), GroupedHistogram.from_sidecar(reader, key=lambda doc: doc % 3)
+        monkeypatch.setattr(aggregate, "_optional_numpy", lambda: None)
+        fallback = CodeHistogram.from_sidecar(reader), GroupedHistogram.from_sidecar(reader, key=lambda doc: doc % 3)
+
+    assert vectorized[0] == fallback[0] == CodeHistogram.from_codes([code for codes in documents for code in codes])
+    assert {key: vectorized[1][key] for key in range(3)} == {key: fallback[1][key] for key in range(3)}
+
+
+def test_out_of_range_codes_raise_on_both_paths():
+    numpy = pytest.importorskip("numpy")
+    histogram = CodeHistogram()
+    with pytest.raises(ValueError, match="16384"):
+        histogram.add([1, 1 << 14])
+    with pytest.raises(ValueError, match="16384"):
+        histogram.add(numpy.array([1, 1 << 14]))
+    assert histogram.total == 0
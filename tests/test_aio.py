@@ -0,0 +1,86 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+
+from vibex import InlineDecoder, InlineEncoder, SentimentAnnotation, Tokenizer
+from vibex.aio import AsyncInlineCodec
+
+
+def _annotation(anchor):
+    return SentimentAnnotation(anchor=anchor, length=1, polarity=1, intensity=2, context=0, emotion=5)
+
+
+def _codec(**options):
+    return AsyncInlineCodec(InlineEncoder(Tokenizer()), InlineDecoder(Tokenizer()), **options)
+
+
+def test_async_round_trip_inline_and_offloaded():
+    small = "tiny message here"
+    large = " ".join(["word"] * 5000)
+
+    async def main():
+        with ThreadPoolExecutor(2) as pool:
+            codec = _codec(executor=pool, offload_threshold=1000)
+            encoded = [await codec.encode(text, [_annotation(1)]) for text in (small, large)]
+            decoded = [await codec.decode(text) for text in encoded]
+        return decoded
+
+    decoded = asyncio.run(main())
+    assert [d.clean_text for d in decoded] == [small, large]
+    assert [d.blocks[0].span.anchor for d in decoded] == [1, 1]
+
+
+def test_iterators_keep_order_and_bound_read_ahead():
+    pulled = []
+
+    async def source():
+        for index in range(20):
+            pulled.append(index)
+            yield (f"message number {index}", [_annotation(2)])
+
+    async def main():
+        codec = _codec(offload_threshold=0, max_in_flight=4)
+        encoded = codec.encode_iter(source())
+        first = await encoded.__anext__()
+        read_ahead = len(pulled)
+        rest = [item async for item in encoded]
+        decoded = [d.clean_text async for d in codec.decode_iter([first] + rest)]
+        return read_ahead, decoded
+
+    read_ahead, decoded = asyncio.run(main())
+    assert read_ahead <= 4
+    assert decoded == [f"message number {index}" for index in range(20)]
+
+
+def test_async_decode_stream_from_bytes():
+    encoded = InlineEncoder(Tokenizer()).encode("one two three four", [_annotation(0), _annotation(3)])
+    data = encoded.encode("utf-8")
+
+    async def chunks():
+        for start in range(0, len(data), 3):
+            yield data[start:start + 3]
+
+    async def main():
+        return [item async for item in _codec().decode_stream(chunks())]
+
+    items = asyncio.run(main())
+    text = "".join(item for item in items if isinstance(item, str))
+    assert text == "one two three four"
+    assert [item.span.anchor for item in items if not isinstance(item, str)] == [0, 3]
+
+
+def test_async_decode_stream_from_stream_reader_with_long_line():
+    words = ["word"] * 40000  # one 200 KB line, far above StreamReader's 64 KiB line limit
+    annotations = [_annotation(0), _annotation(39999)]
+    data = InlineEncoder(Tokenizer()).encode(" ".join(words), annotations).encode("utf-8")
+
+    async def main():
+        reader = asyncio.StreamReader()
+        reader.feed_data(data)
+        reader.feed_eof()
+        return [item async for item in _codec().decode_stream(reader, chunk_size=4096)]
+
+    items = asyncio.run(main())
+    chunks = [item for item in items if isinstance(item, str)]
+    assert "".join(chunks) == " ".join(words)
+    assert max(len(chunk) for chunk in chunks) < 2 * 4096  # read in chunks, not lines
+    assert [item.span.anchor for item in items if not isinstance(item, str)] == [0, 39999]
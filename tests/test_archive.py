@@ -0,0 +1,82 @@
+import random
+
+import pytest
+
+from vibex import ArchiveFormatError, SidecarReader, SidecarWriter
+from vibex.archive import ArchiveReader, ArchiveWriter, archive_to_sidecar, sidecar_to_archive
+
+
+def _documents(seed=7, count=60):
+    rng = random.Random(seed)
+    documents = []
+    for doc in range(count):
+        size = rng.choice((0, 1, 5, 40))
+        # Later documents are calmer, so zone maps differ between row groups.
+        top = 8 if doc < count // 2 else 3
+        codes = [
+            (rng.randrange(2) << 13) | (rng.randrange(8) << 10) | (rng.randrange(4) << 8)
+            | (rng.randrange(top) << 5) | (rng.randrange(2) << 4) | (2 << 1) | (doc == 3)
+            for _ in range(size)
+        ]
+        anchors = sorted(rng.randrange(500) for _ in range(size))
+        documents.append((codes, anchors))
+    return documents
+
+
+def test_archive_round_trips_exactly(tmp_path):
+    documents = _documents()
+    path = tmp_path / "blocks.vxar"
+    with ArchiveWriter(path, row_group_size=100) as writer:
+        for codes, anchors in documents:
+            writer.write_codes(codes, anchors)
+
+    with ArchiveReader(path) as reader:
+        assert len(reader) == len(documents)
+        assert len(reader.row_groups) > 3
+        assert [(b.codes.tolist(), b.anchors.tolist()) for b in reader] == documents
+        assert reader.document(17).codes.tolist() == documents[17][0]
+        assert reader.row_groups[0].zone_map.emergency
+        assert not reader.row_groups[-1].zone_map.emergency
+        assert reader.row_groups[-1].zone_map.max_intensity <= 2
+
+
+def test_scan_skips_row_groups_by_zone_map(tmp_path):
+    documents = _documents()
+    path = tmp_path / "blocks.vxar"
+    with ArchiveWriter(path, row_group_size=100) as writer:
+        for codes, anchors in documents:
+            writer.write_codes(codes, anchors)
+
+    query = "intensity >= 6 & polarity == NEG"
+    expected = [
+        doc for doc, (codes, _) in enumerate(documents)
+        if any((code >> 5) & 7 >= 6 and (code >> 8) & 3 == 1 for code in codes)
+    ]
+    with ArchiveReader(path) as reader:
+        groups = reader.matching_row_groups(query)
+        assert 0 < len(groups) < len(reader.row_groups)
+        assert [doc for doc, _ in reader.scan(query)] == expected
+
+
+def test_sidecar_conversion_and_corruption(tmp_path):
+    documents = _documents(seed=3, count=10)
+    with SidecarWriter(tmp_path / "in.vxsc") as writer:
+        for codes, anchors in documents:
+            writer.write_codes(codes, anchors)
+
+    assert sidecar_to_archive(tmp_path / "in.vxsc", tmp_path / "a.vxar", row_group_size=16) == 10
+    assert archive_to_sidecar(tmp_path / "a.vxar", tmp_path / "out.vxsc") == 10
+    with SidecarReader(tmp_path / "out.vxsc") as reader:
+        assert [(b.codes.tolist(), b.anchors.tolist()) for b in reader] == documents
+
+    data = (tmp_path / "a.vxar").read_bytes()
+    (tmp_path / "cut.vxar").write_bytes(data[:-5])
+    with pytest.raises(ArchiveFormatError):
+        ArchiveReader(tmp_path / "cut.vxar")
+
+
+@pytest.mark.parametrize("data", [b"", b"VXAR" + bytes(12)])
+def test_archive_rejects_empty_and_short_files(tmp_path, data):
+    (tmp_path / "short.vxar").write_bytes(data)
+    with pytest.raises(ArchiveFormatError, match="too small"):
+        ArchiveReader(tmp_path / "short.vxar")
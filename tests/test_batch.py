@@ -0,0 +1,57 @@
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from vibex import InlineDecoder, InlineEncoder, MetaBlockArray, MetaBlockEncodingError, SentimentAnnotation, Tokenizer
+
+
+def _corpus(size=40):
+    texts, annotations = [], []
+    for i in range(size):
+        texts.append(" ".join(f"d{i}w{j}" for j in range(i % 7 + 1)))
+        annotations.append([
+            SentimentAnnotation(anchor=j, length=1 + j % 3, polarity=j % 4, intensity=i % 8, context=j % 2, emotion=j % 8)
+            for j in range(0, i % 7 + 1, 2)
+        ])
+    return texts, annotations
+
+
+def test_encode_batch_matches_encode():
+    texts, annotations = _corpus()
+    encoder = InlineEncoder(Tokenizer())
+    expected = [encoder.encode(text, items) for text, items in zip(texts, annotations)]
+
+    assert encoder.encode_batch(texts, annotations) == expected
+    with ThreadPoolExecutor(2) as pool:
+        assert encoder.encode_batch(texts, annotations, executor=pool, parallel_threshold=1, chunk_size=3) == expected
+
+
+def test_encode_batch_validates_lengths_and_anchors():
+    encoder = InlineEncoder(Tokenizer())
+    with pytest.raises(MetaBlockEncodingError):
+        encoder.encode_batch(["a b"], [])
+    with pytest.raises(MetaBlockEncodingError):
+        encoder.encode_batch(["a b"], [[SentimentAnnotation(anchor=2, length=1, polarity=1, intensity=1, context=0, emotion=0)]])
+
+
+def test_decode_batch_is_columnar_and_matches_decode():
+    texts, annotations = _corpus()
+    encoded = InlineEncoder(Tokenizer()).encode_batch(texts, annotations)
+    decoder = InlineDecoder(Tokenizer())
+
+    batch = decoder.decode_batch(encoded)
+    assert batch.clean_texts == texts
+    for index, text in enumerate(encoded):
+        assert batch.document(index) == MetaBlockArray.from_inline_blocks(decoder.decode(text).blocks)
+
+    with ThreadPoolExecutor(2) as pool:
+        parallel = decoder.decode_batch(encoded, executor=pool, parallel_threshold=1, chunk_size=6)
+    assert parallel == batch
+
+
+def test_annotation_to_int_matches_metablock():
+    annotation = SentimentAnnotation(anchor=0, length=4, polarity=3, intensity=6, context=1, emotion=5, reserved=1)
+    assert annotation.to_int() == annotation.to_metablock().to_int()
+
+    with pytest.raises(MetaBlockEncodingError):
+        SentimentAnnotation(anchor=0, length=9, polarity=0, intensity=0, context=0, emotion=0).to_int()
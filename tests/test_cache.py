@@ -0,0 +1,132 @@
+import threading
+
+import pytest
+
+from vibex import InlineDecoder, InlineEncoder, InlineMarkerConfig, SentimentAnnotation, Tokenizer
+from vibex.cache import CachingDecoder
+
+TEXT = "the feed keeps showing the same hot comment over and over"
+
+
+def _annotation(anchor, length, polarity, intensity):
+    return SentimentAnnotation(anchor=anchor, length=length, polarity=polarity, intensity=intensity, context=0, emotion=1)
+
+
+def _encoded(config=None, text=TEXT):
+    annotations = [_annotation(0, 2, 1, 3), _annotation(4, 1, 2, 5), _annotation(4, 3, 1, 2)]
+    return InlineEncoder(Tokenizer(), config).encode(text, annotations)
+
+
+def test_hits_match_uncached_decode():
+    for config in (InlineMarkerConfig(), InlineMarkerConfig(compact=True)):
+        decoder = InlineDecoder(Tokenizer(), config)
+        cache = CachingDecoder(decoder)
+        encoded = _encoded(config)
+        expected = decoder.decode(encoded)
+
+        assert cache.decode(encoded) == expected
+        assert cache.decode(encoded) == expected
+
+        clean_text, blocks = cache.decode_array(encoded)
+        assert clean_text == expected.clean_text
+        assert list(blocks.codes) == [block.block.to_int() for block in expected.blocks]
+        assert list(blocks.lengths) == [block.span.length for block in expected.blocks]
+
+        stats = cache.stats()
+        assert (stats.hits, stats.misses, stats.entries) == (2, 1, 1)
+        assert stats.hit_rate == 2 / 3
+
+
+def test_document_id_and_version_keys():
+    cache = CachingDecoder(InlineDecoder(Tokenizer()))
+    first = cache.decode(_encoded(), doc_id="c-17", version=1)
+
+    # Same id and version: served from the cache without looking at the text.
+    assert cache.decode("", doc_id="c-17", version=1) == first
+    edited = InlineEncoder(Tokenizer()).encode("edited", [_annotation(0, 1, 2, 4)])
+    assert cache.decode(edited, doc_id="c-17", version=2).clean_text == "edited"
+
+    assert cache.invalidate(doc_id="c-17", version=1)
+    assert not cache.invalidate(doc_id="c-17", version=1)
+    assert cache.stats().entries == 1
+
+
+def test_size_bounded_lru_eviction():
+    decoder = InlineDecoder(Tokenizer())
+    documents = [_encoded(text=f"{TEXT} {index}") for index in range(8)]
+    probe = CachingDecoder(decoder)
+    probe.decode(documents[0])
+    entry_size = probe.stats().bytes
+
+    cache = CachingDecoder(decoder, max_bytes=3 * entry_size + entry_size // 2)
+    for document in documents[:3]:
+        cache.decode(document)
+    cache.decode(documents[0])  # refresh: documents[1] is now least recent
+    cache.decode(documents[3])
+
+    stats = cache.stats()
+    assert (stats.entries, stats.evictions) == (3, 1)
+    assert stats.bytes <= stats.max_bytes
+
+    cache.decode(documents[0])
+    cache.decode(documents[1])
+    assert cache.stats().hits == 2 and cache.stats().misses == 5
+
+    cache.clear()
+    assert (cache.stats().entries, cache.stats().bytes) == (0, 0)
+
+    tiny = CachingDecoder(decoder, max_bytes=16)
+    assert tiny.decode(documents[0]) == decoder.decode(documents[0])
+    assert tiny.stats().entries == 0
+
+
+def test_shared_between_threads():
+    decoder = InlineDecoder(Tokenizer())
+    documents = [_encoded(text=f"{TEXT} {index}") for index in range(4)]
+    expected = [decoder.decode(document) for document in documents]
+    cache = CachingDecoder(decoder)
+    failures = []
+
+    def read():
+        for _ in range(50):
+            for document, result in zip(documents, expected):
+                if cache.decode(document) != result:
+                    failures.append(document)
+
+    threads = [threading.Thread(target=read) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    stats = cache.stats()
+    assert not failures
+    assert stats.entries == 4
+    assert stats.hits + stats.misses == 4 * 50 * 4
+
+
+class _CountingTokenizer(Tokenizer):
+    calls = 0
+
+    def tokenize(self, text):
+        _CountingTokenizer.calls += 1
+        return super().tokenize(text)
+
+
+def test_hits_do_not_tokenize_and_tokens_are_private_copies():
+    decoder = InlineDecoder(_CountingTokenizer())
+    cache = CachingDecoder(decoder)
+    encoded = _encoded()
+    first = cache.decode(encoded)
+    calls = _CountingTokenizer.calls
+
+    first.clean_tokens.append("mutated")
+    second = cache.decode(encoded)
+    assert _CountingTokenizer.calls == calls
+    assert second == decoder.decode(encoded)
+
+
+def test_invalidate_needs_a_key():
+    cache = CachingDecoder(InlineDecoder(Tokenizer()))
+    with pytest.raises(ValueError):
+        cache.invalidate()
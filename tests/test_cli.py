@@ -0,0 +1,81 @@
+import json
+
+from vibex.cli import main
+from vibex.convert import inline_to_sidecar
+
+DOCUMENTS = [
+    {"id": "a", "text": "the service was awful", "annotations": [{"anchor": 3, "polarity": 1, "intensity": 6, "emotion": 1}]},
+    {"id": "b", "text": "lovely staff and quick checkout", "annotations": [
+        {"anchor": 0, "length": 2, "polarity": 2, "intensity": 4, "emotion": 5},
+        {"anchor": 3, "polarity": 2, "intensity": 2, "emotion": 5},
+    ]},
+    {"id": "c", "text": "nothing to report", "annotations": []},
+]
+
+
+def _write_jsonl(path, records):
+    path.write_text("".join(json.dumps(record) + "\n" for record in records), encoding="utf-8")
+
+
+def _read_jsonl(path):
+    return [json.loads(line) for line in path.read_text(encoding="utf-8").splitlines()]
+
+
+def test_encode_decode_round_trip(tmp_path):
+    source = tmp_path / "in.jsonl"
+    _write_jsonl(source, DOCUMENTS)
+
+    assert main(["encode", str(source), "-o", str(tmp_path / "enc.jsonl"), "--workers", "1", "--compact"]) == 0
+    assert main(["decode", str(tmp_path / "enc.jsonl"), "-o", str(tmp_path / "dec.jsonl"), "--workers", "2", "--batch-size", "1"]) == 0
+
+    decoded = _read_jsonl(tmp_path / "dec.jsonl")
+    assert [record["text"] for record in decoded] == [doc["text"] for doc in DOCUMENTS]
+    assert decoded[0]["annotations"] == [
+        {"anchor": 3, "length": 1, "polarity": 1, "intensity": 6, "context": 0, "emotion": 1, "reserved": 0, "code": 450}
+    ]
+    assert sorted(a["anchor"] for a in decoded[1]["annotations"]) == [0, 3]
+
+
+def test_decode_encode_keeps_codes_without_annotation_form(tmp_path):
+    encoded = [{"id": "a", "text": "hello \uE0002000\uE001world \uE0000001\uE001\uE0002c00\uE001foo"}]
+    _write_jsonl(tmp_path / "enc.jsonl", encoded)
+
+    main(["decode", str(tmp_path / "enc.jsonl"), "-o", str(tmp_path / "dec.jsonl"), "--workers", "1"])
+    decoded = _read_jsonl(tmp_path / "dec.jsonl")
+    assert [(a["anchor"], a["code"]) for a in decoded[0]["annotations"]] == [(1, 0x2000), (2, 0x0001), (2, 0x2C00)]
+
+    main(["encode", str(tmp_path / "dec.jsonl"), "-o", str(tmp_path / "again.jsonl"), "--workers", "1"])
+    assert _read_jsonl(tmp_path / "again.jsonl") == encoded
+
+
+def test_query_and_stats_on_inline_and_sidecar(tmp_path, capsys):
+    source = tmp_path / "in.jsonl"
+    _write_jsonl(source, DOCUMENTS)
+    main(["encode", str(source), "-o", str(tmp_path / "enc.jsonl"), "--workers", "1"])
+    inline_to_sidecar(tmp_path / "enc.jsonl", tmp_path / "clean.jsonl", tmp_path / "blocks.vxsc", workers=1)
+
+    capsys.readouterr()
+    main(["query", "polarity == POS & intensity >= 3", str(tmp_path / "enc.jsonl"), "--workers", "1"])
+    main(["query", "polarity == POS & intensity >= 3", "--sidecar", str(tmp_path / "blocks.vxsc")])
+    assert capsys.readouterr().out.split() == ["b", "1"]
+
+    main(["stats", str(tmp_path / "enc.jsonl"), "--workers", "1"])
+    inline = json.loads(capsys.readouterr().out)
+    main(["stats", "--sidecar", str(tmp_path / "blocks.vxsc")])
+    sidecar = json.loads(capsys.readouterr().out)
+
+    assert inline == sidecar
+    assert inline["documents"] == 3 and inline["blocks"] == 3
+    assert inline["polarity"] == {"0": 0, "1": 1, "2": 2, "3": 0}
+    assert inline["emotion"]["5"] == 2
+
+
+def test_text_input_and_convert_subcommand(tmp_path, capsys):
+    (tmp_path / "plain.txt").write_text("first line\nsecond line\n", encoding="utf-8")
+    main(["decode", str(tmp_path / "plain.txt"), "--workers", "1"])
+    records = [json.loads(line) for line in capsys.readouterr().out.splitlines()]
+    assert [(r["id"], r["text"]) for r in records] == [("0", "first line"), ("1", "second line")]
+
+    _write_jsonl(tmp_path / "in.jsonl", [{"id": "x", "text": "hi there"}])
+    main(["convert", "inline-to-sidecar", str(tmp_path / "in.jsonl"), str(tmp_path / "t.jsonl"), str(tmp_path / "s.vxsc"), "--workers", "1"])
+    assert _read_jsonl(tmp_path / "t.jsonl") == [{"id": "x", "text": "hi there"}]
@@ -0,0 +1,50 @@
+import pytest
+
+from vibex import InlineDecoder, InlineEncoder, InlineMarkerConfig, SentimentAnnotation, Tokenizer
+
+TEXT = "I loved the performance but the ending felt rushed"
+
+ANNOTATIONS = [
+    SentimentAnnotation(anchor=1, length=1, polarity=2, intensity=6, context=0, emotion=1),
+    SentimentAnnotation(anchor=7, length=2, polarity=1, intensity=5, context=1, emotion=4),
+    SentimentAnnotation(anchor=7, length=1, polarity=3, intensity=7, context=1, emotion=6, reserved=1),
+]
+
+
+def test_compact_markers_are_one_code_point():
+    compact = InlineEncoder(Tokenizer(), InlineMarkerConfig(compact=True)).encode(TEXT, ANNOTATIONS)
+    hex_form = InlineEncoder(Tokenizer()).encode(TEXT, ANNOTATIONS)
+
+    assert len(compact) == len(TEXT) + 3
+    assert len(compact.encode("utf-8")) - len(TEXT.encode("utf-8")) == 3 * 4
+    assert len(hex_form.encode("utf-8")) - len(TEXT.encode("utf-8")) == 3 * 10
+
+
+def test_decoders_auto_detect_marker_mode():
+    compact = InlineEncoder(Tokenizer(), InlineMarkerConfig(compact=True)).encode(TEXT, ANNOTATIONS)
+    hex_form = InlineEncoder(Tokenizer()).encode(TEXT, ANNOTATIONS)
+    decoder = InlineDecoder(Tokenizer())
+    expected = decoder.decode(hex_form)
+
+    for decode in (decoder.decode, decoder.decode_fast):
+        decoded = decode(compact)
+        assert decoded.clean_text == TEXT
+        assert [(b.block, b.span) for b in decoded.blocks] == [(b.block, b.span) for b in expected.blocks]
+
+    batch = decoder.decode_batch([compact, hex_form])
+    assert batch.document(0) == batch.document(1)
+
+
+def test_mixed_marker_modes_in_one_text():
+    compact_marker = InlineMarkerConfig(compact=True).format_code(0x2A82)
+    hex_marker = InlineMarkerConfig().format_code(0x0001)
+    text = f"alpha {compact_marker}{hex_marker}beta gamma"
+
+    decoded = InlineDecoder(Tokenizer()).decode_fast(text)
+    assert decoded.clean_text == "alpha beta gamma"
+    assert [(b.block.to_int(), b.span.anchor) for b in decoded.blocks] == [(0x2A82, 1), (0x0001, 1)]
+
+
+def test_compact_range_must_be_private_use():
+    with pytest.raises(ValueError):
+        InlineMarkerConfig(compact=True, compact_base=0x1F600)
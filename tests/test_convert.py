@@ -0,0 +1,102 @@
+import json
+
+import pytest
+
+from vibex import InlineEncoder, InlineMarkerConfig, MetaBlock, SentimentAnnotation, SidecarReader, SidecarWriter, Tokenizer
+from vibex.convert import inline_to_sidecar, main, sidecar_to_inline, write_documents
+from vibex.metablock import METABLOCK_SPACE
+
+
+def _write_corpus(root):
+    encoder = InlineEncoder(Tokenizer())
+    corpus = {}
+    for i in range(12):
+        text = " ".join(f"doc{i}-w{j}" for j in range(i + 3))
+        annotations = [
+            SentimentAnnotation(anchor=j, length=1 + j % 2, polarity=j % 4, intensity=i % 8, context=0, emotion=j % 8)
+            for j in range(0, i + 3, 2)
+        ]
+        encoded = encoder.encode(text, annotations) + "\n"
+        name = f"part{i % 2}/doc{i:02d}.txt"
+        (root / name).parent.mkdir(parents=True, exist_ok=True)
+        (root / name).write_text(encoded, encoding="utf-8")
+        corpus[name] = encoded
+    return corpus
+
+
+def test_directory_round_trip_is_exact_and_deterministic(tmp_path):
+    corpus = _write_corpus(tmp_path / "inline")
+
+    assert inline_to_sidecar(tmp_path / "inline", tmp_path / "clean.jsonl", tmp_path / "a.vxsc", workers=2, batch_size=5) == 12
+    assert inline_to_sidecar(tmp_path / "inline", tmp_path / "clean1.jsonl", tmp_path / "b.vxsc", workers=1) == 12
+    assert (tmp_path / "a.vxsc").read_bytes() == (tmp_path / "b.vxsc").read_bytes()
+    assert (tmp_path / "clean.jsonl").read_text() == (tmp_path / "clean1.jsonl").read_text()
+
+    with SidecarReader(tmp_path / "a.vxsc") as reader:
+        assert len(reader) == 12
+
+    assert sidecar_to_inline(tmp_path / "clean.jsonl", tmp_path / "a.vxsc", tmp_path / "restored", workers=2) == 12
+    for name, encoded in corpus.items():
+        assert (tmp_path / "restored" / name).read_text(encoding="utf-8") == encoded
+
+
+def test_command_writes_jsonl(tmp_path, capsys):
+    corpus = _write_corpus(tmp_path / "inline")
+
+    main(["inline-to-sidecar", str(tmp_path / "inline"), str(tmp_path / "clean.jsonl"), str(tmp_path / "c.vxsc"), "--workers", "1"])
+    main(["sidecar-to-inline", str(tmp_path / "clean.jsonl"), str(tmp_path / "c.vxsc"), str(tmp_path / "out.jsonl"), "--workers", "1"])
+
+    records = [json.loads(line) for line in (tmp_path / "out.jsonl").read_text(encoding="utf-8").splitlines()]
+    assert {record["id"]: record["text"] for record in records} == corpus
+    assert "Converted 12 documents." in capsys.readouterr().out
+
+
+@pytest.mark.parametrize("doc_id", ["../escaped.txt", "part/../../escaped.txt", "/tmp/absolute.txt", "."])
+def test_write_documents_rejects_ids_outside_target(tmp_path, doc_id):
+    with pytest.raises(ValueError, match="inside"):
+        write_documents(tmp_path / "out", [(doc_id, "text")])
+    assert not (tmp_path / "escaped.txt").exists()
+
+
+def test_write_documents_rejects_duplicate_ids(tmp_path):
+    with pytest.raises(ValueError, match="Duplicate"):
+        write_documents(tmp_path / "out", [("a.txt", "first"), ("sub/../a.txt", "second")])
+    assert (tmp_path / "out" / "a.txt").read_text() == "first"
+
+
+def test_round_trip_keeps_every_code(tmp_path):
+    # 0x2000 is a one-token span with the span flag set; rebuilding it as
+    # an annotation would turn it into 0x0000.
+    (tmp_path / "in.jsonl").write_text(json.dumps({"id": "a", "text": "hello 2000world foo"}) + "\n")
+    inline_to_sidecar(tmp_path / "in.jsonl", tmp_path / "clean.jsonl", tmp_path / "a.vxsc", workers=1)
+    sidecar_to_inline(tmp_path / "clean.jsonl", tmp_path / "a.vxsc", tmp_path / "out.jsonl", workers=1)
+    assert json.loads((tmp_path / "out.jsonl").read_text())["text"] == "hello 2000world foo"
+
+    # Every 14-bit value, written straight to the sidecar, is injected verbatim.
+    markers = InlineMarkerConfig().markers()
+    texts, expected = [], []
+    with SidecarWriter(tmp_path / "all.vxsc") as writer:
+        for first in range(0, METABLOCK_SPACE, 512):
+            codes = list(range(first, first + 512))
+            anchors = [code % 3 for code in codes]
+            writer.write_codes(codes, anchors)
+            texts.append({"id": str(first), "text": "one  two\tthree"})
+            runs = ["".join(markers[code] for code in codes if code % 3 == anchor) for anchor in range(3)]
+            expected.append(f"{runs[0]}one  {runs[1]}two\t{runs[2]}three")
+    (tmp_path / "texts.jsonl").write_text("".join(json.dumps(text) + "\n" for text in texts))
+
+    sidecar_to_inline(tmp_path / "texts.jsonl", tmp_path / "all.vxsc", tmp_path / "all.jsonl", workers=2, batch_size=5)
+    restored = [json.loads(line)["text"] for line in (tmp_path / "all.jsonl").read_text().splitlines()]
+    assert restored == expected
+
+    # Decoding canonicalizes span bits set without the span flag; every
+    # other code survives inline -> sidecar -> inline unchanged.
+    inline_to_sidecar(tmp_path / "all.jsonl", tmp_path / "clean2.jsonl", tmp_path / "again.vxsc", workers=1)
+    with SidecarReader(tmp_path / "again.vxsc") as reader:
+        for index, first in enumerate(range(0, METABLOCK_SPACE, 512)):
+            in_text_order = sorted(range(first, first + 512), key=lambda code: code % 3)
+            assert reader.document(index).codes.tolist() == [MetaBlock.from_int(code).to_int() for code in in_text_order]
+    sidecar_to_inline(tmp_path / "clean2.jsonl", tmp_path / "again.vxsc", tmp_path / "again.jsonl", workers=1)
+    again = [json.loads(line)["text"] for line in (tmp_path / "again.jsonl").read_text().splitlines()]
+    # Codes 0x2000 and up carry the span flag, so all of them are canonical.
+    assert again[0x2000 // 512:] == restored[0x2000 // 512:]
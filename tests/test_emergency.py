@@ -0,0 +1,82 @@
+import io
+from queue import PriorityQueue
+
+import pytest
+
+from vibex import InlineDecoder, InlineEncoder, InlineMarkerConfig, SentimentAnnotation, SidecarWriter, SidecarReader, Tokenizer
+from vibex.emergency import EmergencyScanner
+
+TEXT = "caller reports smoke in the building and cannot get out"
+
+
+def _annotation(anchor, intensity, reserved):
+    return SentimentAnnotation(anchor=anchor, length=1, polarity=1, intensity=intensity, context=0, emotion=2, reserved=reserved)
+
+
+ANNOTATIONS = [_annotation(1, 3, 0), _annotation(3, 4, 1), _annotation(3, 2, 0), _annotation(8, 7, 1)]
+
+
+@pytest.mark.parametrize("config", [InlineMarkerConfig(), InlineMarkerConfig(compact=True)])
+def test_scan_matches_decoded_reserved_bit(config):
+    encoded = InlineEncoder(Tokenizer(), config).encode(TEXT, ANNOTATIONS)
+    expected = [
+        (block.span.anchor, block.block.to_int())
+        for block in InlineDecoder(Tokenizer(), config).decode(encoded).blocks
+        if block.block.reserved
+    ]
+
+    scanner = EmergencyScanner(config)
+    assert [(hit.anchor, hit.code) for hit in scanner.scan(encoded)] == expected
+    assert [(hit.anchor, hit.code) for hit in scanner.scan(encoded.encode("utf-8"))] == expected
+    assert scanner.has_emergency(encoded)
+    assert not scanner.has_emergency(InlineEncoder(Tokenizer(), config).encode(TEXT, ANNOTATIONS[:1]))
+
+
+def test_stream_hits_reach_callback_and_priority_queue():
+    encoded = InlineEncoder(Tokenizer()).encode(TEXT, ANNOTATIONS)
+    seen = []
+    hits = PriorityQueue()
+    scanner = EmergencyScanner(on_hit=seen.append, queue=hits)
+
+    stream = scanner.scan_stream(io.StringIO(encoded), chunk_size=7)
+    first = next(stream)
+    assert seen == [first]  # dispatched before the rest of the stream is read
+    rest = list(stream)
+
+    assert [hit.anchor for hit in [first] + rest] == [3, 8]
+    assert hits.get().intensity == 7  # most intense first
+    assert hits.get().intensity == 4
+
+
+def test_scan_sidecar(tmp_path):
+    documents = [([0x0021, 0x0042, 0x00E3], [0, 2, 5]), ([], []), ([0x0100, 0x3FFF], [1, 4])]
+    with SidecarWriter(tmp_path / "s.vxsc") as writer:
+        for codes, anchors in documents:
+            writer.write_codes(codes, anchors)
+
+    with SidecarReader(tmp_path / "s.vxsc") as reader:
+        hits = list(EmergencyScanner().scan_sidecar(reader))
+    assert [(hit.document, hit.anchor, hit.code) for hit in hits] == [(0, 0, 0x21), (0, 5, 0xE3), (2, 4, 0x3FFF)]
+
+
+@pytest.mark.parametrize("config", [InlineMarkerConfig(), InlineMarkerConfig(compact=True)])
+def test_non_ascii_whitespace_counts_as_separator(config):
+    text = "alpha\u00a0beta\u3000gamma delta"
+    encoded = InlineEncoder(Tokenizer(), config, preserve_layout=True).encode(text, [_annotation(3, 5, 1)])
+    decoded = InlineDecoder(Tokenizer(), config).decode(encoded)
+
+    scanner = EmergencyScanner(config)
+    assert [block.span.anchor for block in decoded.blocks] == [3]
+    assert [hit.anchor for hit in scanner.scan(encoded)] == [3]
+    assert [hit.anchor for hit in scanner.scan(encoded.encode("utf-8"))] == [3]
+
+
+@pytest.mark.parametrize("data", [
+    b"\xf4\x90\x80\x81",        # lead F4 beyond U+10FFFF
+    b"\xf3\x80\x80\x81 tail",   # plane 12, not a compact marker
+    "\uE000ffff\uE001".encode(),  # hex payload above 0x3FFF
+])
+def test_invalid_bytes_are_skipped(data):
+    scanner = EmergencyScanner(InlineMarkerConfig(compact=True))
+    assert scanner.scan(data) == []
+    assert EmergencyScanner().scan(data) == []
@@ -0,0 +1,91 @@
+import pytest
+
+from vibex import InlineDecoder, InlineEncoder, MetaBlockDecodingError, SentimentAnnotation, Tokenizer
+
+
+def _encode(text, annotations):
+    return InlineEncoder(Tokenizer()).encode(text, annotations)
+
+
+def test_fast_decode_matches_tokenizing_decode():
+    text = "I loved the performance but the ending felt rushed"
+    encoded = _encode(
+        text,
+        [
+            SentimentAnnotation(anchor=0, length=1, polarity=2, intensity=1, context=0, emotion=1),
+            SentimentAnnotation(anchor=7, length=2, polarity=1, intensity=5, context=1, emotion=4),
+            SentimentAnnotation(anchor=7, length=1, polarity=3, intensity=2, context=1, emotion=6),
+            SentimentAnnotation(anchor=8, length=1, polarity=1, intensity=7, context=0, emotion=3),
+        ],
+    )
+    decoder = InlineDecoder(Tokenizer())
+
+    assert decoder.decode_fast(encoded) == decoder.decode(encoded)
+
+
+def test_fast_decode_returns_unannotated_text_unchanged():
+    text = "plain  text\nwith\tlayout"
+    decoded = InlineDecoder(Tokenizer()).decode_fast(text)
+
+    assert decoded.clean_text is text
+    assert decoded.blocks == []
+
+
+def test_fast_decode_splits_unannotated_text_on_demand():
+    class CountingTokenizer(Tokenizer):
+        calls = 0
+
+        def tokenize(self, text):
+            CountingTokenizer.calls += 1
+            return super().tokenize(text)
+
+    tokenizer = CountingTokenizer()
+    decoded = InlineDecoder(tokenizer).decode_fast("plain text")
+    assert CountingTokenizer.calls == 0
+
+    assert decoded.clean_tokens == ["plain", "text"]
+    assert decoded.clean_tokens is decoded.clean_tokens
+    assert CountingTokenizer.calls == 1
+    assert decoded == InlineDecoder(Tokenizer()).decode("plain text")
+    assert InlineDecoder(Tokenizer()).decode("plain text") == decoded
+
+
+def test_fast_decode_keeps_whitespace_and_mid_token_prefixes():
+    encoded = _encode("a b", [SentimentAnnotation(anchor=1, length=1, polarity=1, intensity=1, context=0, emotion=0)])
+    text = "x\uE0000000\uE001y\n\n" + encoded.replace(" ", "\t")
+
+    decoded = InlineDecoder(Tokenizer()).decode_fast(text)
+
+    assert decoded.clean_text == "x\uE0000000\uE001y\n\na\tb"
+    assert [block.span.anchor for block in decoded.blocks] == [2]
+
+
+def test_fast_decode_rejects_unterminated_marker():
+    with pytest.raises(MetaBlockDecodingError):
+        InlineDecoder(Tokenizer()).decode_fast("broken \uE0000a82 marker")
+
+
+@pytest.mark.parametrize(
+    "text",
+    [
+        "baa\na",
+        "x  1fy",
+        "x +1fy",
+        "x 0x1fy",
+        "x 1_fy",
+        "x y",
+    ],
+)
+def test_every_decode_path_rejects_malformed_markers(text):
+    decoder = InlineDecoder(Tokenizer())
+    paths = [
+        decoder.decode,
+        decoder.decode_fast,
+        lambda t: decoder.decode_lazy(t).codes,
+        lambda t: decoder.decode_batch([t]),
+        lambda t: list(decoder.decode_stream([t])),
+        InlineDecoder(Tokenizer(), preserve_layout=True).decode,
+    ]
+    for decode in paths:
+        with pytest.raises(MetaBlockDecodingError):
+            decode(text)
@@ -0,0 +1,88 @@
+import random
+
+import pytest
+
+from vibex import IndexFormatError, MetaBlock, MetaBlockArray, SidecarReader, SidecarWriter
+from vibex.index import Bitmap, BitmapIndex
+from vibex.query import compile_query
+
+
+def _corpus(documents=300, seed=7):
+    rng = random.Random(seed)
+    corpus = []
+    for _ in range(documents):
+        size = rng.choice([0, 1, 2, 5])
+        codes = [rng.randrange(1 << 14) for _ in range(size)]
+        corpus.append(MetaBlockArray(codes, sorted(rng.randrange(50) for _ in range(size)), [1] * size))
+    return corpus
+
+
+def test_bitmap_set_operations_across_container_kinds():
+    sparse = set(range(0, 200_000, 97))
+    dense = set(range(65_536, 140_000)) | {5, 7}
+    a, b = Bitmap.from_sorted(sorted(sparse)), Bitmap.from_sorted(sorted(dense))
+
+    assert set(a & b) == sparse & dense
+    assert set(a | b) == sparse | dense
+    assert set(a - b) == sparse - dense
+    assert set(b.invert(150_000)) == set(range(150_000)) - dense
+    assert len(a) == len(sparse) and 97 in a and 98 not in a
+
+    restored, end = Bitmap.from_bytes(b.to_bytes())
+    assert restored == b and end == len(b.to_bytes())
+
+
+def test_index_matches_full_scan(tmp_path):
+    corpus = _corpus()
+    index = BitmapIndex.from_documents(corpus)
+    expression = "(polarity == NEG & intensity >= 5) | reserved & !context"
+    query = compile_query(expression)
+
+    expected_spans = [(doc, blocks.anchors[i]) for doc, blocks in enumerate(corpus) for i in query.select(blocks)]
+    assert list(index.positions(index.spans(expression))) == expected_spans
+    assert list(index.documents(expression)) == [doc for doc, blocks in enumerate(corpus) if query.select(blocks)]
+
+    loose = index.documents("reserved & intensity == 7", same_span=False)
+    assert list(loose) == [
+        doc for doc, blocks in enumerate(corpus)
+        if any(MetaBlock.from_int(c).reserved for c in blocks.codes)
+        and any(MetaBlock.from_int(c).intensity == 7 for c in blocks.codes)
+    ]
+
+    path = tmp_path / "corpus.vxbi"
+    index.save(path)
+    loaded = BitmapIndex.load(path)
+    assert loaded.span_count == index.span_count
+    assert list(loaded.spans(expression)) == list(index.spans(expression))
+
+
+def test_index_from_sidecar(tmp_path):
+    corpus = _corpus(documents=20)
+    path = tmp_path / "corpus.vxsc"
+    with SidecarWriter(path) as writer:
+        for blocks in corpus:
+            writer.write(blocks)
+
+    with SidecarReader(path) as reader:
+        index = BitmapIndex.from_sidecar(reader)
+
+    assert index.document_count == 20
+    assert list(index.documents("emotion == 3")) == list(BitmapIndex.from_documents(corpus).documents("emotion == 3"))
+
+
+def test_load_rejects_foreign_files(tmp_path):
+    path = tmp_path / "junk.vxbi"
+    path.write_bytes(b"JUNK" + bytes(40))
+
+    with pytest.raises(IndexFormatError):
+        BitmapIndex.load(path)
+
+
+def test_load_rejects_truncated_files(tmp_path):
+    BitmapIndex.from_documents(_corpus(documents=40)).save(tmp_path / "full.vxbi")
+    data = (tmp_path / "full.vxbi").read_bytes()
+
+    for cut in range(0, len(data), 7):
+        (tmp_path / "cut.vxbi").write_bytes(data[:cut])
+        with pytest.raises(IndexFormatError):
+            BitmapIndex.load(tmp_path / "cut.vxbi")
@@ -0,0 +1,40 @@
+import pytest
+
+from vibex import InlineDecoder, InlineEncoder, InlineMarkerConfig, SentimentAnnotation, Tokenizer
+
+TEXT = "we  waited\tall day for a reply that never came"
+
+
+def _annotation(anchor, polarity, length=1):
+    return SentimentAnnotation(anchor=anchor, length=length, polarity=polarity, intensity=4, context=1, emotion=3)
+
+
+@pytest.mark.parametrize("config", [InlineMarkerConfig(), InlineMarkerConfig(compact=True)])
+def test_lazy_decode_matches_decode_fast(config):
+    annotations = [_annotation(0, 1), _annotation(2, 2, length=4), _annotation(2, 1), _annotation(9, 3)]
+    encoded = InlineEncoder(Tokenizer(), config, preserve_layout=True).encode(TEXT, annotations)
+    decoder = InlineDecoder(Tokenizer(), config)
+
+    eager = decoder.decode_fast(encoded)
+    lazy = decoder.decode_lazy(encoded)
+
+    assert "clean_text" not in vars(lazy)
+    assert len(lazy) == 4
+    assert lazy.count_by("polarity") == {1: 2, 2: 1, 3: 1}
+    assert [(span.anchor, span.length) for _, span in lazy.iter_blocks()] == [(0, 1), (2, 1), (2, 4), (9, 1)]
+    assert "clean_text" not in vars(lazy)
+
+    assert lazy.clean_text == eager.clean_text == TEXT
+    assert lazy.clean_tokens == eager.clean_tokens
+    assert lazy.blocks == eager.blocks
+    assert lazy.blocks is lazy.blocks
+    assert lazy.to_array().anchors.tolist() == [0, 2, 2, 9]
+
+
+def test_lazy_decode_without_markers_keeps_text():
+    lazy = InlineDecoder(Tokenizer()).decode_lazy(TEXT)
+    assert lazy.clean_text is TEXT
+    assert lazy.blocks == []
+    assert lazy.count_by("emotion") == {}
+    with pytest.raises(ValueError):
+        lazy.count_by("mood")
@@ -0,0 +1,41 @@
+import pytest
+
+from vibex import MetaBlock, MetaBlockDecodingError, MetaBlockEncodingError
+
+
+def test_from_hex_returns_interned_block():
+    block = MetaBlock.from_hex("2a82")
+
+    assert block is MetaBlock.from_hex("2a82")
+    assert block is MetaBlock.from_int(0x2A82)
+    assert block.to_int() == 0x2A82
+    assert block.to_hex() == "2a82"
+
+
+def test_tables_round_trip_every_value():
+    for value in range(1 << 14):
+        block = MetaBlock.from_int(value)
+        assert MetaBlock.from_hex(f"{value:04x}") is block
+        assert MetaBlock.from_int(block.to_int()) is block
+
+
+def test_span_bits_without_span_flag_share_canonical_block():
+    assert MetaBlock.from_int(0x0482) is MetaBlock.from_int(0x0082)
+    assert MetaBlock.from_int(0x0482).to_int() == 0x0082
+
+
+def test_non_canonical_hex_uses_slow_path():
+    assert MetaBlock.from_hex("2A82") == MetaBlock.from_hex("2a82")
+
+    with pytest.raises(MetaBlockDecodingError):
+        MetaBlock.from_hex("zz")
+
+
+def test_constructed_blocks_still_validate():
+    block = MetaBlock(has_span=True, span=None, polarity=1, intensity=1, context=0, emotion=0, reserved=0)
+
+    with pytest.raises(MetaBlockEncodingError):
+        block.to_int()
+
+    with pytest.raises(MetaBlockDecodingError):
+        MetaBlock.from_int(1 << 14)
@@ -0,0 +1,43 @@
+import pytest
+
+from vibex import InlineDecoder, InlineEncoder, MetaBlockArray, SentimentAnnotation, Tokenizer
+
+
+def _decoded_blocks():
+    text = "I loved the performance but the ending felt rushed"
+    annotations = [
+        SentimentAnnotation(anchor=1, length=1, polarity=2, intensity=6, context=0, emotion=1),
+        SentimentAnnotation(anchor=7, length=2, polarity=1, intensity=5, context=1, emotion=4, reserved=1),
+    ]
+    encoded = InlineEncoder(Tokenizer()).encode(text, annotations)
+    return InlineDecoder(Tokenizer()).decode(encoded).blocks
+
+
+def test_round_trip_with_inline_blocks():
+    blocks = _decoded_blocks()
+    batch = MetaBlockArray.from_inline_blocks(blocks)
+
+    assert len(batch) == 2
+    assert batch.nbytes == 20
+    assert batch.to_inline_blocks() == blocks
+    assert batch.block(1) is blocks[1].block
+    assert batch.token_span(1) == blocks[1].span
+
+
+def test_mismatched_buffers_are_rejected():
+    with pytest.raises(ValueError):
+        MetaBlockArray(codes=[1, 2], anchors=[0], lengths=[1, 1])
+
+
+def test_vectorized_fields():
+    pytest.importorskip("numpy")
+    batch = MetaBlockArray.from_inline_blocks(_decoded_blocks())
+
+    assert batch.polarity.tolist() == [2, 1]
+    assert batch.intensity.tolist() == [6, 5]
+    assert batch.context.tolist() == [0, 1]
+    assert batch.emotion.tolist() == [1, 4]
+    assert batch.has_span.tolist() == [0, 1]
+    assert batch.span.tolist() == [0, 1]
+    assert batch.reserved.tolist() == [0, 1]
+    assert batch.anchors_view().tolist() == [1, 7]
@@ -0,0 +1,53 @@
+import json
+
+import pytest
+
+from vibex import InlineDecoder, InlineEncoder, MetaBlockDecodingError, SentimentAnnotation, Tokenizer
+from vibex.metrics import MetricsAggregator, MetricsSink
+
+TEXT = "support never answered my emails"
+
+
+def _annotation(anchor):
+    return SentimentAnnotation(anchor=anchor, length=2, polarity=1, intensity=6, context=0, emotion=4)
+
+
+def test_stages_and_counters_are_reported():
+    metrics = MetricsAggregator()
+    assert isinstance(metrics, MetricsSink)
+
+    encoded = InlineEncoder(Tokenizer(), metrics=metrics).encode(TEXT, [_annotation(1), _annotation(3)])
+    decoded = InlineDecoder(Tokenizer(), metrics=metrics).decode(encoded)
+
+    assert decoded.clean_text == TEXT
+    assert encoded == InlineEncoder(Tokenizer()).encode(TEXT, [_annotation(1), _annotation(3)])
+
+    snapshot = metrics.snapshot()
+    counters = snapshot["counters"]
+    assert counters["encode.documents"] == counters["decode.documents"] == 1
+    assert counters["encode.markers"] == counters["decode.markers"] == 2
+    assert counters["decode.tokens"] == 5
+    assert counters["decode.bytes_in"] == counters["encode.bytes_out"] == len(encoded.encode("utf-8"))
+    assert set(snapshot["stages"]) == {
+        "encode.tokenize", "encode.inject", "encode.detokenize",
+        "decode.tokenize", "decode.extract", "decode.parse", "decode.detokenize",
+    }
+    assert json.loads(metrics.to_json()) == snapshot
+
+
+def test_errors_are_counted_and_prometheus_export():
+    metrics = MetricsAggregator()
+    decoder = InlineDecoder(Tokenizer(), metrics=metrics, preserve_layout=True)
+
+    with pytest.raises(MetaBlockDecodingError):
+        decoder.decode("broken \uE000zz")
+    decoder.decode(TEXT)
+
+    text = metrics.to_prometheus()
+    assert "vibex_decode_errors_total 1" in text
+    assert "vibex_decode_documents_total 1" in text
+    assert 'vibex_stage_seconds_count{stage="decode.scan"} 1' in text
+    assert 'vibex_stage_seconds_bucket{stage="decode.scan",le="+Inf"} 1' in text
+
+    metrics.reset()
+    assert metrics.snapshot() == {"counters": {}, "stages": {}}
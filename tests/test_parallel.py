@@ -0,0 +1,86 @@
+import os
+
+import pytest
+
+from vibex import InlineDecoder, InlineEncoder, InlineMarkerConfig, MetaBlockEncodingError, SentimentAnnotation, Tokenizer
+from vibex.parallel import ParallelCodec, free_threaded
+
+TEXTS = [f"document {index} says café is great and the queue is slow" for index in range(23)]
+TEXTS[5] = ""
+TEXTS[9] = "no annotations here"
+
+
+def _annotations(index, text):
+    if index in (5, 9):
+        return []
+    return [
+        SentimentAnnotation(anchor=1, length=2, polarity=2, intensity=index % 8, context=0, emotion=1),
+        SentimentAnnotation(anchor=6, length=1, polarity=1, intensity=3, context=1, emotion=4, reserved=index & 1),
+        SentimentAnnotation(anchor=6, length=3, polarity=3, intensity=5, context=0, emotion=2),
+    ]
+
+
+ANNOTATIONS = [_annotations(index, text) for index, text in enumerate(TEXTS)]
+
+
+@pytest.mark.parametrize("backend", ["thread", "process"])
+@pytest.mark.parametrize("config", [InlineMarkerConfig(), InlineMarkerConfig(compact=True)])
+def test_matches_serial_batches(backend, config):
+    encoder = InlineEncoder(Tokenizer(), config)
+    decoder = InlineDecoder(Tokenizer(), config)
+    encoded = encoder.encode_batch(TEXTS, ANNOTATIONS)
+    expected = decoder.decode_batch(encoded)
+
+    with ParallelCodec(encoder, decoder, workers=2, backend=backend, chunk_size=4) as codec:
+        assert codec.encode_batch(TEXTS, ANNOTATIONS) == encoded
+        decoded = codec.decode_batch(encoded)
+
+    assert decoded.clean_texts == expected.clean_texts
+    assert list(decoded.offsets) == list(expected.offsets)
+    assert list(decoded.blocks.codes) == list(expected.blocks.codes)
+    assert list(decoded.blocks.anchors) == list(expected.blocks.anchors)
+    assert list(decoded.blocks.lengths) == list(expected.blocks.lengths)
+
+
+def test_backend_selection_and_inline_mode():
+    codec = ParallelCodec(decoder=InlineDecoder(Tokenizer()), workers=1)
+    assert codec.backend == ("thread" if free_threaded() else "process")
+    assert codec.decode_batch([]).clean_texts == []
+    with pytest.raises(ValueError):
+        codec.encode_batch([], [])
+    codec.close()
+
+    with pytest.raises(ValueError):
+        ParallelCodec(backend="interpreter")
+
+
+def _shm_segments():
+    return {name for name in os.listdir("/dev/shm") if name.startswith("psm_")}
+
+
+@pytest.mark.skipif(not os.path.isdir("/dev/shm"), reason="needs POSIX shared memory")
+def test_failed_batch_leaves_no_segments():
+    before = _shm_segments()
+    annotations = [list(annotations) for annotations in ANNOTATIONS]
+    annotations[11] = [SentimentAnnotation(anchor=99, length=1, polarity=1, intensity=1, context=0, emotion=0)]
+
+    with ParallelCodec(InlineEncoder(Tokenizer()), workers=4, backend="process", chunk_size=1) as codec:
+        with pytest.raises(MetaBlockEncodingError):
+            codec.encode_batch(TEXTS, annotations)
+
+    assert _shm_segments() == before
+
+
+@pytest.mark.parametrize("invalid", [
+    SentimentAnnotation(anchor=0, length=1, polarity=5, intensity=1, context=0, emotion=0),
+    SentimentAnnotation(anchor=0, length=0, polarity=1, intensity=1, context=0, emotion=0),
+])
+def test_process_backend_sees_raw_annotation_fields(invalid):
+    encoder = InlineEncoder(Tokenizer(), merge_policy="error")
+    annotations = [[invalid] if index == 3 else [] for index in range(len(TEXTS))]
+
+    with pytest.raises(MetaBlockEncodingError):
+        encoder.encode_batch(TEXTS, annotations)
+    with ParallelCodec(encoder, workers=2, backend="process", chunk_size=4) as codec:
+        with pytest.raises(MetaBlockEncodingError):
+            codec.encode_batch(TEXTS, annotations)
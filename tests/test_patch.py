@@ -0,0 +1,82 @@
+import re
+
+import pytest
+
+from vibex import (
+    AnnotationDiff,
+    InlineDecoder,
+    InlineEncoder,
+    InlineMarkerConfig,
+    InlinePatcher,
+    MetaBlockEncodingError,
+    SentimentAnnotation,
+    Tokenizer,
+)
+
+TEXT = "the release slipped again\nand nobody told us"
+
+
+class _Words:
+    """Whitespace tokenizer that is not a ``Tokenizer``, so patches take the re-encode path."""
+
+    def tokenize(self, text):
+        return text.split()
+
+    def detokenize(self, tokens):
+        return " ".join(tokens)
+
+    def spans(self, text):
+        return [match.span() for match in re.finditer(r"\S+", text)]
+
+    def iter_spans(self, text):
+        return iter(self.spans(text))
+
+
+def _annotation(anchor, intensity, length=1):
+    return SentimentAnnotation(anchor=anchor, length=length, polarity=1, intensity=intensity, context=0, emotion=2)
+
+
+def _expected(config, annotations):
+    return InlineEncoder(Tokenizer(), config, preserve_layout=True).encode(TEXT, annotations)
+
+
+@pytest.mark.parametrize("config", [InlineMarkerConfig(), InlineMarkerConfig(compact=True)])
+def test_patch_matches_full_reencode(config):
+    original = [_annotation(0, 1), _annotation(2, 2, length=3), _annotation(2, 3), _annotation(5, 4)]
+    encoded = _expected(config, original)
+    patcher = InlinePatcher(Tokenizer(), config)
+
+    diff = AnnotationDiff(
+        add=(_annotation(2, 7), _annotation(7, 6)),
+        remove=(0,),
+        replace=(_annotation(5, 5),),
+    )
+    patched = patcher.apply(encoded, diff)
+
+    assert patched == _expected(config, [original[1], original[2], _annotation(2, 7), _annotation(5, 5), _annotation(7, 6)])
+    assert InlineDecoder(Tokenizer(), config, preserve_layout=True).decode(patched).clean_text == TEXT
+
+
+def test_patch_leaves_untouched_text_alone():
+    encoded = _expected(InlineMarkerConfig(), [_annotation(1, 1)])
+    patcher = InlinePatcher(Tokenizer())
+
+    assert patcher.apply(encoded, AnnotationDiff()) is encoded
+    assert patcher.apply(encoded, AnnotationDiff(remove=(3,))) == encoded
+    assert patcher.apply(encoded, AnnotationDiff(remove=(1,))) == TEXT
+
+
+def test_patch_rejects_out_of_bounds_anchor():
+    with pytest.raises(MetaBlockEncodingError):
+        InlinePatcher(Tokenizer()).apply(TEXT, AnnotationDiff(add=(_annotation(8, 1),)))
+
+
+def test_reencode_path_keeps_existing_codes():
+    # 0x2000 (span flag with span 0) has no SentimentAnnotation form.
+    encoded = InlineEncoder(Tokenizer(), preserve_layout=True).encode_codes(TEXT, [0x2000, 0x0042, 0x2C00], [1, 3, 3])
+    diff = AnnotationDiff(add=(_annotation(3, 7), _annotation(5, 1)), replace=(_annotation(6, 2),))
+
+    patched = InlinePatcher(_Words()).apply(encoded, diff)
+
+    assert patched == InlinePatcher(Tokenizer()).apply(encoded, diff)
+    assert "\uE0002000\uE001release" in patched
@@ -0,0 +1,38 @@
+import pytest
+
+from vibex import InlineDecoder, InlineEncoder, MetaBlockEncodingError, SentimentAnnotation, Tokenizer
+
+TEXT = "  Dear team,\n\n\tthe release   slipped\r\nagain.  "
+
+
+def _annotation(anchor, length=1):
+    return SentimentAnnotation(anchor=anchor, length=length, polarity=1, intensity=5, context=0, emotion=6)
+
+
+def test_tokenizer_spans_point_into_the_original_text():
+    tokenizer = Tokenizer()
+    spans = tokenizer.spans(TEXT)
+
+    assert [TEXT[start:end] for start, end in spans] == tokenizer.tokenize(TEXT)
+    assert next(tokenizer.iter_spans(TEXT)) == spans[0]
+
+
+def test_layout_survives_encode_decode():
+    encoder = InlineEncoder(Tokenizer(), preserve_layout=True)
+    decoder = InlineDecoder(Tokenizer(), preserve_layout=True)
+
+    encoded = encoder.encode(TEXT, [_annotation(0), _annotation(3, length=2), _annotation(3), _annotation(5)])
+    decoded = decoder.decode(encoded)
+
+    assert decoded.clean_text == TEXT
+    assert [block.span.anchor for block in decoded.blocks] == [0, 3, 3, 5]
+    assert decoded.clean_tokens == Tokenizer().tokenize(TEXT)
+
+    # Same markers and anchors as the default, whitespace-normalizing path.
+    normalized = InlineEncoder(Tokenizer()).encode(TEXT, [_annotation(0), _annotation(3, length=2), _annotation(3), _annotation(5)])
+    assert " ".join(encoded.split()) == normalized
+
+
+def test_layout_encoder_checks_anchor_bounds():
+    with pytest.raises(MetaBlockEncodingError):
+        InlineEncoder(Tokenizer(), preserve_layout=True).encode(TEXT, [_annotation(6)])
@@ -0,0 +1,81 @@
+import pytest
+
+from vibex import MetaBlock, MetaBlockArray, QuerySyntaxError, SidecarReader, SidecarWriter
+from vibex.query import NEG, Predicate, compile_query, context, intensity, parse, polarity, reserved
+
+
+def _codes():
+    return list(range(1 << 14))
+
+
+def _expected(block):
+    return block.polarity == NEG and block.intensity >= 5 and block.context == 1
+
+
+def test_string_and_python_forms_agree_with_attribute_checks():
+    from_string = compile_query("polarity == NEG & intensity >= 5 & context == 1")
+    from_python = ((polarity == NEG) & (intensity >= 5) & (context == 1)).compile()
+
+    expected = [code for code in _codes() if _expected(MetaBlock.from_int(code))]
+    assert from_string.select(_codes()) == expected
+    assert from_python.codes() == expected
+    assert from_string.bits == from_python.bits
+
+
+def test_precedence_negation_and_bare_fields():
+    query = compile_query("not (polarity = POS or polarity == NEUTRAL) && reserved")
+
+    for code in _codes():
+        block = MetaBlock.from_int(code)
+        assert query.matches(code) == (block.polarity in (1, 3) and block.reserved == 1)
+
+    assert compile_query(~(reserved == 1)).matches(MetaBlock.from_int(0))
+
+
+def test_query_over_arrays_and_sidecars(tmp_path):
+    query = compile_query("reserved == 1 & intensity > 6")
+    batch = MetaBlockArray(codes=[0x00E1, 0x00E0, 0x2AE1, 0x0001], anchors=[0, 1, 2, 3], lengths=[1, 1, 2, 1])
+
+    assert query.select(batch) == [0, 2]
+    assert query.count(batch) == 2
+    assert query.filter(batch.to_inline_blocks()) == [batch.to_inline_blocks()[0], batch.to_inline_blocks()[2]]
+
+    path = tmp_path / "s.vxsc"
+    with SidecarWriter(path) as writer:
+        writer.write(batch)
+        writer.write_codes([0x0001], [0])
+        writer.write_codes([0x00E1], [4])
+
+    with SidecarReader(path) as reader:
+        assert list(query.search(reader)) == [(0, 0), (0, 2), (2, 0)]
+        assert list(query.documents(reader)) == [0, 2]
+
+
+def test_numpy_mask():
+    numpy = pytest.importorskip("numpy")
+    query = compile_query("intensity >= 4")
+    codes = numpy.array([0x0080, 0x0060, 0x00E0], dtype=numpy.uint16)
+
+    assert query.mask(codes).tolist() == [True, False, True]
+
+
+@pytest.mark.parametrize("expression", ["polarity ==", "mood == 1", "polarity == SAD", "(context", "context 1"])
+def test_syntax_errors(expression):
+    with pytest.raises(QuerySyntaxError):
+        parse(expression)
+
+
+def test_out_of_range_codes_raise_everywhere():
+    query = compile_query("intensity >= 0")
+    for code in (-1, 1 << 14):
+        with pytest.raises(ValueError):
+            query.matches(code)
+
+    numpy = pytest.importorskip("numpy")
+    with pytest.raises(ValueError):
+        query.mask(numpy.array([1, 1 << 14]))
+
+
+def test_predicate_is_abstract():
+    with pytest.raises(TypeError):
+        Predicate()
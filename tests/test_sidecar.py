@@ -0,0 +1,81 @@
+import pytest
+
+from vibex import (
+    InlineDecoder,
+    InlineEncoder,
+    MetaBlockArray,
+    SentimentAnnotation,
+    SidecarFormatError,
+    SidecarReader,
+    SidecarWriter,
+    Tokenizer,
+)
+
+
+def _documents():
+    encoder = InlineEncoder(Tokenizer())
+    decoder = InlineDecoder(Tokenizer())
+    text = " ".join(f"w{i}" for i in range(400))
+    annotations = [
+        SentimentAnnotation(anchor=0, length=3, polarity=2, intensity=5, context=0, emotion=1),
+        SentimentAnnotation(anchor=130, length=1, polarity=1, intensity=7, context=1, emotion=6, reserved=1),
+        SentimentAnnotation(anchor=399, length=8, polarity=3, intensity=2, context=1, emotion=4),
+    ]
+    return [
+        decoder.decode(encoder.encode(text, annotations)).blocks,
+        [],
+        decoder.decode(encoder.encode(text, annotations[1:2])).blocks,
+    ]
+
+
+def test_sidecar_round_trip(tmp_path):
+    path = tmp_path / "corpus.vxsc"
+    documents = _documents()
+
+    with SidecarWriter(path) as writer:
+        for blocks in documents:
+            writer.write(blocks)
+
+    with SidecarReader(path) as reader:
+        assert len(reader) == 3
+        assert [reader.count(doc) for doc in range(3)] == [3, 0, 1]
+        assert [reader.blocks(doc) for doc in range(3)] == documents
+        assert reader.document(0) == MetaBlockArray.from_inline_blocks(documents[0])
+
+        codes = reader.codes(0)
+        assert codes.tolist() == list(reader.document(0).codes)
+        codes.release()
+
+        with pytest.raises(IndexError):
+            reader.document(3)
+
+
+def test_sidecar_numpy_view(tmp_path):
+    numpy = pytest.importorskip("numpy")
+    path = tmp_path / "corpus.vxsc"
+    with SidecarWriter(path) as writer:
+        writer.write_codes([0x2A82, 0x0001], [5, 2])
+
+    reader = SidecarReader(path)
+    view = reader.codes_array(0)
+    assert view.dtype == numpy.dtype("<u2")
+    assert view.tolist() == [0x2A82, 0x0001]
+    assert list(reader.anchors(0)) == [5, 2]
+    del view
+    reader.close()
+
+
+def test_sidecar_rejects_foreign_files(tmp_path):
+    path = tmp_path / "not-a-sidecar.bin"
+    path.write_bytes(b"JUNK" + bytes(60))
+
+    with pytest.raises(SidecarFormatError):
+        SidecarReader(path)
+
+
+def test_sidecar_rejects_empty_files(tmp_path):
+    path = tmp_path / "empty.vbx"
+    path.write_bytes(b"")
+
+    with pytest.raises(SidecarFormatError):
+        SidecarReader(path)
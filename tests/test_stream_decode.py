@@ -0,0 +1,41 @@
+import io
+
+from vibex import InlineDecoder, InlineEncoder, InlineMetaBlock, SentimentAnnotation, Tokenizer
+
+
+def _encoded():
+    text = " ".join(f"word{i}" for i in range(40))
+    annotations = [
+        SentimentAnnotation(anchor=i, length=1 + i % 3, polarity=i % 4, intensity=i % 8, context=0, emotion=i % 8)
+        for i in range(0, 40, 3)
+    ]
+    return InlineEncoder(Tokenizer()).encode(text, annotations)
+
+
+def _collect(items):
+    text = "".join(item for item in items if isinstance(item, str))
+    blocks = [item for item in items if isinstance(item, InlineMetaBlock)]
+    return text, blocks
+
+
+def test_stream_decode_matches_fast_decode_for_any_chunking():
+    encoded = _encoded()
+    decoder = InlineDecoder(Tokenizer())
+    expected = decoder.decode_fast(encoded)
+
+    for size in (1, 2, 5, 7, 64, 4096):
+        chunks = [encoded[i:i + size] for i in range(0, len(encoded), size)]
+        text, blocks = _collect(list(decoder.decode_stream(chunks)))
+
+        assert text == expected.clean_text
+        assert blocks == expected.blocks
+
+
+def test_stream_decode_reads_file_objects():
+    encoded = _encoded()
+    decoder = InlineDecoder(Tokenizer())
+
+    text, blocks = _collect(list(decoder.decode_stream(io.StringIO(encoded), chunk_size=3)))
+
+    assert text == decoder.decode(encoded).clean_text
+    assert blocks == decoder.decode(encoded).blocks
@@ -0,0 +1,50 @@
+import io
+
+import pytest
+
+from vibex import InlineDecoder, InlineEncoder, MetaBlockEncodingError, SentimentAnnotation, Tokenizer
+
+
+TEXT = " ".join(f"word{i}" for i in range(30))
+
+ANNOTATIONS = [
+    SentimentAnnotation(anchor=0, length=1, polarity=2, intensity=3, context=0, emotion=1),
+    SentimentAnnotation(anchor=4, length=2, polarity=1, intensity=6, context=1, emotion=6),
+    SentimentAnnotation(anchor=4, length=1, polarity=3, intensity=2, context=1, emotion=4),
+    SentimentAnnotation(anchor=29, length=1, polarity=1, intensity=7, context=0, emotion=3, reserved=1),
+]
+
+
+def test_stream_encode_matches_encode_for_any_chunking():
+    encoder = InlineEncoder(Tokenizer())
+    expected = encoder.encode(TEXT, ANNOTATIONS)
+
+    for size in (1, 3, 8, 4096):
+        chunks = [TEXT[i:i + size] for i in range(0, len(TEXT), size)]
+        assert "".join(encoder.encode_stream(chunks, ANNOTATIONS)) == expected
+
+
+def test_stream_encode_keeps_layout_and_round_trips():
+    text = TEXT.replace(" ", "\n", 3)
+    encoded = "".join(InlineEncoder(Tokenizer()).encode_stream(io.StringIO(text), ANNOTATIONS, chunk_size=5))
+    decoded = InlineDecoder(Tokenizer()).decode_fast(encoded)
+
+    assert decoded.clean_text == text
+    assert [block.span.anchor for block in decoded.blocks] == [0, 4, 4, 29]
+
+
+def test_stream_encode_rejects_unsorted_anchors_lazily():
+    annotations = [ANNOTATIONS[1], ANNOTATIONS[0]]
+    stream = InlineEncoder(Tokenizer()).encode_stream([TEXT], annotations)
+
+    with pytest.raises(MetaBlockEncodingError):
+        list(stream)
+
+
+def test_stream_encode_rejects_out_of_bounds_anchor_at_end():
+    annotation = SentimentAnnotation(anchor=30, length=1, polarity=1, intensity=1, context=0, emotion=0)
+    stream = InlineEncoder(Tokenizer()).encode_stream([TEXT[:20], TEXT[20:]], [annotation])
+
+    assert next(stream) == TEXT[:20][:TEXT[:20].rfind(" ") + 1]
+    with pytest.raises(MetaBlockEncodingError):
+        list(stream)
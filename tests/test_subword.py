@@ -0,0 +1,100 @@
+import gc
+import json
+import pickle
+
+import pytest
+
+from vibex import BPETokenizer, InlineDecoder, InlineEncoder, SentimentAnnotation, Tokenizer, TokenizerProtocol, subword
+from vibex.subword import alignment
+
+MERGES = ["▁ u", "▁u n", "h a", "ha p", "hap p", "y !", "▁ d", "▁d a", "▁da y"]
+VOCAB = {piece: index for index, piece in enumerate(["▁un", "happ", "y!", "▁day", "▁", "y", "!"])}
+
+
+@pytest.fixture
+def tokenizer(tmp_path):
+    (tmp_path / "vocab.json").write_text(json.dumps(VOCAB), encoding="utf-8")
+    (tmp_path / "merges.txt").write_text("#version: 0.2\n" + "\n".join(MERGES) + "\n", encoding="utf-8")
+    return BPETokenizer.from_files(tmp_path / "vocab.json", tmp_path / "merges.txt")
+
+
+def _annotation(anchor, length=1):
+    return SentimentAnnotation(anchor=anchor, length=length, polarity=2, intensity=3, context=0, emotion=1)
+
+
+def test_bpe_tokenize_and_alignment(tokenizer):
+    text = "unhappy!  day"
+    assert tokenizer.tokenize(text) == ["▁un", "happ", "y!", "▁day"]
+    assert tokenizer.detokenize(tokenizer.tokenize(text)) == "unhappy! day"
+    assert tokenizer.ids(text) == [0, 1, 2, 3]
+    assert isinstance(tokenizer, TokenizerProtocol)
+
+    aligned = tokenizer.alignment(text)
+    assert [text[start:end] for start, end in aligned.spans] == ["un", "happ", "y!", "day"]
+    assert list(aligned.word_of) == [0, 0, 0, 1]
+    assert aligned.word_to_subword(1) == 3
+    assert aligned.words_covered(1, 3) == (0, 2)
+    assert aligned.subword_at(4) == 1
+    assert tokenizer.alignment(text) is aligned  # cached
+
+
+def test_subword_anchors_round_trip_mid_word(tokenizer):
+    text = "unhappy!  day"
+    annotations = [_annotation(1, length=2), _annotation(3)]
+
+    encoded = InlineEncoder(tokenizer).encode(text, annotations)
+    assert encoded.startswith("un")
+
+    decoded = InlineDecoder(tokenizer).decode(encoded)
+    assert decoded.clean_text == text
+    assert decoded.clean_tokens == tokenizer.tokenize(text)
+    assert [(b.span.anchor, b.span.length) for b in decoded.blocks] == [(1, 2), (3, 1)]
+
+
+def test_whitespace_tokenizer_still_ignores_mid_token_markers(tokenizer):
+    encoded = InlineEncoder(tokenizer).encode("unhappy! day", [_annotation(1)])
+    decoded = InlineDecoder(Tokenizer()).decode(encoded)
+    assert decoded.blocks == []
+
+
+def test_whitespace_only_paths_reject_subword_tokenizers(tokenizer):
+    with pytest.raises(TypeError, match="BPETokenizer"):
+        InlineEncoder(tokenizer).encode_stream(["unhappy! day"], [_annotation(0)])
+    with pytest.raises(TypeError, match="BPETokenizer"):
+        InlineDecoder(tokenizer).decode_stream(["unhappy! day"])
+    with pytest.raises(TypeError, match="BPETokenizer"):
+        InlineDecoder(tokenizer).decode_batch(["unhappy! day"])
+
+
+def test_bpe_tokenizer_pickles_without_its_caches(tokenizer):
+    text = "unhappy!  day"
+    aligned = tokenizer.alignment(text)
+    assert all(isinstance(key, bytes) for key in tokenizer._alignments._entries)  # texts are not kept
+
+    payload = pickle.dumps(tokenizer)
+    assert text.encode() not in payload
+    restored = pickle.loads(payload)
+
+    assert restored.tokenize(text) == tokenizer.tokenize(text)
+    assert restored.alignment(text) == aligned
+    assert restored.alignment(text) is restored.alignment(text)
+    assert InlineDecoder(restored).decode(InlineEncoder(restored).encode(text, [_annotation(1)])).blocks
+
+
+class _CharTokenizer:
+    def spans(self, text):
+        return [(index, index + 1) for index, char in enumerate(text) if not char.isspace()]
+
+
+def test_generic_alignment_cache_is_per_tokenizer_and_weak():
+    first = _CharTokenizer()
+    aligned = alignment(first, "ab c")
+    assert list(aligned.spans) == [(0, 1), (1, 2), (3, 4)]
+    assert alignment(first, "ab c") is aligned
+    assert alignment(_CharTokenizer(), "ab c") is not aligned
+
+    gc.collect()
+    assert list(subword._ALIGNMENTS) == [first]
+    del first
+    gc.collect()
+    assert len(subword._ALIGNMENTS) == 0
@@ -0,0 +1,100 @@
+import pytest
+
+from vibex import InlineDecoder, InlineEncoder, MetaBlockEncodingError, SentimentAnnotation, Tokenizer
+from vibex.metrics import MetricsAggregator
+from vibex.validation import normalize, overlaps, validate
+
+TEXT = "one two three four five six seven eight nine ten"
+
+
+def _annotation(anchor, length=1, intensity=3, polarity=1, emotion=2):
+    return SentimentAnnotation(anchor=anchor, length=length, polarity=polarity, intensity=intensity, context=0, emotion=emotion)
+
+
+@pytest.mark.parametrize("annotation, message", [
+    (SentimentAnnotation(anchor=0, length=1, polarity=4, intensity=1, context=0, emotion=0), "polarity 4"),
+    (SentimentAnnotation(anchor=0, length=1, polarity=1, intensity=9, context=0, emotion=0), "intensity 9"),
+    (SentimentAnnotation(anchor=0, length=9, polarity=1, intensity=1, context=0, emotion=0), "length 9"),
+    (SentimentAnnotation(anchor=0, length=1, polarity=1, intensity=1, context=0, emotion=0, reserved=2), "reserved 2"),
+    (_annotation(-1), "anchor index -1"),
+    (_annotation(8, length=3), "span 8..10"),
+])
+def test_validate_reports_first_bad_annotation(annotation, message):
+    with pytest.raises(MetaBlockEncodingError, match=f"Annotation 1: {message}"):
+        validate([_annotation(0), annotation], token_count=10)
+
+
+def test_validate_bulk_check_reports_the_earliest_error():
+    batch = [_annotation(index % 90) for index in range(1000)]
+    validate(batch, token_count=100)
+
+    batch[900] = _annotation(0, intensity=8)
+    batch[700] = _annotation(95, length=8)
+    with pytest.raises(MetaBlockEncodingError, match="Annotation 700: span 95..102"):
+        validate(batch, token_count=100)
+    with pytest.raises(MetaBlockEncodingError, match="Annotation 900: intensity 8"):
+        validate(batch)
+
+
+def test_overlap_sweep():
+    spans = [_annotation(5, 2), _annotation(0, 3), _annotation(2, 1), _annotation(4, 2), _annotation(9)]
+    assert overlaps(spans) == [(1, 2), (3, 0)]
+
+
+def test_policies():
+    weak_long = _annotation(0, length=5, intensity=2)
+    strong = _annotation(2, length=2, intensity=6)
+    separate = _annotation(7)
+    annotations = [weak_long, strong, separate, separate]
+
+    assert normalize(annotations, 10, "strongest") == [strong, separate]
+    assert normalize(annotations, 10, "split") == [
+        _annotation(0, length=2, intensity=2),
+        strong,
+        _annotation(4, length=1, intensity=2),
+        separate,
+    ]
+    with pytest.raises(MetaBlockEncodingError, match="anchors 0 .length 5. and 2 .length 2. overlap"):
+        normalize(annotations, 10, "error")
+
+    # No overlaps: only duplicates are dropped and the result is sorted.
+    assert normalize([separate, strong, separate], 10, "error") == [strong, separate]
+
+
+def test_ties_keep_first_annotation():
+    first = _annotation(3, emotion=1)
+    second = _annotation(3, emotion=5)
+    assert normalize([first, second]) == [first]
+    assert normalize([second, first]) == [second]
+
+
+@pytest.mark.parametrize("preserve_layout", [False, True])
+def test_encoder_merge_policy(preserve_layout):
+    annotations = [_annotation(1, intensity=2), _annotation(1, intensity=5), _annotation(0, length=3, intensity=1)]
+    encoder = InlineEncoder(Tokenizer(), preserve_layout=preserve_layout, merge_policy="strongest")
+    decoded = InlineDecoder(Tokenizer()).decode(encoder.encode(TEXT, annotations))
+
+    assert [(block.span.anchor, block.block.intensity) for block in decoded.blocks] == [(1, 5)]
+
+    with pytest.raises(MetaBlockEncodingError, match="out of bounds for 10 tokens"):
+        encoder.encode(TEXT, [_annotation(9, length=2)])
+    with pytest.raises(ValueError):
+        InlineEncoder(Tokenizer(), merge_policy="newest")
+
+
+def test_emergency_flag_outranks_intensity():
+    flagged = SentimentAnnotation(anchor=2, length=2, polarity=1, intensity=1, context=0, emotion=0, reserved=1)
+    loud = _annotation(1, length=4, intensity=7)
+
+    assert normalize([loud, flagged], 10, "strongest") == [flagged]
+    assert normalize([loud, flagged], 10, "split") == [_annotation(1, intensity=7), flagged, _annotation(4, intensity=7)]
+
+
+def test_instrumented_encode_reports_normalize_stage():
+    metrics = MetricsAggregator()
+    annotations = [_annotation(1, intensity=2), _annotation(1, intensity=5), _annotation(1, intensity=5)]
+    InlineEncoder(Tokenizer(), metrics=metrics, merge_policy="strongest").encode(TEXT, annotations)
+
+    snapshot = metrics.snapshot()
+    assert snapshot["stages"]["encode.normalize"]["count"] == 1
+    assert snapshot["counters"]["encode.markers"] == 1